@@ -0,0 +1,520 @@
+"""
+列式汇总引擎：把日志读成几列数组（开始 / 结束时间、分钟数、模式编码），
+同时把每条记录按 [开始, 结束) 和每个小时重叠的秒数分摊进“小时桶”。
+任意日期区间的按天 / 按周 / 按小时 / 按模式汇总都只是对小时桶切片求和，
+跨零点的学习会分到两天里，不再整条算在开始那天。
+
+装了 NumPy 就用向量化计算，没装也能跑（退回纯 Python 循环，只是慢一些）。
+"""
+import threading
+import time
+from array import array
+from datetime import date, timedelta
+
+from log_store import Snapshot, epoch_day, is_fixed_time, locked, to_epoch
+from rollups import MAX_SPAN_SECONDS, SPAN_LOOKBACK_DAYS, split_span
+
+# 尝试导入 numpy（用于向量化计算），没有的话退回纯 Python
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_EPOCH_DATE = date(1970, 1, 1)
+
+# 小时桶按数组存的范围：今天往前 30 年、往后 2 年。范围外的记录（多半是年份写错了）
+# 放进稀疏字典，不会为一条 2206 年的记录铺出上百万个空小时
+DENSE_YEARS_BACK = 30
+DENSE_YEARS_AHEAD = 2
+
+
+def day_number(date_str: str) -> int:
+    """
+    'YYYY-MM-DD' -> 1970-01-01 起的第几天。
+    """
+    return (date.fromisoformat(date_str) - _EPOCH_DATE).days
+
+
+def week_key(monday_number: int) -> str:
+    """
+    某周周一的天数编号 -> ISO 周键 'YYYY-Www'。
+    """
+    iso_year, iso_week, _ = (_EPOCH_DATE + timedelta(days=monday_number)).isocalendar()
+    return f"{iso_year}-W{iso_week:02d}"
+
+
+def _extend(arr: array, values):
+    """
+    往 array 末尾追加；NumPy 数组直接按字节拷贝，不逐个转 Python 对象。
+    """
+    if np is not None and isinstance(values, np.ndarray):
+        dtype = np.int64 if arr.typecode == "q" else np.float64
+        arr.frombytes(values.astype(dtype).tobytes())
+    else:
+        arr.extend(values)
+
+
+class HourBuckets:
+    """
+    按“1970 起第几个小时”× 模式累计分钟数：rows[模式编码][i] 是第 first_hour + i 个小时
+    里这个模式的学习分钟数。覆盖范围按整天对齐，追加新记录时在末尾补零扩展；
+    离今天太远的小时不进数组，记在 sparse 字典里。
+    """
+
+    def __init__(self):
+        self.first_hour = None
+        self.hours = 0              # 覆盖的小时数，24 的倍数
+        self.rows = []              # 每个模式一个 array("d")
+        self.sparse = {}            # 数组范围外的：(模式编码, 第几个小时) -> 分钟数
+        now_hour = int(time.time()) // 3600
+        self.lo_limit = now_hour - DENSE_YEARS_BACK * 366 * 24
+        self.hi_limit = now_hour + DENSE_YEARS_AHEAD * 366 * 24
+
+    def _cover(self, mode_count: int, lo_hour: int, hi_hour: int):
+        """
+        保证 rows 覆盖 [lo_hour, hi_hour] 且至少有 mode_count 行。
+        """
+        lo, hi = lo_hour - lo_hour % 24, hi_hour - hi_hour % 24 + 24
+        if self.first_hour is None:
+            self.first_hour = lo
+        if lo < self.first_hour:
+            # 比已有记录还早的记录（很少见），整体往前挪
+            pad = bytes(8 * (self.first_hour - lo))
+            self.rows = [array("d", pad) + row for row in self.rows]
+            self.hours += self.first_hour - lo
+            self.first_hour = lo
+        if hi > self.first_hour + self.hours:
+            pad = bytes(8 * (hi - self.first_hour - self.hours))
+            for row in self.rows:
+                row.frombytes(pad)
+            self.hours = hi - self.first_hour
+        while len(self.rows) < mode_count:
+            self.rows.append(array("d", bytes(8 * self.hours)))
+
+    def add(self, starts, ends, minutes, codes):
+        """
+        把一批记录摊进小时桶。
+        """
+        if not len(starts):
+            return
+        if np is None:
+            self._add_python(starts, ends, minutes, codes)
+            return
+        s = np.asarray(starts, dtype=np.int64)
+        e = np.maximum(np.asarray(ends, dtype=np.int64), s)     # 结束早于开始的当成零长度
+        m = np.asarray(minutes, dtype=np.float64)
+        c = np.asarray(codes, dtype=np.int64)
+        length = e - s
+        first = s // 3600
+        span = np.where(length > 0, (e - 1) // 3600, first) - first
+        # 长过 MAX_SPAN_SECONDS 的和 split_span 一样整条算在开始的小时，交给稀疏字典
+        dense = (first >= self.lo_limit) & (first + span <= self.hi_limit) & (length <= MAX_SPAN_SECONDS)
+        if not dense.all():
+            odd = ~dense
+            self._add_sparse(s[odd].tolist(), e[odd].tolist(), m[odd].tolist(), c[odd].tolist())
+            s, e, m, c, length, first, span = (a[dense] for a in (s, e, m, c, length, first, span))
+            if not len(s):
+                return
+        self._cover(int(c.max()) + 1, int(first.min()), int((first + span).max()))
+        views = [np.frombuffer(row, dtype=np.float64) for row in self.rows]
+        # 第 k 轮处理每条记录的第 k 个小时；绝大多数记录只跨一两个小时，轮数很少
+        for k in range(int(span.max()) + 1):
+            idx = np.nonzero(span >= k)[0] if k else np.arange(len(s))
+            hour = first[idx] + k
+            overlap = np.minimum(e[idx], (hour + 1) * 3600) - np.maximum(s[idx], hour * 3600)
+            share = np.where(length[idx] > 0, overlap / np.maximum(length[idx], 1), 1.0)
+            pos = hour - self.first_hour
+            for code in np.unique(c[idx]):
+                sel = c[idx] == code
+                p = pos[sel]
+                base = int(p.min())
+                sums = np.bincount(p - base, weights=m[idx][sel] * share[sel])
+                views[code][base:base + len(sums)] += sums
+
+    def _dense(self, t0: int, t1: int) -> bool:
+        first, last = t0 // 3600, (max(t0 + 1, t1) - 1) // 3600
+        return self.lo_limit <= first and last <= self.hi_limit and t1 - t0 <= MAX_SPAN_SECONDS
+
+    def _add_sparse(self, starts, ends, minutes, codes):
+        """
+        数组范围外或者长得离谱（split_span 整条算在开始的小时）的记录记进稀疏字典。
+        """
+        for t0, t1, m, c in zip(starts, ends, minutes, codes):
+            for hour, part in split_span(t0, max(t0, t1), m, 3600):
+                self.sparse[c, hour] = self.sparse.get((c, hour), 0.0) + part
+            while len(self.rows) <= c:
+                self.rows.append(array("d", bytes(8 * self.hours)))
+
+    def _add_python(self, starts, ends, minutes, codes):
+        parts = []
+        odd = []
+        for t0, t1, m, c in zip(starts, ends, minutes, codes):
+            if not self._dense(t0, t1):
+                odd.append((t0, t1, m, c))
+                continue
+            for hour, part in split_span(t0, max(t0, t1), m, 3600):
+                parts.append((c, hour, part))
+        if odd:
+            self._add_sparse(*zip(*odd))
+        if not parts:
+            return
+        self._cover(max(c for c, _, _ in parts) + 1,
+                    min(h for _, h, _ in parts), max(h for _, h, _ in parts))
+        for c, hour, part in parts:
+            self.rows[c][hour - self.first_hour] += part
+
+    def window(self, lo_day: int, hi_day: int):
+        """
+        第 lo_day ~ hi_day 天的小时桶：装了 NumPy 时返回 (模式数, 天数, 24) 的数组，
+        否则返回同样形状的嵌套列表。覆盖范围以外的补零。
+        """
+        days = hi_day - lo_day + 1
+        lo = max(lo_day * 24, self.first_hour or 0)
+        hi = min((hi_day + 1) * 24, (self.first_hour or 0) + self.hours)
+        if np is not None:
+            cube = np.zeros((len(self.rows), days * 24))
+            if lo < hi:
+                for code, row in enumerate(self.rows):
+                    cube[code, lo - lo_day * 24:hi - lo_day * 24] = \
+                        np.frombuffer(row, dtype=np.float64)[lo - self.first_hour:hi - self.first_hour]
+            for code, i, v in self._sparse_window(lo_day, hi_day):
+                cube[code, i] += v
+            return cube.reshape(len(self.rows), days, 24)
+        flats = []
+        for row in self.rows:
+            flat = [0.0] * (days * 24)
+            if lo < hi:
+                flat[lo - lo_day * 24:hi - lo_day * 24] = row[lo - self.first_hour:hi - self.first_hour]
+            flats.append(flat)
+        for code, i, v in self._sparse_window(lo_day, hi_day):
+            flats[code][i] += v
+        return [[flat[d * 24:(d + 1) * 24] for d in range(days)] for flat in flats]
+
+    def _sparse_window(self, lo_day: int, hi_day: int):
+        """
+        稀疏字典里落在第 lo_day ~ hi_day 天的项：[(模式编码, 区间内第几个小时, 分钟数), ...]。
+        """
+        lo, hi = lo_day * 24, (hi_day + 1) * 24
+        return [(code, hour - lo, v) for (code, hour), v in self.sparse.items() if lo <= hour < hi]
+
+
+class AggregationEngine:
+    """
+    一个 LogStore 对应一个引擎。日志只在第一次用到时整体载入，之后只追加新记录。
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._generation = None
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self.starts = array("q")        # 开始时间（秒）
+        self.ends = array("q")          # 结束时间（秒）
+        self.minutes = array("d")       # 学习分钟数
+        self.modes = array("H")         # 模式编码，见 mode_names
+        self.rows = 0                   # 已经读过的日志记录数（含时间格式不对、没进列数组的行）
+        self.mode_names = []
+        self._mode_codes = {}
+        self.buckets = HourBuckets()
+
+    def __len__(self):
+        return len(self.starts)
+
+    # ---------- 载入 ----------
+    @locked
+    def refresh(self):
+        """
+        把日志里新增的记录追加进列数组；日志被重建过就整体重新载入。
+        """
+        generation = getattr(self.store, "generation", 0)
+        if generation != self._generation:
+            self._reset()
+        count, columns = self._columns_since(self.rows)
+        if getattr(self.store, "generation", 0) != generation:
+            # 读的过程中日志被重建了，编号全变了，从头再来
+            self._reset()
+            generation = getattr(self.store, "generation", 0)
+            count, columns = self._columns_since(0)
+        self._generation = generation
+        self.rows += count
+
+        starts, ends, minutes, modes = columns
+        codes = array("H")
+        for mode in modes:
+            code = self._mode_codes.get(mode)
+            if code is None:
+                code = self._mode_codes[mode] = len(self.mode_names)
+                self.mode_names.append(mode)
+            codes.append(code)
+        _extend(self.starts, starts)
+        _extend(self.ends, ends)
+        _extend(self.minutes, minutes)
+        self.modes.extend(codes)
+        self.buckets.add(starts, ends, minutes, codes)
+
+    def version(self):
+        """
+        数据版本：载入新记录或日志被重建后一定会变，可以当缓存键用。
+        """
+        self.refresh()
+        return self._generation, self.rows
+
+    def _columns_since(self, n: int):
+        """
+        返回 (读了几条记录, 四列)：四列是第 n 条之后的 (start 秒数, end 秒数, 分钟数, 模式)。
+        时间格式不对的行不进列数组，但照样算在“读了几条”里，下次从它后面接着读。
+
+        二进制日志可以直接给出数值；其他格式要从时间字符串换算，
+        装了 NumPy 就整列一次性解析。
+        """
+        records_since = getattr(self.store, "records_since", None)
+        if records_since is not None:
+            records = records_since(n)
+            return len(records), (tuple(map(list, zip(*records))) if records else ([], [], [], []))
+        sessions = self.store.sessions_since(n)
+        if np is not None and sessions:
+            # NumPy 能解析的写法比 to_epoch 宽（只有日期、带 T 的都认），
+            # 先按同一个标准挑出格式规整的行整列解析，其余的逐行交给 to_epoch，两条路径结果一致
+            fixed, odd = [], []
+            for s in sessions:
+                (fixed if is_fixed_time(s.start) and is_fixed_time(s.end) else odd).append(s)
+            try:
+                starts = np.array([s.start for s in fixed], dtype="datetime64[s]").astype(np.int64)
+                ends = np.array([s.end for s in fixed], dtype="datetime64[s]").astype(np.int64)
+            except ValueError:
+                pass    # 有数值不对的行（比如 13 月），全部逐行处理
+            else:
+                if not odd:
+                    return len(sessions), (starts, ends, [s.minutes for s in fixed], [s.mode for s in fixed])
+                _, (more_starts, more_ends, more_minutes, more_modes) = self._parse_rows(odd)
+                return len(sessions), (np.concatenate([starts, np.array(more_starts, dtype=np.int64)]),
+                                       np.concatenate([ends, np.array(more_ends, dtype=np.int64)]),
+                                       [s.minutes for s in fixed] + more_minutes,
+                                       [s.mode for s in fixed] + more_modes)
+        return self._parse_rows(sessions)
+
+    @staticmethod
+    def _parse_rows(sessions):
+        """
+        逐行用 to_epoch 换算，格式不对的行丢掉；返回值和 _columns_since 一样。
+        """
+        records = []
+        for s in sessions:
+            try:
+                records.append((to_epoch(s.start), to_epoch(s.end), s.minutes, s.mode))
+            except ValueError:
+                continue
+        return len(sessions), (tuple(map(list, zip(*records))) if records else ([], [], [], []))
+
+    # ---------- 查询 ----------
+    def _select(self, from_date: str, to_date: str):
+        """
+        返回区间内记录的 (开始天数编号, 开始秒数, 分钟数, 模式编码) 四列。
+        """
+        lo, hi = day_number(from_date), day_number(to_date)
+        if np is not None and self.starts:
+            starts = np.frombuffer(self.starts, dtype=np.int64)
+            days = starts // 86400
+            mask = (days >= lo) & (days <= hi)
+            return (days[mask], starts[mask],
+                    np.frombuffer(self.minutes, dtype=np.float64)[mask],
+                    np.frombuffer(self.modes, dtype=np.uint16)[mask])
+        if np is not None:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, np.zeros(0), empty
+        rows = [(t // 86400, t, m, c)
+                for t, m, c in zip(self.starts, self.minutes, self.modes)
+                if lo <= t // 86400 <= hi]
+        return tuple(map(list, zip(*rows))) if rows else ([], [], [], [])
+
+    def _sum(self, from_date: str, to_date: str, keep: str):
+        """
+        区间内的小时桶按 keep（"mode" / "day" / "hour"）那一维求和，返回列表。
+        """
+        cube = self.buckets.window(day_number(from_date), day_number(to_date))
+        if np is not None:
+            axes = {"mode": (1, 2), "day": (0, 2), "hour": (0, 1)}[keep]
+            return cube.sum(axis=axes).tolist()
+        days = day_number(to_date) - day_number(from_date) + 1
+        size = {"mode": len(cube), "day": days, "hour": 24}[keep]
+        totals = [0.0] * size
+        for code, by_day in enumerate(cube):
+            for d, hours in enumerate(by_day):
+                if keep == "hour":
+                    for h, v in enumerate(hours):
+                        totals[h] += v
+                else:
+                    totals[code if keep == "mode" else d] += sum(hours)
+        return totals
+
+    @locked
+    def daily(self, from_date: str, to_date: str):
+        """
+        返回 [(日期, 分钟数), ...]，区间内每天一项（含两端）。
+        """
+        self.refresh()
+        lo = day_number(from_date)
+        return [(epoch_day(lo + i), v) for i, v in enumerate(self._sum(from_date, to_date, "day"))]
+
+    @locked
+    def weekly(self, from_date: str, to_date: str):
+        """
+        返回 [(ISO 周键, 分钟数), ...]，覆盖区间的每一周一项（只算区间内的那几天）。
+        """
+        self.refresh()
+        # 1970-01-01 是周四，+3 后整除 7 就是“第几周（周一开始）”
+        lo = day_number(from_date)
+        first = (lo + 3) // 7
+        last = (day_number(to_date) + 3) // 7
+        totals = [0.0] * (last - first + 1)
+        for i, v in enumerate(self._sum(from_date, to_date, "day")):
+            totals[(lo + i + 3) // 7 - first] += v
+        return [(week_key((first + i) * 7 - 3), v) for i, v in enumerate(totals)]
+
+    @locked
+    def hourly(self, from_date: str, to_date: str):
+        """
+        返回长度 24 的列表：区间内每个钟点（0 点 ~ 23 点）的学习分钟数，按实际时段分摊。
+        """
+        self.refresh()
+        return self._sum(from_date, to_date, "hour")
+
+    @locked
+    def by_mode(self, from_date: str, to_date: str):
+        """
+        返回 {模式: 分钟数}，只包含区间内有学习时长的模式。
+        """
+        self.refresh()
+        totals = self._sum(from_date, to_date, "mode")
+        return {name: v for name, v in zip(self.mode_names, totals) if v}
+
+    @locked
+    def total(self, from_date: str, to_date: str):
+        """
+        返回区间内的 (总分钟数, 记录次数)；次数按开始日期算。
+        """
+        self.refresh()
+        _, _, minutes, _ = self._select(from_date, to_date)
+        return float(sum(self._sum(from_date, to_date, "day"))), len(minutes)
+
+
+class PartitionedEngine:
+    """
+    按月分区的日志用：每个分区一个 AggregationEngine，查询只载入和区间重叠的月份
+    （再往前多看两天，月底跨零点的记录会摊进区间），把各月的结果加起来。
+    接口和 AggregationEngine 一致。
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def _engines(self, from_date: str, to_date: str):
+        lookback = (date.fromisoformat(from_date) - timedelta(days=SPAN_LOOKBACK_DAYS)).isoformat()
+        for _, part in self.store.partitions_between(lookback, to_date):
+            yield get_engine(part)
+
+    def refresh(self):
+        self.store.refresh()
+
+    def version(self):
+        self.store.refresh()
+        return self.store.generation, self.store.layout()
+
+    def daily(self, from_date: str, to_date: str):
+        lo, hi = day_number(from_date), day_number(to_date)
+        totals = [0.0] * (hi - lo + 1)
+        for engine in self._engines(from_date, to_date):
+            for i, (_, v) in enumerate(engine.daily(from_date, to_date)):
+                totals[i] += v
+        return [(epoch_day(lo + i), v) for i, v in enumerate(totals)]
+
+    def weekly(self, from_date: str, to_date: str):
+        first_week = (day_number(from_date) + 3) // 7
+        last_week = (day_number(to_date) + 3) // 7
+        totals = [0.0] * (last_week - first_week + 1)
+        for engine in self._engines(from_date, to_date):
+            for i, (_, v) in enumerate(engine.weekly(from_date, to_date)):
+                totals[i] += v
+        return [(week_key((first_week + i) * 7 - 3), v) for i, v in enumerate(totals)]
+
+    def hourly(self, from_date: str, to_date: str):
+        totals = [0.0] * 24
+        for engine in self._engines(from_date, to_date):
+            totals = [a + b for a, b in zip(totals, engine.hourly(from_date, to_date))]
+        return totals
+
+    def by_mode(self, from_date: str, to_date: str):
+        totals = {}
+        for engine in self._engines(from_date, to_date):
+            for mode, v in engine.by_mode(from_date, to_date).items():
+                totals[mode] = totals.get(mode, 0.0) + v
+        return totals
+
+    def total(self, from_date: str, to_date: str):
+        minutes, count = 0.0, 0
+        for engine in self._engines(from_date, to_date):
+            m, c = engine.total(from_date, to_date)
+            minutes += m
+            count += c
+        return minutes, count
+
+
+class RangeEngine:
+    """
+    能按开始日期走索引取一段记录的存储（SQLite）用：不把整个日志载入内存，
+    每次查询只取区间内（再往前多看两天）的记录，临时摊进小时桶再求和。
+    接口和 AggregationEngine 一致。
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def _engine(self, from_date: str, to_date: str) -> AggregationEngine:
+        lookback = (date.fromisoformat(from_date) - timedelta(days=SPAN_LOOKBACK_DAYS)).isoformat()
+        return AggregationEngine(Snapshot(self.store.sessions_between(lookback, to_date)))
+
+    def refresh(self):
+        self.store.refresh()
+
+    def version(self):
+        return getattr(self.store, "generation", 0), self.store.last_id()
+
+    def daily(self, from_date: str, to_date: str):
+        return self._engine(from_date, to_date).daily(from_date, to_date)
+
+    def weekly(self, from_date: str, to_date: str):
+        return self._engine(from_date, to_date).weekly(from_date, to_date)
+
+    def hourly(self, from_date: str, to_date: str):
+        return self._engine(from_date, to_date).hourly(from_date, to_date)
+
+    def by_mode(self, from_date: str, to_date: str):
+        return self._engine(from_date, to_date).by_mode(from_date, to_date)
+
+    def total(self, from_date: str, to_date: str):
+        return self._engine(from_date, to_date).total(from_date, to_date)
+
+
+# 存储对象本身 -> 引擎（不用 id() 当键，免得回收后编号被复用）。统计线程和统计服务都会来取，所以要加锁
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def get_engine(store):
+    """
+    同一个 LogStore 共用同一个引擎，列数组只载入一次。按月分区的日志返回 PartitionedEngine，
+    能按日期区间查询的存储（SQLite）返回 RangeEngine。
+    """
+    with _engines_lock:
+        engine = _engines.get(store)
+        if engine is None:
+            if hasattr(store, "partitions_between"):
+                engine = PartitionedEngine(store)
+            elif hasattr(store, "last_id"):
+                engine = RangeEngine(store)
+            else:
+                engine = AggregationEngine(store)
+            _engines[store] = engine
+    return engine
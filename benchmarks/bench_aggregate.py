@@ -0,0 +1,112 @@
+"""
+对比“原来的逐行循环”和 aggregate.py 列式汇总引擎的速度。
+
+用法：
+    python benchmarks/bench_aggregate.py            # 默认 100 万行
+    python benchmarks/bench_aggregate.py --rows 200000 --json
+"""
+import argparse
+import csv
+import json
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import aggregate                      # noqa: E402
+from gen_log import generate          # noqa: E402
+from log_store import LogStore        # noqa: E402
+from rollups import split_by_day      # noqa: E402
+
+
+def legacy_recent(path: Path, days: int):
+    """
+    原来 summarize_recent 的做法：整文件 csv 解析，逐行 float()，再按天循环。
+    跨零点的记录用 split_by_day 分到两天，和引擎的口径一致，结果才能直接对比。
+    """
+    daily_minutes = {}
+    with path.open("r", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        for row in reader:
+            if len(row) < 3:
+                continue
+            try:
+                m = float(row[2])
+            except ValueError:
+                continue
+            for date_str, part, _ in split_by_day(row[0], row[1], m):
+                daily_minutes[date_str] = daily_minutes.get(date_str, 0.0) + part
+    today = datetime.now().date()
+    values = []
+    for i in range(days - 1, -1, -1):
+        d_str = (today - timedelta(days=i)).strftime("%Y-%m-%d")
+        values.append(round(daily_minutes.get(d_str, 0.0), 2))
+    return values
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - t0, result
+
+
+def run(rows: int):
+    results = {"rows": rows, "numpy": aggregate.np is not None, "cases": []}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "study_log.csv"
+        generate(path, rows)
+        today = datetime.now().date()
+
+        engine = aggregate.AggregationEngine(LogStore(path))
+        load_s, _ = timed(engine.refresh)
+        results["engine_load_s"] = load_s
+
+        for days in (7, 30, 365):
+            from_date = (today - timedelta(days=days - 1)).isoformat()
+            to_date = today.isoformat()
+            legacy_s, legacy = timed(legacy_recent, path, days)
+            engine_s, daily = timed(engine.daily, from_date, to_date)
+            assert all(abs(round(v, 2) - lv) < 0.011 for (_, v), lv in zip(daily, legacy))
+            results["cases"].append({
+                "query": f"daily {days}d",
+                "legacy_s": legacy_s,
+                "engine_s": engine_s,
+                "legacy_rows_per_s": rows / legacy_s,
+                "engine_rows_per_s": rows / engine_s,
+            })
+
+        from_date = (today - timedelta(days=364)).isoformat()
+        for name in ("weekly", "hourly", "by_mode"):
+            engine_s, _ = timed(getattr(engine, name), from_date, today.isoformat())
+            results["cases"].append({
+                "query": f"{name} 365d",
+                "engine_s": engine_s,
+                "engine_rows_per_s": rows / engine_s,
+            })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--json", action="store_true", help="输出 JSON 而不是表格")
+    args = parser.parse_args()
+
+    results = run(args.rows)
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return
+    print(f"行数：{results['rows']}  NumPy：{'有' if results['numpy'] else '无（纯 Python 退化路径）'}")
+    print(f"引擎首次载入：{results['engine_load_s']:.2f} s")
+    print(f"{'查询':<14}{'原循环 (s)':>12}{'引擎 (s)':>12}{'引擎 行/秒':>16}")
+    for case in results["cases"]:
+        legacy = f"{case['legacy_s']:.3f}" if "legacy_s" in case else "-"
+        print(f"{case['query']:<14}{legacy:>12}{case['engine_s']:>12.4f}{case['engine_rows_per_s']:>16,.0f}")
+
+
+if __name__ == "__main__":
+    main()
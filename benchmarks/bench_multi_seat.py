@@ -0,0 +1,83 @@
+"""
+多座位汇总的扩展性测试：生成一批座位日志，分别用 1、2、4 …… 个进程跑
+multi_seat.aggregate_seats，看耗时随进程数怎么变，并核对各进程数的合计一致。
+
+每次都删掉 sidecar，测的是冷启动（解析 + 汇总）。
+
+用法：
+    python benchmarks/bench_multi_seat.py                        # 200 个座位，每个 2 万行
+    python benchmarks/bench_multi_seat.py --seats 500 --rows 50k --workers 1,2,4,8 --json
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from gen_log import generate, parse_rows      # noqa: E402
+from multi_seat import aggregate_seats, discover  # noqa: E402
+
+
+def clear_sidecars(directory: Path):
+    for path in directory.iterdir():
+        if path.suffix in (".idx", ".json", ".lock"):
+            path.unlink()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seats", type=int, default=200)
+    parser.add_argument("--rows", default="20k", help="每个座位的行数")
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--workers", help="逗号分隔的进程数（默认 1 到 CPU 核数，每次翻倍）")
+    parser.add_argument("--json", action="store_true", help="输出 JSON")
+    args = parser.parse_args()
+
+    if args.workers:
+        counts = [int(w) for w in args.workers.split(",")]
+    else:
+        counts, n = [], 1
+        while n < (os.cpu_count() or 1):
+            counts.append(n)
+            n *= 2
+        counts.append(os.cpu_count() or 1)
+
+    rows = parse_rows(args.rows)
+    to_date = date.today()
+    from_date = (to_date - timedelta(days=args.days - 1)).isoformat()
+    results = {"seats": args.seats, "rows_per_seat": rows, "cpus": os.cpu_count(), "runs": {}}
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        print(f"… 生成 {args.seats} 个座位 × {rows:,} 行", file=sys.stderr)
+        for i in range(args.seats):
+            generate(directory / f"seat{i:04d}.csv", rows, seed=i)
+        seats = discover(directory)
+
+        baseline = None
+        for workers in counts:
+            clear_sidecars(directory)
+            t0 = time.perf_counter()
+            _, combined = aggregate_seats(seats, from_date, to_date.isoformat(), workers)
+            elapsed = time.perf_counter() - t0
+            total = round(combined["minutes"], 2)
+            if baseline is None:
+                baseline = (elapsed, total)
+            assert total == baseline[1], f"{workers} 个进程的合计 {total} 和 {baseline[1]} 对不上"
+            results["runs"][workers] = {"seconds": elapsed, "speedup": baseline[0] / elapsed}
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return
+    print(f"{args.seats} 个座位 × {rows:,} 行，CPU {os.cpu_count()} 核")
+    print(f"{'进程数':>6}{'耗时 (s)':>12}{'加速比':>10}")
+    for workers, run in results["runs"].items():
+        print(f"{workers:>6}{run['seconds']:>12.2f}{run['speedup']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
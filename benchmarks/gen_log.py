@@ -0,0 +1,116 @@
+"""
+生成测试用的 study_log.csv：截止到现在、跨好几年，正计时 / 倒计时混合，备注里有中文、
+emoji、逗号、引号和换行，行数从 1 万到 1000 万都行。
+
+用法：
+    python benchmarks/gen_log.py study_log.csv --rows 1M
+    python benchmarks/gen_log.py big.csv --rows 10M --years 5 --seed 7
+"""
+import argparse
+import csv
+import random
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from log_store import HEADER, TIME_FORMAT, epoch_day, to_epoch  # noqa: E402
+
+# 常用的行数档位
+SIZES = {"10k": 10_000, "100k": 100_000, "1M": 1_000_000, "10M": 10_000_000}
+
+NOTES = [
+    "", "", "", "",
+    "高数作业", "英语单词", "线性代数 第三章", "阅读论文：Attention Is All You Need",
+    "专业课复习, 第 2 轮", '刷题 "LeetCode" 10 道', "📚 背书", "写实验报告\n明天交",
+    "日本語の勉強", "Ｃ语言 指针", "复习（期末）",
+]
+
+# 倒计时常用的分钟数；偶尔提前结束
+COUNTDOWN_MINUTES = [25, 25, 25, 30, 45, 50, 60, 90]
+
+CHUNK_ROWS = 100_000
+
+
+def parse_rows(text: str) -> int:
+    """
+    '10k' / '1M' / '250000' -> 行数。
+    """
+    if text in SIZES:
+        return SIZES[text]
+    units = {"k": 1_000, "K": 1_000, "m": 1_000_000, "M": 1_000_000}
+    if text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+def _format(seconds: int) -> str:
+    h, rem = divmod(seconds % 86400, 3600)
+    m, s = divmod(rem, 60)
+    return f"{epoch_day(seconds // 86400)} {h:02d}:{m:02d}:{s:02d}"
+
+
+def iter_rows(rows: int, years: float = 3, seed: int = 42, end: datetime = None):
+    """
+    逐行产生 [start, end, minutes, mode, note]，按开始时间递增，最后一条在 end（默认现在）之前。
+    """
+    rng = random.Random(seed)
+    last = to_epoch((end or datetime.now()).strftime(TIME_FORMAT))
+    days = max(1, int(years * 365))
+    first_day = last // 86400 - days + 1
+    per_day = rows / days
+    for i in range(rows):
+        # 第几天 + 当天的进度，映射到 07:00 ~ 23:30 之间
+        pos = (i + rng.random() * 0.5) / per_day
+        day = int(pos)
+        start = (first_day + day) * 86400 + 7 * 3600 + int((pos - day) * 16.5 * 3600)
+        start = min(start, last - 60)   # 今天的记录不能晚于现在
+        if rng.random() < 0.35:
+            mode = "countdown"
+            minutes = float(rng.choice(COUNTDOWN_MINUTES))
+            if rng.random() < 0.2:
+                minutes *= rng.uniform(0.3, 1.0)
+        else:
+            mode = "countup"
+            minutes = rng.uniform(3, 150)
+        minutes = round(minutes, 2)
+        yield [_format(start), _format(start + int(minutes * 60)), minutes, mode, rng.choice(NOTES)]
+
+
+def generate(path, rows: int, years: float = 3, seed: int = 42, end: datetime = None) -> Path:
+    """
+    写一个 rows 行的日志文件（覆盖已有文件），返回路径。
+    """
+    path = Path(path)
+    with path.open("w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        chunk = []
+        for row in iter_rows(rows, years, seed, end):
+            chunk.append(row)
+            if len(chunk) >= CHUNK_ROWS:
+                writer.writerows(chunk)
+                chunk = []
+        writer.writerows(chunk)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--rows", default="100k", help="行数，可以写 10k / 100k / 1M / 10M 或具体数字")
+    parser.add_argument("--years", type=float, default=3, help="跨几年（默认 3）")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rows = parse_rows(args.rows)
+    t0 = time.perf_counter()
+    generate(args.path, rows, args.years, args.seed)
+    size_mb = args.path.stat().st_size / 1e6
+    print(f"✅ 已生成 {rows:,} 行 → {args.path}（{size_mb:.1f} MB，{time.perf_counter() - t0:.1f} s）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+统计服务的压力测试：用大日志启动 stats_server.py，开一批长连接并发轮询
+/today、/recent、/modes，统计每秒请求数和延迟分位数（p50 / p99）。
+可以边压边往日志里追加记录，看增量刷新时的表现。
+
+用法：
+    python benchmarks/load_stats_server.py                           # 100 万行，50 个连接，跑 10 秒
+    python benchmarks/load_stats_server.py --rows 10M --clients 200 --seconds 30 --append-rate 5
+    python benchmarks/load_stats_server.py --log big.csv --json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from gen_log import generate, parse_rows  # noqa: E402
+
+# 轮询的接口和比例（看板大多只看今天和最近一周）
+TARGETS = ["/today"] * 5 + ["/recent?days=7"] * 3 + ["/recent?days=30", "/modes?days=30"]
+
+
+def percentile(sorted_values, p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p / 100))]
+
+
+async def client(port: int, deadline: float, latencies: list, errors: list, seed: int):
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        while time.perf_counter() < deadline:
+            target = rng.choice(TARGETS)
+            t0 = time.perf_counter()
+            writer.write(f"GET {target} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode("ascii"))
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = int(next(line.split(b":")[1] for line in head.split(b"\r\n")
+                              if line.lower().startswith(b"content-length")))
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - t0)
+            if not head.startswith(b"HTTP/1.1 200"):
+                errors.append(head.split(b"\r\n")[0].decode())
+    finally:
+        writer.close()
+
+
+async def appender(log: Path, deadline: float, rate: float):
+    """
+    每秒往日志末尾追加 rate 条记录（走正常的 save_log 路径）。
+    """
+    from log_store import open_store
+    store = open_store(log)
+    count = 0
+    while time.perf_counter() < deadline:
+        now = datetime.now()
+        store.append(now - timedelta(minutes=25), now, 1500, "countdown", "压测")
+        count += 1
+        await asyncio.sleep(1 / rate)
+    return count
+
+
+async def run_load(port: int, clients: int, seconds: float, log: Path, append_rate: float):
+    latencies, errors = [], []
+    deadline = time.perf_counter() + seconds
+    tasks = [client(port, deadline, latencies, errors, i) for i in range(clients)]
+    if append_rate > 0:
+        tasks.append(appender(log, deadline, append_rate))
+    t0 = time.perf_counter()
+    results = await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - t0
+    appended = results[-1] if append_rate > 0 else 0
+    return latencies, errors, elapsed, appended
+
+
+def start_server(log: Path):
+    """
+    启动服务子进程，等它打印出端口再返回 (进程, 端口, 启动耗时)。
+    """
+    t0 = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, str(ROOT / "stats_server.py"), "--port", "0", "--log", str(log)],
+                            stdout=subprocess.PIPE, text=True, cwd=ROOT)
+    line = proc.stdout.readline()
+    if ":" not in line:
+        proc.kill()
+        raise SystemExit("❌ 统计服务没能启动")
+    port = int(line.rsplit(":", 1)[1].split("/")[0])
+    return proc, port, time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", default="1M", help="生成的日志行数（给了 --log 时忽略）")
+    parser.add_argument("--log", type=Path, help="用现成的日志，不生成（会被追加记录）")
+    parser.add_argument("--clients", type=int, default=50, help="并发长连接数")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--append-rate", type=float, default=0, help="压测期间每秒追加几条记录")
+    parser.add_argument("--json", action="store_true", help="输出 JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log = args.log
+        if log is None:
+            rows = parse_rows(args.rows)
+            log = Path(tmp) / "study_log.csv"
+            print(f"… 生成 {rows:,} 行日志", file=sys.stderr)
+            generate(log, rows)
+        proc, port, startup = start_server(log)
+        try:
+            latencies, errors, elapsed, appended = asyncio.run(
+                run_load(port, args.clients, args.seconds, log, args.append_rate))
+        finally:
+            proc.terminate()
+            proc.wait()
+
+    latencies.sort()
+    report = {
+        "log_mb": round(log.stat().st_size / 1e6, 1) if log.exists() else None,
+        "clients": args.clients,
+        "seconds": round(elapsed, 2),
+        "startup_s": round(startup, 2),
+        "requests": len(latencies),
+        "errors": len(errors),
+        "appended": appended,
+        "req_per_s": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+        "cpus": os.cpu_count(),
+    }
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print(f"启动 {report['startup_s']} s，{args.clients} 个连接跑了 {report['seconds']} s："
+              f"{report['requests']} 次请求，{report['errors']} 次出错，追加 {appended} 条")
+        print(f"{report['req_per_s']} req/s，p50 {report['p50_ms']} ms，p99 {report['p99_ms']} ms，"
+              f"最慢 {report['max_ms']} ms")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
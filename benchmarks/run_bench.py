@@ -0,0 +1,200 @@
+"""
+存储和统计路径的基准测试：按不同行数生成日志，逐项计时，输出 JSON 方便在提交之间对比。
+
+每个行数档位在一个新的子进程里跑（STUDY_LOG_FILE 指向生成的日志），
+这样“冷启动”才是真的冷：没有任何内存缓存，sidecar 也先删掉。
+
+用法：
+    python benchmarks/run_bench.py                              # 默认 10k,100k
+    python benchmarks/run_bench.py --sizes 10k,100k,1M --out before.json
+    python benchmarks/run_bench.py --sizes 100k --compare before.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from gen_log import generate, parse_rows  # noqa: E402
+
+# 比基线慢这么多倍就标成回退
+REGRESSION_RATIO = 1.2
+
+
+def measure(fn, *args, repeat: int = 5):
+    """
+    跑 repeat 次，返回最快的一次（秒）。
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def once(fn, *args):
+    t0 = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - t0
+
+
+# ================== 子进程：对一个日志文件逐项计时 ==================
+
+def run_worker(saves: int):
+    """
+    在 STUDY_LOG_FILE 指向的日志上跑所有用例，返回 {用例名: 秒数}。
+    """
+    import log_store
+    import log_writer
+    from log_store import LOG_FILE, LogStore
+
+    results = {}
+    for sidecar in (".idx", ".rollup.json"):
+        LOG_FILE.with_name(LOG_FILE.name + sidecar).unlink(missing_ok=True)
+
+    # 解析：没有 sidecar 的冷启动 / 同一个 LogStore 再读一次 / 新 LogStore 但 sidecar 已在
+    store = LogStore(LOG_FILE)
+    results["parse_cold_s"] = once(store.sessions)
+    results["parse_warm_s"] = measure(store.sessions)
+    results["parse_sidecar_s"] = once(LogStore(LOG_FILE).day_total, datetime.now().strftime("%Y-%m-%d"))
+
+    try:
+        from timer_window import summarize_recent, summarize_today
+    except ImportError:     # 没有 tkinter
+        summarize_recent = summarize_today = None
+    if summarize_today is not None:
+        results["summarize_today_first_s"] = once(summarize_today)
+        results["summarize_today_s"] = measure(summarize_today)
+        results["summarize_recent_first_s"] = once(summarize_recent, 7)
+        for days in (7, 30, 365):
+            results[f"summarize_recent_{days}d_s"] = measure(summarize_recent, days)
+
+    from main import recent_curve_data    # main 在模块级只导入标准库和本仓库的模块
+    for days in (7, 30):
+        results[f"recent_curve_data_{days}d_s"] = measure(recent_curve_data, days)
+
+    # 写：放在最后，测完把追加的记录截掉，生成的日志可以反复用
+    original_size = LOG_FILE.stat().st_size
+    now = datetime.now()
+    total = once(lambda: [log_store.save_log(now, now, 60, "countup", "bench") for _ in range(saves)])
+    results["save_log_sync_per_row_s"] = total / saves
+    # 后台写入器分开测两项：save_log 本身只是入队（界面感受到的延迟）；
+    # 入队加 flush 是吞吐。interval_ms=0 让写线程不等凑批，flush 量到的是写盘而不是凑批的等待
+    writer = log_writer.start(interval_ms=0)
+    put_s = once(lambda: [log_store.save_log(now, now, 60, "countup", "bench") for _ in range(saves)])
+    flush_s = once(writer.flush)
+    log_writer.stop()
+    results["save_log_writer_put_per_row_s"] = put_s / saves
+    results["save_log_writer_drain_per_row_s"] = (put_s + flush_s) / saves
+    os.truncate(LOG_FILE, original_size)
+    for sidecar in (".idx", ".rollup.json"):
+        LOG_FILE.with_name(LOG_FILE.name + sidecar).unlink(missing_ok=True)
+    return results
+
+
+# ================== 主进程：生成数据、启动子进程、汇总 ==================
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def bench_size(label: str, data_dir: Path, saves: int):
+    rows = parse_rows(label)
+    path = data_dir / f"study_log_{label}.csv"
+    if not path.exists():
+        print(f"… 生成 {rows:,} 行日志", file=sys.stderr)
+        generate(path, rows)
+    env = dict(os.environ, STUDY_LOG_FILE=str(path))
+    proc = subprocess.run([sys.executable, __file__, "--worker", "--saves", str(saves)],
+                          env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise SystemExit(f"❌ {label} 档位运行失败：\n{proc.stderr}")
+    results = json.loads(proc.stdout)
+    results["rows"] = rows
+    results["file_mb"] = path.stat().st_size / 1e6
+    return results
+
+
+def compare(current, baseline):
+    """
+    打印和基线的对比表，返回回退的用例数。
+    """
+    regressions = 0
+    print(f"{'档位':<8}{'用例':<32}{'基线 (ms)':>12}{'现在 (ms)':>12}{'倍数':>8}")
+    for label, cases in current["results"].items():
+        old_cases = baseline["results"].get(label, {})
+        for name, value in cases.items():
+            if not name.endswith("_s") or name not in old_cases:
+                continue
+            ratio = value / old_cases[name] if old_cases[name] else float("inf")
+            flag = " ⚠️" if ratio > REGRESSION_RATIO else ""
+            regressions += bool(flag)
+            print(f"{label:<8}{name:<32}{old_cases[name] * 1000:>12.3f}{value * 1000:>12.3f}"
+                  f"{ratio:>8.2f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="10k,100k", help="逗号分隔的行数档位，例如 10k,100k,1M,10M")
+    parser.add_argument("--saves", type=int, default=200, help="计时 save_log 时写多少条")
+    parser.add_argument("--data-dir", type=Path, help="生成的日志放哪（默认临时目录，用完删掉）；"
+                                                     "文件已存在就直接复用")
+    parser.add_argument("--out", type=Path, help="结果 JSON 写到这个文件（默认打印到标准输出）")
+    parser.add_argument("--compare", type=Path, help="和之前保存的结果 JSON 对比")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.saves)))
+        return 0
+
+    try:
+        import numpy
+    except ImportError:
+        numpy = None
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": numpy.__version__ if numpy else None,
+        },
+        "results": {},
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = args.data_dir or Path(tmp)
+        data_dir.mkdir(parents=True, exist_ok=True)
+        for label in args.sizes.split(","):
+            label = label.strip()
+            print(f"▶ {label}", file=sys.stderr)
+            report["results"][label] = bench_size(label, data_dir, args.saves)
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        args.out.write_text(text + "\n", encoding="utf-8")
+        print(f"✅ 结果已写入 {args.out}", file=sys.stderr)
+    elif not args.compare:
+        print(text)
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        return 1 if compare(report, baseline) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""
+多进程同时往同一个 study_log.csv 追加记录的压力测试。
+
+每个进程用自己的 LogStore 写 --rows 条（每条备注都带逗号、引号、换行和中文），
+写之前先 refresh，让预聚合统计跟着每批追加更新、关闭时写进 sidecar。
+最后检查：行数对得上、每行都能解析、没有重复也没有交错、文件以换行结尾、
+从 sidecar 接着补出来的预聚合统计和全量重算一致。
+--torn 会在开始前故意留一个写了一半的行，检查修复。
+
+用法：
+    python benchmarks/stress_append.py
+    python benchmarks/stress_append.py --procs 16 --rows 2000 --batch 10 --json
+"""
+import argparse
+import json
+import multiprocessing
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from log_store import LogStore, Session, TIME_FORMAT  # noqa: E402
+
+
+def writer(path: str, worker: int, rows: int, batch: int, barrier):
+    store = LogStore(path)
+    base = datetime(2026, 1, 1, 8) + timedelta(days=worker)
+    pending = []
+    barrier.wait()
+    for i in range(rows):
+        t = base + timedelta(seconds=i)
+        pending.append(Session(t.strftime(TIME_FORMAT), (t + timedelta(minutes=1)).strftime(TIME_FORMAT),
+                               1.0, "countup", f'w{worker}#{i}, "引号"\n第二行'))
+        if len(pending) >= batch:
+            # 先追上别的进程写的行，汇总停在文件末尾，这一批才能直接累加进去
+            store.refresh()
+            store.append_many(pending)
+            pending = []
+    if pending:
+        store.refresh()
+        store.append_many(pending)
+    store.close()       # 把累加的汇总写进 sidecar
+
+
+def run(procs: int, rows: int, batch: int, torn: bool):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "study_log.csv"
+        LogStore(path).ensure_file()
+        if torn:
+            with path.open("ab") as f:
+                f.write(b"2025-12-31 23:00:00,2025-12-31 23:3")
+        barrier = multiprocessing.Barrier(procs + 1)
+        workers = [multiprocessing.Process(target=writer, args=(str(path), w, rows, batch, barrier))
+                   for w in range(procs)]
+        for p in workers:
+            p.start()
+        barrier.wait()
+        t0 = time.perf_counter()
+        for p in workers:
+            p.join()
+        elapsed = time.perf_counter() - t0
+        if any(p.exitcode for p in workers):
+            raise SystemExit("❌ 有写进程异常退出")
+
+        rollup_path = path.with_name(path.name + ".rollup.json")
+        sidecar_written = rollup_path.exists()
+        # 新开的 LogStore 先读写进程留下的 sidecar，再从它的 upto 往后补
+        store = LogStore(path)
+        days = [(datetime(2026, 1, 1) + timedelta(days=w)).strftime("%Y-%m-%d") for w in range(procs)]
+        months = sorted({d[:7] for d in days})
+        keys = [("day", d) for d in days] + [("month", m) for m in months]
+        from_sidecar = [(store.period_total(*key), store.period_by_mode(*key)) for key in keys]
+        sessions = store.sessions()
+        notes = [s.note for s in sessions]
+        expected = {f'w{w}#{i}, "引号"\n第二行' for w in range(procs) for i in range(rows)}
+        store.rebuild_rollups()
+        rebuilt = [(store.period_total(*key), store.period_by_mode(*key)) for key in keys]
+        rebuilt_total = sum(store.period_total("month", m)[1] for m in months)
+        torn_path = path.with_name(path.name + ".torn")
+        checks = {
+            "row_count": len(sessions) == procs * rows,
+            "no_duplicates": len(set(notes)) == len(notes),
+            "all_rows_intact": set(notes) == expected,
+            "ends_with_newline": path.read_bytes().endswith(b"\n"),
+            "sidecar_written": sidecar_written,
+            "rollups_match": from_sidecar == rebuilt and rebuilt_total == procs * rows,
+            "torn_line_moved": (not torn) or torn_path.read_bytes().startswith(b"2025-12-31 23:00:00"),
+        }
+    return {
+        "procs": procs,
+        "rows_per_proc": rows,
+        "batch": batch,
+        "seconds": elapsed,
+        "rows_per_s": procs * rows / elapsed,
+        "checks": checks,
+        "ok": all(checks.values()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--procs", type=int, default=8)
+    parser.add_argument("--rows", type=int, default=1000, help="每个进程写多少条")
+    parser.add_argument("--batch", type=int, default=1, help="每次 append_many 写几条")
+    parser.add_argument("--no-torn", action="store_true", help="不预先制造半行")
+    parser.add_argument("--json", action="store_true", help="输出 JSON 而不是文字")
+    args = parser.parse_args()
+
+    result = run(args.procs, args.rows, args.batch, not args.no_torn)
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    else:
+        print(f"{result['procs']} 个进程 × {result['rows_per_proc']} 条，每批 {result['batch']} 条："
+              f"{result['seconds']:.2f} s，{result['rows_per_s']:,.0f} 行/秒")
+        for name, passed in result["checks"].items():
+            print(f"  {'✅' if passed else '❌'} {name}")
+    return 0 if result["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
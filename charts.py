@@ -0,0 +1,113 @@
+"""
+离屏画图：用 matplotlib 的 Agg 后端把图画成 PNG 字节，不弹窗口、不碰 pyplot，
+可以在后台线程里调用，画好的图再交给 Tk 显示。
+
+画好的图按 (区间, 粒度, 数据版本) 缓存在内存里，同一段区间数据没变时直接复用。
+"""
+import io
+import threading
+import zlib
+from collections import OrderedDict
+
+import perf
+
+# 尝试导入 matplotlib（用于画图），如果没有也能正常跑，只是不能画图
+try:
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+except ImportError:
+    Figure = None
+
+
+def available() -> bool:
+    return Figure is not None
+
+
+@perf.timed("画图")
+def render_line_chart(labels, values, title: str, xlabel: str = "日期",
+                      ylabel: str = "学习时长（分钟）", size=(6, 3.2), dpi: int = 100) -> bytes:
+    """
+    画一张折线图，返回 PNG 字节；没装 matplotlib 时返回 None。
+    """
+    if Figure is None:
+        return None
+    fig = Figure(figsize=size, dpi=dpi)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.plot(labels, values, marker="o")
+    ax.set_title(title)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    # 点太多时只标一部分日期，免得挤成一团
+    step = max(1, len(labels) // 15)
+    ax.set_xticks(range(0, len(labels), step))
+    ax.set_xticklabels(labels[::step], rotation=45, ha="right")
+    fig.tight_layout()
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png")
+    return buf.getvalue()
+
+
+# ================== 图片缓存 ==================
+
+class ChartCache:
+    """
+    按 key 缓存 PNG 字节，超过 maxsize 张时淘汰最久没用过的。线程安全。
+    """
+
+    def __init__(self, maxsize: int = 16):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            png = self._items.get(key)
+            if png is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return png
+
+    def put(self, key, png: bytes):
+        with self._lock:
+            self._items[key] = png
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+
+_cache = ChartCache()
+
+
+def data_version(labels, values) -> int:
+    """
+    图上数据的指纹：日志追加了别的日期的记录时不变，区间里的数有变化才变。
+    """
+    return zlib.crc32(repr((list(labels), list(values))).encode("utf-8"))
+
+
+def cached_line_chart(from_date: str, to_date: str, granularity: str, labels, values,
+                      title: str, **kwargs) -> bytes:
+    """
+    和 render_line_chart 一样，但先查缓存；命中时返回的是同一个 bytes 对象。
+    """
+    if Figure is None:
+        return None
+    size = kwargs.get("size"), kwargs.get("dpi")
+    key = (from_date, to_date, granularity, data_version(labels, values), title, size)
+    png = _cache.get(key)
+    if png is None:
+        png = render_line_chart(labels, values, title, **kwargs)
+        _cache.put(key, png)
+    return png
@@ -0,0 +1,122 @@
+"""
+跨进程的建议锁：同一台机器上 main.py 和 timer_window.py（或多个座位的多个进程）
+同时写一个 study_log.csv 时，用它把追加操作排队。
+
+锁加在旁边的 study_log.csv.lock 上，不碰日志本身的句柄。
+POSIX 用 fcntl.flock（支持共享锁），Windows 用 msvcrt.locking（只有独占锁，
+共享锁也按独占处理）。两者都没有时退化为不加锁。
+"""
+import os
+import time
+from contextlib import contextmanager
+
+# 尝试导入 fcntl / msvcrt，哪个平台有哪个
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+
+def write_atomic(path, data: bytes):
+    """
+    先写临时文件再改名替换，别的进程读 sidecar 时不会读到写了一半的内容。
+    """
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def try_lock(fd: int) -> bool:
+    """
+    不等待地给整个文件加独占锁，别的进程（或本进程另一个句柄）占着时返回 False。
+    锁跟着 fd 走，关掉 fd 就放开了。两种锁都没有的平台总是返回 True。
+    """
+    if fcntl is not None:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return False
+    elif msvcrt is not None:
+        os.lseek(fd, 0, os.SEEK_SET)
+        try:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        except OSError:
+            return False
+    return True
+
+
+class FileLock:
+    """
+    一个文件对应一把锁，可以嵌套：已经持有时再进 shared() / exclusive() 只计数。
+
+    注意先拿共享锁再嵌套拿独占锁不会升级——需要独占时要在最外层拿。
+    本身不是线程安全的，调用方（LogStore）用自己的线程锁保证同一时间只有一个线程在用。
+    """
+
+    def __init__(self, path, create: bool = True):
+        self.path = path
+        self.create = create        # False：锁文件不存在时不创建，也不加锁（只读打开日志时用）
+        self._fd = None
+        self._depth = 0
+
+    @contextmanager
+    def shared(self):
+        with self._hold(exclusive=False):
+            yield
+
+    @contextmanager
+    def exclusive(self):
+        with self._hold(exclusive=True):
+            yield
+
+    @contextmanager
+    def _hold(self, exclusive: bool):
+        if self._depth == 0:
+            self._acquire(exclusive)
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            if self._depth == 0:
+                self._release()
+
+    def _acquire(self, exclusive: bool):
+        if self._fd is None:
+            if self.create:
+                self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            else:
+                try:
+                    self._fd = os.open(self.path, os.O_RDONLY)
+                except FileNotFoundError:
+                    return      # 还没有进程加锁写过，不用等
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        elif msvcrt is not None:
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            while True:
+                try:
+                    # LK_LOCK 自己会重试约 10 秒，还拿不到就抛 OSError，接着等
+                    msvcrt.locking(self._fd, msvcrt.LK_LOCK, 1)
+                    return
+                except OSError:
+                    time.sleep(0.05)
+
+    def _release(self):
+        if self._fd is None:
+            return
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        elif msvcrt is not None:
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+
+    def close(self):
+        if self._fd is not None and self._depth == 0:
+            os.close(self._fd)
+            self._fd = None
@@ -0,0 +1,430 @@
+"""
+可选的定长二进制日志格式：study_log.bin（记录）+ study_log.bin.heap（备注字符串）。
+
+文件开头 16 字节：magic、版本号、记录长度。之后每条记录 40 字节（小端）：
+    start     int64    开始时间（本地时间按 UTC 规则换算的秒数，不受时区 / 夏令时影响）
+    end       int64    结束时间（同上）
+    duration  float64  学习时长（秒）；flags 带 FLAG_RAW_MINUTES 时存的是原始分钟数
+    note_off  uint64   备注在 heap 文件里的字节位置
+    note_len  uint32   备注的 UTF-8 字节长度
+    mode      uint16   模式编码，见 MODE_CODES；CUSTOM_MODE 表示模式名和备注一起存在 heap 里
+    flags     uint16
+
+读取时用 mmap + struct 直接解码，不需要解析时间字符串和 float(row[2])。
+
+用法（和 study_log.csv 互相转换，不丢信息）：
+    python log_binary.py to-bin study_log.csv study_log.bin
+    python log_binary.py to-bin study_log.csv study_log.bin --skip-bad   # 跳过转不回原样的行
+    python log_binary.py to-csv study_log.bin study_log.csv
+"""
+import calendar
+import csv
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+from datetime import datetime
+from pathlib import Path
+
+from file_lock import FileLock
+from log_store import HEADER, Session, epoch_day, from_epoch, locked, make_session, parse_row, to_epoch
+from rollups import RollupTables, split_span
+
+MAGIC = b"STLOGBIN"
+FILE_VERSION = 1
+FILE_HEADER = struct.Struct("<8sHHI")      # magic, 版本, 记录长度, 保留
+RECORD = struct.Struct("<qqdQIHH")         # start, end, duration, note_off, note_len, mode, flags
+
+MODE_CODES = {"countup": 0, "countdown": 1}
+MODES_BY_CODE = {code: mode for mode, code in MODE_CODES.items()}
+CUSTOM_MODE = 0xFFFF
+FLAG_RAW_MINUTES = 1
+
+
+def encode_session(s: Session, note_off: int):
+    """
+    Session -> (记录字节, 要追加到 heap 的字节)。
+    """
+    code = MODE_CODES.get(s.mode, CUSTOM_MODE)
+    text = s.note if code != CUSTOM_MODE else f"{s.mode}\0{s.note}"
+    heap = text.encode("utf-8")
+    seconds = s.minutes * 60
+    if round(seconds / 60, 2) == s.minutes:
+        flags, duration = 0, seconds
+    else:
+        # 手改过的 CSV 可能不是两位小数，原样存分钟数，保证转回去不丢精度
+        flags, duration = FLAG_RAW_MINUTES, s.minutes
+    rec = RECORD.pack(to_epoch(s.start), to_epoch(s.end), duration, note_off, len(heap), code, flags)
+    return rec, heap
+
+
+def decode_record(fields, heap) -> Session:
+    start, end, duration, note_off, note_len, code, flags = fields
+    text = bytes(heap[note_off:note_off + note_len]).decode("utf-8", errors="replace")
+    if code == CUSTOM_MODE:
+        mode, _, note = text.partition("\0")
+    else:
+        mode, note = MODES_BY_CODE.get(code, ""), text
+    minutes = duration if flags & FLAG_RAW_MINUTES else round(duration / 60, 2)
+    return Session(from_epoch(start), from_epoch(end), minutes, mode, note)
+
+
+def unpack_records(mm, heap_path, lo: int, hi: int):
+    """
+    把映射好的文件里第 lo ~ hi-1 条记录解码成 (start 秒数, end 秒数, 分钟数, 模式) 列表。
+    只有自定义模式才需要读 heap。
+    """
+    records = []
+    heap = None
+    view = memoryview(mm)[FILE_HEADER.size + lo * RECORD.size:FILE_HEADER.size + hi * RECORD.size]
+    try:
+        for fields in RECORD.iter_unpack(view):
+            start, end, duration, _, _, code, flags = fields
+            mode = MODES_BY_CODE.get(code)
+            if mode is None:
+                if heap is None:
+                    heap = heap_path.read_bytes()
+                mode = decode_record(fields, heap).mode
+            minutes = duration if flags & FLAG_RAW_MINUTES else round(duration / 60, 2)
+            records.append((start, end, minutes, mode))
+    finally:
+        view.release()
+    return records
+
+
+def read_records(path):
+    """
+    只读地把整个文件解码一遍，不建 BinaryLogStore、不拿锁、不写任何文件，
+    给多座位汇总这种一次性的统计用。
+    """
+    path = Path(path)
+    with path.open("rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size <= FILE_HEADER.size:
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            magic, version, rec_size, _ = FILE_HEADER.unpack_from(mm, 0)
+            if magic != MAGIC or rec_size != RECORD.size:
+                raise ValueError(f"{path} 不是有效的二进制学习日志")
+            n = (size - FILE_HEADER.size) // RECORD.size
+            return unpack_records(mm, path.with_name(path.name + ".heap"), 0, n)
+
+
+class BinaryLogStore:
+    """
+    二进制日志的 LogStore，接口和 CSV 版一致（save_log 和各统计都能直接用）。
+
+    记录是定长的，文件变大时只解码新增的那几条；按天 / 周 / 月的汇总在内存里增量维护。
+    """
+
+    def __init__(self, path, read_only: bool = False):
+        self.path = Path(path)
+        self.heap_path = self.path.with_name(self.path.name + ".heap")
+        self.read_only = read_only      # 读本来就不写文件，只读时只是不许追加
+        self.generation = 0
+        self._lock = threading.RLock()
+        self._file_lock = FileLock(self.path.with_name(self.path.name + ".lock"))
+        self._reset()
+
+    def _reset(self):
+        self.generation += 1
+        self._signature = None
+        self._count = 0                 # 已读入的记录条数
+        self._starts = array("q")       # 每条记录的开始时间，用于按日期筛选
+        self._tables = RollupTables()
+
+    @property
+    def rollup_path(self):
+        return None
+
+    # ---------- 写 ----------
+    def ensure_file(self):
+        """
+        如果日志文件不存在，就创建并写入文件头。
+        """
+        if not self.path.exists():
+            with self.path.open("wb") as f:
+                f.write(FILE_HEADER.pack(MAGIC, FILE_VERSION, RECORD.size, 0))
+        if not self.heap_path.exists():
+            self.heap_path.touch()
+
+    def append(self, start: datetime, end: datetime, duration_seconds: float, mode: str, note: str):
+        """
+        追加一条学习记录。
+        """
+        self.append_many([make_session(start, end, duration_seconds, mode, note)])
+
+    @locked
+    def append_many(self, sessions, sync: bool = False):
+        """
+        批量追加：先把整批备注写进 heap，再一次写入整批定长记录。
+
+        sync=True 时写完再 fsync 两个文件；sessions 为空时只做 fsync。
+
+        多个进程同时写时靠 .lock 文件上的独占锁排队：拿到锁后先截掉别人崩溃时
+        留下的半条记录，否则之后的记录全都会错位。
+        """
+        if self.read_only:
+            raise PermissionError(f"{self.path} 是只读打开的，不能追加记录")
+        with self._file_lock.exclusive():
+            self.ensure_file()
+            self._repair_tail()
+            self.refresh()
+            with self.heap_path.open("ab") as heap:
+                note_off = os.fstat(heap.fileno()).st_size
+                records, heap_parts = [], []
+                for session in sessions:
+                    rec, heap_bytes = encode_session(session, note_off)
+                    records.append(rec)
+                    heap_parts.append(heap_bytes)
+                    note_off += len(heap_bytes)
+                heap.write(b"".join(heap_parts))
+                if sync:
+                    heap.flush()
+                    os.fsync(heap.fileno())
+            with self.path.open("ab") as f:
+                index = (os.fstat(f.fileno()).st_size - FILE_HEADER.size) // RECORD.size
+                f.write(b"".join(records))
+                if sync:
+                    f.flush()
+                    os.fsync(f.fileno())
+        if index == self._count:
+            for rec, session in zip(records, sessions):
+                self._add(RECORD.unpack(rec), session.mode)
+
+    def _repair_tail(self):
+        """
+        持有独占锁时调用：文件长度不是整条记录，说明有进程写到一半就没了，
+        把多出来的字节挪到 .torn 文件里留底，再截到 FILE_HEADER.size + n * RECORD.size。
+        heap 里多出来的备注没有记录指向它，不用管。
+        """
+        with self.path.open("r+b") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < FILE_HEADER.size:
+                cut = 0
+            else:
+                cut = FILE_HEADER.size + (size - FILE_HEADER.size) // RECORD.size * RECORD.size
+            if cut == size:
+                return
+            f.seek(cut)
+            torn = f.read()
+            with self.path.with_name(self.path.name + ".torn").open("ab") as t:
+                t.write(torn)
+            f.truncate(cut)
+            if cut == 0:
+                # 连文件头都没写完，重新写文件头
+                f.write(FILE_HEADER.pack(MAGIC, FILE_VERSION, RECORD.size, 0))
+
+    @locked
+    def close(self):
+        self._file_lock.close()
+
+    @locked
+    def rebuild_rollups(self):
+        """
+        汇总只在内存里，重新读一遍文件即可。
+        """
+        self._reset()
+        self.refresh()
+
+    # ---------- 读 ----------
+    @locked
+    def refresh(self):
+        """
+        文件变大了就只解码新增的记录；变小或文件头不对就从头读。
+        """
+        try:
+            st = self.path.stat()
+        except FileNotFoundError:
+            self._reset()
+            return
+        signature = (st.st_size, st.st_mtime_ns)
+        if signature == self._signature:
+            return
+        n = max(0, (st.st_size - FILE_HEADER.size) // RECORD.size)
+        if n < self._count:
+            self._reset()
+        if n > self._count:
+            with self.path.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                magic, version, rec_size, _ = FILE_HEADER.unpack_from(mm, 0)
+                if magic != MAGIC or rec_size != RECORD.size:
+                    raise ValueError(f"{self.path} 不是有效的二进制学习日志")
+                view = memoryview(mm)[FILE_HEADER.size + self._count * RECORD.size:
+                                      FILE_HEADER.size + n * RECORD.size]
+                try:
+                    custom = None
+                    for fields in RECORD.iter_unpack(view):
+                        mode = MODES_BY_CODE.get(fields[5])
+                        if mode is None:
+                            if custom is None:
+                                custom = self.heap_path.read_bytes()
+                            mode = decode_record(fields, custom).mode
+                        self._add(fields, mode)
+                finally:
+                    view.release()
+        self._signature = signature
+
+    def _add(self, fields, mode: str):
+        start, end, duration, flags = fields[0], fields[1], fields[2], fields[6]
+        minutes = duration if flags & FLAG_RAW_MINUTES else round(duration / 60, 2)
+        # 跨零点的按天分摊，次数只记在开始那天
+        for i, (day, part) in enumerate(split_span(start, end, minutes)):
+            self._tables.add_minutes(epoch_day(day), mode, part, int(i == 0))
+        self._starts.append(start)
+        self._count += 1
+
+    def _decode(self, indices):
+        if not indices:
+            return []
+        heap = self.heap_path.read_bytes()
+        with self.path.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return [decode_record(RECORD.unpack_from(mm, FILE_HEADER.size + i * RECORD.size), heap)
+                    for i in indices]
+
+    @locked
+    def sessions(self):
+        """
+        返回全部记录（按文件顺序）。
+        """
+        self.refresh()
+        return self._decode(range(self._count))
+
+    @locked
+    def sessions_since(self, n: int):
+        self.refresh()
+        return self._decode(range(n, self._count))
+
+    @locked
+    def records_since(self, n: int):
+        """
+        返回第 n 条之后的 (start 秒数, end 秒数, 分钟数, 模式) 列表，
+        不转时间字符串，给列式汇总引擎直接用。
+        """
+        self.refresh()
+        if n >= self._count:
+            return []
+        with self.path.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return unpack_records(mm, self.heap_path, n, self._count)
+
+    @locked
+    def sessions_between(self, from_date: str, to_date: str):
+        """
+        返回 start 日期在 [from_date, to_date] 之间的记录。
+        """
+        self.refresh()
+        lo = calendar.timegm(datetime.strptime(from_date, "%Y-%m-%d").timetuple())
+        hi = calendar.timegm(datetime.strptime(to_date, "%Y-%m-%d").timetuple()) + 86400
+        return self._decode([i for i, t in enumerate(self._starts) if lo <= t < hi])
+
+    @locked
+    def day_total(self, date_str: str):
+        self.refresh()
+        return self._tables.totals("day", date_str)
+
+    @locked
+    def daily_minutes(self, date_strs):
+        self.refresh()
+        return [self._tables.totals("day", d)[0] for d in date_strs]
+
+    @locked
+    def period_total(self, kind: str, key: str):
+        self.refresh()
+        return self._tables.totals(kind, key)
+
+    @locked
+    def period_by_mode(self, kind: str, key: str):
+        self.refresh()
+        return self._tables.by_mode(kind, key)
+
+
+# ================== 格式转换 ==================
+
+def csv_to_binary(csv_path, bin_path, skip_bad: bool = False):
+    """
+    把 study_log.csv 转成二进制日志，返回 (写入条数, 跳过的坏行数)。
+
+    转换不丢信息：每一行都要能原样转回来（标准时间格式、正好五列、分钟数是
+    save_log 写出的样子）。有转不回原样的行时抛 ValueError 并指出行号，
+    什么都不写；skip_bad=True 时跳过这些行，只计数。
+    """
+    csv_path, bin_path = Path(csv_path), Path(bin_path)
+    records, heap_parts, skipped = [], [], 0
+    note_off = 0
+    with csv_path.open("r", newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        for row in reader:
+            encoded = _encode_exact(row, note_off)
+            if encoded is None:
+                if not skip_bad:
+                    raise ValueError(f"第 {reader.line_num} 行无法原样转换：{','.join(row)}")
+                skipped += 1
+                continue
+            rec, heap_bytes = encoded
+            records.append(rec)
+            heap_parts.append(heap_bytes)
+            note_off += len(heap_bytes)
+    with bin_path.open("wb") as out:
+        out.write(FILE_HEADER.pack(MAGIC, FILE_VERSION, RECORD.size, 0))
+        out.write(b"".join(records))
+    bin_path.with_name(bin_path.name + ".heap").write_bytes(b"".join(heap_parts))
+    return len(records), skipped
+
+
+def _encode_exact(row, note_off: int):
+    """
+    CSV 的一行 -> (记录字节, heap 字节)；转回 CSV 后和原来不完全一样的行返回 None。
+    """
+    s = parse_row(row)
+    if s is None or len(row) != len(HEADER):
+        return None
+    try:
+        rec, heap_bytes = encode_session(s, note_off)
+    except ValueError:
+        return None
+    fields = RECORD.unpack(rec)
+    back = decode_record(fields[:3] + (0,) + fields[4:], heap_bytes)
+    if [back.start, back.end, str(back.minutes), back.mode, back.note] != row:
+        return None
+    return rec, heap_bytes
+
+
+def binary_to_csv(bin_path, csv_path):
+    """
+    把二进制日志转回 study_log.csv 的格式，返回写入条数。
+    """
+    sessions = BinaryLogStore(bin_path).sessions()
+    with Path(csv_path).open("w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        for s in sessions:
+            writer.writerow([s.start, s.end, s.minutes, s.mode, s.note])
+    return len(sessions)
+
+
+def main(argv):
+    skip_bad = "--skip-bad" in argv
+    argv = [a for a in argv if a != "--skip-bad"]
+    if len(argv) != 3 or argv[0] not in ("to-bin", "to-csv"):
+        print(__doc__.strip())
+        return 1
+    if argv[0] == "to-bin":
+        try:
+            written, skipped = csv_to_binary(argv[1], argv[2], skip_bad)
+        except ValueError as e:
+            print(f"❌ {e}\n修好这一行再转，或者加 --skip-bad 跳过转不回原样的行。")
+            return 1
+        if skipped:
+            print(f"✅ 已写入 {written} 条记录到 {argv[2]}（跳过 {skipped} 条转不回原样的行）")
+        else:
+            print(f"✅ 已写入 {written} 条记录到 {argv[2]}")
+    else:
+        written = binary_to_csv(argv[1], argv[2])
+        print(f"✅ 已写入 {written} 条记录到 {argv[2]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
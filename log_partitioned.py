@@ -0,0 +1,329 @@
+"""
+按月分区的日志：一个目录（默认 logs/）里每个月一个 CSV，例如 logs/2025-12.csv。
+
+save_log 按记录的开始日期写进对应月份的文件；按日期区间查询时只打开和区间
+重叠的那几个月（统计时长时再往前多看两天，月底跨零点的记录会摊进下个月初）。
+上上个月及更早的分区一般不会再有新记录，可以用 seal 设成只读，放心缓存、备份
+或压缩。偶尔补进来的旧记录（崩溃恢复的会话等）不碰只读的分区，写进旁边可写的
+YYYY-MM.late.csv，查询时和那个月一起算。每个分区本身就是一个普通的 CSV 日志，
+索引、预聚合统计、加锁追加都和单文件时一样。
+
+把 STUDY_LOG_FILE 设成一个不带后缀的路径（例如 logs）就会用这种格式。
+
+用法：
+    python log_partitioned.py split study_log.csv logs    # 把单个大文件拆成按月分区
+    python log_partitioned.py list logs                   # 列出各分区
+    python log_partitioned.py seal logs                   # 把不会再变的旧分区设成只读
+"""
+import calendar
+import csv
+import os
+import re
+import stat
+import sys
+import threading
+from datetime import date, timedelta
+from pathlib import Path
+
+from log_store import HEADER, LogStore, locked, make_session, parse_row
+from rollups import SPAN_LOOKBACK_DAYS, period_range
+
+# 分区文件名：YYYY-MM.csv；seal 之后补进来的记录写在 YYYY-MM.late.csv
+PARTITION_NAME = re.compile(r"^(\d{4}-\d{2})\.csv$")
+LATE_NAME = re.compile(r"^(\d{4}-\d{2})\.late\.csv$")
+
+
+def month_bounds(month: str):
+    """
+    'YYYY-MM' -> 该月第一天和最后一天的 'YYYY-MM-DD'。
+    """
+    y, m = int(month[:4]), int(month[5:7])
+    return f"{month}-01", f"{month}-{calendar.monthrange(y, m)[1]:02d}"
+
+
+def with_lookback(from_date: str) -> str:
+    """
+    统计时长时要多看的起始日期：更早开始的记录可能跨零点延续进区间。
+    """
+    return (date.fromisoformat(from_date) - timedelta(days=SPAN_LOOKBACK_DAYS)).isoformat()
+
+
+def sealed_before(today: date = None) -> str:
+    """
+    早于这个月份（上个月）的分区视为不再变化。
+    """
+    today = today or date.today()
+    y, m = (today.year, today.month - 1) if today.month > 1 else (today.year - 1, 12)
+    return f"{y}-{m:02d}"
+
+
+def is_sealed(path: Path) -> bool:
+    """
+    分区文件是不是已经 seal（属主没有写权限）。看权限位而不是 os.access，root 也一样认。
+    """
+    try:
+        return not path.stat().st_mode & stat.S_IWUSR
+    except FileNotFoundError:
+        return False
+
+
+class PartitionedLogStore:
+    """
+    分区日志的 LogStore，接口和 CSV 版一致；每个分区文件交给一个普通的 LogStore。
+    一个月最多两个文件：YYYY-MM.csv 和 seal 之后补记用的 YYYY-MM.late.csv。
+    """
+
+    def __init__(self, path, read_only: bool = False):
+        self.path = Path(path)
+        self.read_only = read_only
+        self.generation = 0         # 记录的全局编号失效（中间的分区变了）时加一
+        self._lock = threading.RLock()
+        self._parts = {}            # 文件名 -> LogStore
+        self._written = set()       # 写过、还没 fsync 的文件名
+        self._layout = None         # 上次 refresh 时的 [(文件名, 文件大小)]
+
+    @property
+    def rollup_path(self):
+        return None
+
+    def months(self):
+        """
+        目录里已有的分区月份，从旧到新。
+        """
+        try:
+            names = [m.group(1) for m in map(PARTITION_NAME.match, (p.name for p in self.path.iterdir())) if m]
+        except FileNotFoundError:
+            return []
+        return sorted(names)
+
+    def files(self):
+        """
+        目录里已有的分区文件：[(月份, 文件名), ...]，按月份排，同一个月补记的文件排在后面。
+        """
+        try:
+            names = [p.name for p in self.path.iterdir()]
+        except FileNotFoundError:
+            return []
+        found = [(m.group(1), int(pattern is LATE_NAME), m.string)
+                 for pattern in (PARTITION_NAME, LATE_NAME)
+                 for m in map(pattern.match, names) if m]
+        return [(month, name) for month, _, name in sorted(found)]
+
+    def partition(self, name: str) -> LogStore:
+        part = self._parts.get(name)
+        if part is None:
+            part = self._parts[name] = LogStore(self.path / name, self.read_only)
+        return part
+
+    @locked
+    def partitions_between(self, from_date: str, to_date: str):
+        """
+        和 [from_date, to_date] 有重叠的已有分区：[(月份, LogStore), ...]，含补记的分区。
+        """
+        lo, hi = from_date[:7], to_date[:7]
+        return [(m, self.partition(name)) for m, name in self.files() if lo <= m <= hi]
+
+    # ---------- 写 ----------
+    def ensure_file(self):
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def append(self, start, end, duration_seconds: float, mode: str, note: str):
+        self.append_many([make_session(start, end, duration_seconds, mode, note)])
+
+    @locked
+    def append_many(self, sessions, sync: bool = False):
+        """
+        按开始月份分组，各自追加到对应的分区；sessions 为空时对写过的分区做 fsync。
+        那个月已经 seal 了就写进它的 YYYY-MM.late.csv，不动只读的分区。
+        """
+        if self.read_only:
+            raise PermissionError(f"{self.path} 是只读打开的，不能追加记录")
+        self.ensure_file()
+        groups = {}
+        for s in sessions:
+            month = s.start[:7]
+            name = f"{month}.csv"
+            if is_sealed(self.path / name):
+                name = f"{month}.late.csv"
+            groups.setdefault(name, []).append(s)
+        if not groups and sync:
+            groups = {name: [] for name in self._written}
+        for name, group in sorted(groups.items()):
+            self.partition(name).append_many(group, sync=sync)
+        self._written = set() if sync else self._written | groups.keys()
+
+    @locked
+    def close(self):
+        for part in self._parts.values():
+            part.close()
+
+    @locked
+    def rebuild_rollups(self):
+        for _, name in self.files():
+            self.partition(name).rebuild_rollups()
+
+    # ---------- 读 ----------
+    @locked
+    def refresh(self):
+        """
+        检查各分区的大小；各分区的内容在查询时才读。最后一个之前的分区有变化时
+        （比如旧月份补记了一条），后面记录的全局编号都变了，generation 加一。
+        """
+        layout = []
+        for _, name in self.files():
+            try:
+                layout.append((name, (self.path / name).stat().st_size))
+            except FileNotFoundError:
+                continue
+        old = self._layout
+        if old and (layout[:len(old) - 1] != old[:-1] or len(layout) < len(old)
+                    or layout[len(old) - 1][0] != old[-1][0]):
+            self.generation += 1
+        self._layout = layout
+
+    @locked
+    def layout(self):
+        """
+        上次 refresh 时各分区的 ((文件名, 文件大小), ...)，任何分区追加了记录都会变。
+        """
+        return tuple(self._layout or ())
+
+    @locked
+    def sessions(self):
+        self.refresh()
+        return [s for _, name in self.files() for s in self.partition(name).sessions()]
+
+    @locked
+    def sessions_since(self, n: int):
+        self.refresh()
+        result, seen = [], 0
+        for _, name in self.files():
+            part = self.partition(name).sessions()
+            if seen + len(part) > n:
+                result.extend(part[max(0, n - seen):])
+            seen += len(part)
+        return result
+
+    @locked
+    def sessions_between(self, from_date: str, to_date: str):
+        return [s for _, part in self.partitions_between(from_date, to_date)
+                for s in part.sessions_between(from_date, to_date)]
+
+    @locked
+    def day_total(self, date_str: str):
+        return self.period_total("day", date_str)
+
+    @locked
+    def daily_minutes(self, date_strs):
+        if not date_strs:
+            return []
+        totals = [0.0] * len(date_strs)
+        # 每个分区只问它可能有数据的那几天：本月，以及月初被上个月末摊进来的几天
+        for month, part in self.partitions_between(with_lookback(min(date_strs)), max(date_strs)):
+            first, last = month_bounds(month)
+            last = (date.fromisoformat(last) + timedelta(days=SPAN_LOOKBACK_DAYS)).isoformat()
+            wanted = [i for i, d in enumerate(date_strs) if first <= d <= last]
+            values = part.daily_minutes([date_strs[i] for i in wanted])
+            for i, v in zip(wanted, values):
+                totals[i] += v
+        return totals
+
+    def _period_parts(self, kind: str, key: str):
+        first, end = period_range(kind, key)
+        # end 是开区间，最后一天的月份取 end 前一天
+        last = date.fromordinal(date.fromisoformat(end).toordinal() - 1).isoformat()
+        return self.partitions_between(with_lookback(first), last)
+
+    @locked
+    def period_total(self, kind: str, key: str):
+        minutes, count = 0.0, 0
+        for _, part in self._period_parts(kind, key):
+            m, c = part.period_total(kind, key)
+            minutes += m
+            count += c
+        return minutes, count
+
+    @locked
+    def period_by_mode(self, kind: str, key: str):
+        totals = {}
+        for _, part in self._period_parts(kind, key):
+            for mode, m in part.period_by_mode(kind, key).items():
+                totals[mode] = totals.get(mode, 0.0) + m
+        return totals
+
+
+def split_log(csv_path, out_dir):
+    """
+    把单个 study_log.csv 按开始月份拆到 out_dir/YYYY-MM.csv，返回 {月份: 条数}。
+
+    原样复制每一行，格式不对的行跳过；目标目录里已经有分区时拒绝执行。
+    """
+    out_dir = Path(out_dir)
+    store = PartitionedLogStore(out_dir)
+    if store.months():
+        raise FileExistsError(f"{out_dir} 里已经有分区文件")
+    out_dir.mkdir(parents=True, exist_ok=True)
+    files, writers, counts = {}, {}, {}
+    try:
+        with Path(csv_path).open("r", newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            for row in reader:
+                if parse_row(row) is None:
+                    continue
+                month = row[0].strip()[:7]
+                if not PARTITION_NAME.match(f"{month}.csv"):
+                    continue
+                writer = writers.get(month)
+                if writer is None:
+                    files[month] = (out_dir / f"{month}.csv").open("w", newline="", encoding="utf-8")
+                    writer = writers[month] = csv.writer(files[month])
+                    writer.writerow(HEADER)
+                writer.writerow(row)
+                counts[month] = counts.get(month, 0) + 1
+    finally:
+        for f in files.values():
+            f.close()
+    return counts
+
+
+def seal_partitions(directory, today: date = None):
+    """
+    把上个月之前的分区设成只读，返回处理过的月份。
+    """
+    store = PartitionedLogStore(directory)
+    sealed = sealed_before(today)
+    months = [m for m in store.months() if m < sealed]
+    for month in months:
+        path = store.path / f"{month}.csv"
+        os.chmod(path, stat.S_IMODE(path.stat().st_mode) & ~(stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH))
+    return months
+
+
+def main(argv):
+    if len(argv) == 3 and argv[0] == "split":
+        try:
+            counts = split_log(argv[1], argv[2])
+        except FileExistsError as e:
+            print(f"❌ {e}，为避免重复请换一个空目录。")
+            return 1
+        print(f"✅ 已拆成 {len(counts)} 个分区，共 {sum(counts.values())} 条记录 → {argv[2]}")
+        return 0
+    if len(argv) == 2 and argv[0] == "seal":
+        months = seal_partitions(argv[1])
+        print(f"✅ 已把 {len(months)} 个旧分区设为只读")
+        return 0
+    if len(argv) == 2 and argv[0] == "list":
+        store = PartitionedLogStore(argv[1])
+        for month in store.months():
+            minutes, count = store.period_total("month", month)
+            size_kb = (store.path / f"{month}.csv").stat().st_size / 1024
+            state = "只读" if is_sealed(store.path / f"{month}.csv") else "写入中"
+            print(f"{month}  {count:>7} 条  {round(minutes / 60, 1):>8} 小时  {size_kb:>9.1f} KB  {state}")
+        return 0
+    print(__doc__.strip())
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,252 @@
+"""
+可选的 SQLite 日志存储（study_log.db）：WAL 模式，按开始日期和模式建索引，
+各种汇总都用 GROUP BY 交给数据库算；跨零点的少数几条取出来按天分摊。
+多台机器各自一个库时，读写可以同时进行。
+
+用法（从现有 CSV 一次性导入）：
+    python log_sqlite.py import study_log.csv study_log.db
+"""
+import sqlite3
+import sys
+import threading
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from log_store import Session, make_session, read_rows
+from rollups import SPAN_LOOKBACK_DAYS, period_range, split_by_day
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id               INTEGER PRIMARY KEY,
+    start_time       TEXT NOT NULL,
+    end_time         TEXT NOT NULL,
+    start_date       TEXT NOT NULL,
+    duration_minutes REAL NOT NULL,
+    mode             TEXT NOT NULL DEFAULT '',
+    note             TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_start_date ON sessions (start_date);
+CREATE INDEX IF NOT EXISTS idx_sessions_mode ON sessions (mode, start_date);
+"""
+
+# 当天结束的记录（结束日期不晚于开始日期）直接按开始日期汇总
+SAME_DAY = "substr(end_time, 1, 10) <= start_date"
+
+INSERT_SQL = (
+    "INSERT INTO sessions (start_time, end_time, start_date, duration_minutes, mode, note) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+
+
+def read_sessions(path):
+    """
+    只读打开库，按插入顺序读出全部记录：不建表、不切 WAL，只读的共享目录上也能用。
+    """
+    conn = sqlite3.connect(f"{Path(path).resolve().as_uri()}?mode=ro", uri=True)
+    try:
+        rows = conn.execute(
+            "SELECT start_time, end_time, duration_minutes, mode, note FROM sessions ORDER BY id").fetchall()
+    finally:
+        conn.close()
+    return [Session(*row) for row in rows]
+
+
+class SqliteLogStore:
+    """
+    SQLite 版 LogStore，接口和 CSV 版一致。
+
+    每个线程用自己的连接（sqlite3 连接不能跨线程共用），WAL 模式下读不会挡住写。
+    read_only=True 时用 mode=ro 打开，不建表、不切 WAL。
+    """
+
+    generation = 0      # 只追加不改写，记录编号不会失效
+
+    def __init__(self, path, read_only: bool = False):
+        self.path = Path(path)
+        self.read_only = read_only
+        self._local = threading.local()
+
+    @property
+    def rollup_path(self):
+        return None
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if self.read_only:
+                conn = sqlite3.connect(f"{self.path.resolve().as_uri()}?mode=ro", uri=True, timeout=10)
+            else:
+                conn = sqlite3.connect(str(self.path), timeout=10)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    # ---------- 写 ----------
+    def ensure_file(self):
+        """
+        建库建表（已存在则什么都不做）。
+        """
+        self._conn()
+
+    def append(self, start: datetime, end: datetime, duration_seconds: float, mode: str, note: str):
+        """
+        插入一条学习记录。
+        """
+        self.insert_many([make_session(start, end, duration_seconds, mode, note)])
+
+    def insert_many(self, sessions):
+        """
+        批量插入 Session，在一个事务里完成，返回插入条数。
+        """
+        conn = self._conn()
+        with conn:
+            cur = conn.executemany(INSERT_SQL, (
+                (s.start, s.end, s.start[:10], s.minutes, s.mode, s.note) for s in sessions
+            ))
+        return cur.rowcount
+
+    def append_many(self, sessions, sync: bool = False):
+        """
+        批量追加，一个事务提交。
+
+        连接平时是 synchronous=NORMAL：WAL 模式下提交不做 fsync，断电可能丢最后几次提交。
+        sync=True 时这一批改用 synchronous=FULL 提交，返回前已经落盘。
+        """
+        if not sessions:
+            return
+        if not sync:
+            self.insert_many(sessions)
+            return
+        conn = self._conn()
+        conn.execute("PRAGMA synchronous=FULL")
+        try:
+            self.insert_many(sessions)
+        finally:
+            conn.execute("PRAGMA synchronous=NORMAL")
+
+    def close(self):
+        """
+        关掉当前线程的连接。
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def rebuild_rollups(self):
+        """
+        汇总都是现算的，这里只刷新一下查询计划用的统计信息。
+        """
+        self._conn().execute("ANALYZE")
+
+    # ---------- 读 ----------
+    def refresh(self):
+        pass
+
+    def last_id(self) -> int:
+        """
+        最后一条记录的编号（只追加，新记录一定会让它变大），汇总引擎拿它当数据版本。
+        """
+        return self._conn().execute("SELECT COALESCE(MAX(id), 0) FROM sessions").fetchone()[0]
+
+    def sessions(self):
+        rows = self._conn().execute(
+            "SELECT start_time, end_time, duration_minutes, mode, note FROM sessions ORDER BY id")
+        return [Session(*row) for row in rows]
+
+    def sessions_since(self, n: int):
+        rows = self._conn().execute(
+            "SELECT start_time, end_time, duration_minutes, mode, note FROM sessions "
+            "ORDER BY id LIMIT -1 OFFSET ?", (n,))
+        return [Session(*row) for row in rows]
+
+    def sessions_between(self, from_date: str, to_date: str):
+        rows = self._conn().execute(
+            "SELECT start_time, end_time, duration_minutes, mode, note FROM sessions "
+            "WHERE start_date BETWEEN ? AND ? ORDER BY id", (from_date, to_date))
+        return [Session(*row) for row in rows]
+
+    def day_total(self, date_str: str):
+        return self.period_total("day", date_str)
+
+    def _cross_day(self, first: str, last: str):
+        """
+        可能有时长落在 [first, last] 里的跨零点记录，按天拆开：[(日期, 模式, 分钟数, 次数), ...]。
+        """
+        lookback = (date.fromisoformat(first) - timedelta(days=SPAN_LOOKBACK_DAYS)).isoformat()
+        rows = self._conn().execute(
+            "SELECT start_time, end_time, duration_minutes, mode FROM sessions "
+            f"WHERE start_date BETWEEN ? AND ? AND NOT ({SAME_DAY})", (lookback, last))
+        return [(day, mode, minutes, count)
+                for start, end, total, mode in rows
+                for day, minutes, count in split_by_day(start, end, total)
+                if first <= day <= last]
+
+    def daily_minutes(self, date_strs):
+        if not date_strs:
+            return []
+        first, last = min(date_strs), max(date_strs)
+        rows = self._conn().execute(
+            "SELECT start_date, SUM(duration_minutes) FROM sessions "
+            f"WHERE start_date BETWEEN ? AND ? AND {SAME_DAY} GROUP BY start_date", (first, last))
+        daily = dict(rows)
+        for day, _, minutes, _ in self._cross_day(first, last):
+            daily[day] = daily.get(day, 0.0) + minutes
+        return [daily.get(d, 0.0) for d in date_strs]
+
+    def _period_by_mode(self, kind: str, key: str):
+        """
+        {模式: [分钟数, 次数]}，跨零点的记录按天分摊。
+        """
+        first, end = period_range(kind, key)
+        last = (date.fromisoformat(end) - timedelta(days=1)).isoformat()
+        totals = {mode: [minutes, count] for mode, minutes, count in self._conn().execute(
+            "SELECT mode, SUM(duration_minutes), COUNT(*) FROM sessions "
+            f"WHERE start_date >= ? AND start_date < ? AND {SAME_DAY} GROUP BY mode", (first, end))}
+        for _, mode, minutes, count in self._cross_day(first, last):
+            t = totals.setdefault(mode, [0.0, 0])
+            t[0] += minutes
+            t[1] += count
+        return totals
+
+    def period_total(self, kind: str, key: str):
+        minutes, count = 0.0, 0
+        for m, c in self._period_by_mode(kind, key).values():
+            minutes += m
+            count += c
+        return minutes, count
+
+    def period_by_mode(self, kind: str, key: str):
+        return {mode: t[0] for mode, t in self._period_by_mode(kind, key).items()}
+
+
+def import_csv(csv_path, db_path):
+    """
+    把 study_log.csv 整个导入 SQLite，返回导入条数。
+    """
+    csv_path = Path(csv_path)
+    with csv_path.open("rb") as f:
+        header_len = len(f.readline())
+    sessions, _ = read_rows(csv_path, header_len)
+    return SqliteLogStore(db_path).insert_many(sessions)
+
+
+def main(argv):
+    if len(argv) != 3 or argv[0] != "import":
+        print(__doc__.strip())
+        return 1
+    db_path = Path(argv[2])
+    if db_path.exists():
+        count = SqliteLogStore(db_path)._conn().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        if count:
+            print(f"❌ {db_path} 里已经有 {count} 条记录，为避免重复导入请换一个新文件。")
+            return 1
+    count = import_csv(argv[1], db_path)
+    print(f"✅ 已导入 {count} 条记录到 {db_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,702 @@
+"""
+学习日志存储：main.py 和 timer_window.py 共用的 CSV 读写与缓存。
+"""
+import atexit
+import bisect
+import calendar
+import csv
+import importlib
+import io
+import os
+import re
+import threading
+import zlib
+from collections import namedtuple
+from datetime import datetime, timedelta
+from functools import lru_cache, wraps
+from pathlib import Path
+
+import perf
+from file_lock import FileLock, write_atomic
+from rollups import Rollups
+
+# 日志文件；可以用环境变量 STUDY_LOG_FILE 换路径，后缀决定存储格式（见 BACKENDS）
+LOG_FILE = Path(os.environ.get("STUDY_LOG_FILE", "study_log.csv"))
+
+HEADER = ["start_time", "end_time", "duration_minutes", "mode", "note"]
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# 模式的中文名，用于统计输出
+MODE_NAMES = {"countup": "正计时", "countdown": "倒计时"}
+
+# 增量读取时每次读多少字节
+READ_BLOCK_SIZE = 1 << 20
+
+# 修复写了半行的文件尾时，最多往回找多少字节的换行
+TORN_SCAN_SIZE = 1 << 16
+
+# 行首的日期（用于建索引）
+_ROW_DATE = re.compile(rb"^(\d{4}-\d{2}-\d{2})", re.M)
+
+_EPOCH = datetime(1970, 1, 1)
+
+# 一条学习记录：start / end 保留原始字符串（前 10 位就是日期），minutes 已转成 float
+Session = namedtuple("Session", ["start", "end", "minutes", "mode", "note"])
+
+
+def format_minutes(seconds: float) -> float:
+    """
+    把秒换算成分钟，保留两位小数。
+    """
+    return round(seconds / 60, 2)
+
+
+def make_session(start: datetime, end: datetime, duration_seconds: float, mode: str, note: str) -> Session:
+    """
+    把一次学习的参数整理成要写入日志的一条 Session。
+    """
+    return Session(start.strftime(TIME_FORMAT), end.strftime(TIME_FORMAT),
+                   format_minutes(duration_seconds), mode, note)
+
+
+def locked(method):
+    """
+    方法装饰器：用实例上的 self._lock 串行化，统计线程和主线程可以共用一个 LogStore。
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def is_fixed_time(text: str) -> bool:
+    """
+    是不是标准的 19 位 'YYYY-MM-DD HH:MM:SS'（只看长度和分隔符，不检查数值）。
+    """
+    return len(text) == 19 and text[4] == "-" and text[10] == " " and text[13] == ":"
+
+
+def to_epoch(text: str) -> int:
+    """
+    'YYYY-MM-DD HH:MM:SS' -> 秒数（把本地时间当成 UTC 换算，保证能原样转回去）。
+    """
+    if is_fixed_time(text):
+        # 固定格式直接切片，日期部分查缓存，比 strptime 快一个数量级
+        return (_date_epoch(text[:10]) + int(text[11:13]) * 3600
+                + int(text[14:16]) * 60 + int(text[17:19]))
+    return calendar.timegm(datetime.strptime(text, TIME_FORMAT).timetuple())
+
+
+@lru_cache(maxsize=4096)
+def _date_epoch(date_str: str) -> int:
+    return calendar.timegm((int(date_str[:4]), int(date_str[5:7]), int(date_str[8:10]), 0, 0, 0))
+
+
+def from_epoch(seconds: int) -> str:
+    return (_EPOCH + timedelta(seconds=seconds)).strftime(TIME_FORMAT)
+
+
+@lru_cache(maxsize=4096)
+def epoch_day(day_number: int) -> str:
+    """
+    第几天（秒数 // 86400）-> 'YYYY-MM-DD'。
+    """
+    return (_EPOCH + timedelta(days=day_number)).strftime("%Y-%m-%d")
+
+
+def parse_row(row):
+    """
+    把 CSV 的一行转成 Session，格式不对的行返回 None。
+    """
+    if len(row) < 3:
+        return None
+    try:
+        minutes = float(row[2])
+    except ValueError:
+        return None
+    mode = row[3] if len(row) > 3 else ""
+    note = row[4] if len(row) > 4 else ""
+    return Session(row[0].strip(), row[1].strip(), minutes, mode, note)
+
+
+def parse_chunk(chunk: bytes):
+    """
+    解析一段由完整行组成的 CSV 字节，返回 Session 列表（跳过格式不对的行）。
+    """
+    sessions = []
+    text = chunk.decode("utf-8", errors="replace")
+    for row in csv.reader(io.StringIO(text, newline="")):
+        s = parse_row(row)
+        if s is not None:
+            sessions.append(s)
+    return sessions
+
+
+def read_rows(path: Path, offset: int):
+    """
+    从 offset 开始读到最后一个完整行，返回 (Session 列表, 读到的字节位置)。
+    """
+    sessions = []
+    with path.open("rb") as f:
+        f.seek(offset)
+        pending = b""
+        while True:
+            block = f.read(READ_BLOCK_SIZE)
+            if not block:
+                break
+            data = pending + block
+            # 只解析到最后一个完整行，半行留给下次（可能正在被写入）
+            cut = data.rfind(b"\n") + 1
+            pending = data[cut:]
+            if cut == 0:
+                continue
+            sessions.extend(parse_chunk(data[:cut]))
+            offset += cut
+    return sessions, offset
+
+
+class DateIndex:
+    """
+    日志旁边的稀疏索引文件（study_log.csv.idx）：日期 -> 该日期第一次出现的字节位置。
+
+    记录基本按 start_time 顺序写入，所以只在“出现了比之前都新的日期”时记一条，
+    一天最多一条。查询某天起的数据时二分找到第一条 >= 该日期的索引，之前的行
+    日期都更早，可以直接跳过。索引只扫新追加的字节，增量更新。
+    """
+
+    VERSION = "v1"
+
+    def __init__(self, log_path: Path, read_only: bool = False):
+        self.log_path = log_path
+        self.path = log_path.with_name(log_path.name + ".idx")
+        self.read_only = read_only      # True：只在内存里建，不写 .idx
+        self._reset()
+        self._loaded = False
+
+    def _reset(self):
+        self.dates = []
+        self.offsets = []
+        self.upto = 0               # 已索引到的字节位置（落在行尾）
+        self.header_crc = None
+        self._dirty = False
+
+    def invalidate(self):
+        """
+        日志被改写过，下次 update 时从头重建。
+        """
+        self._loaded = True
+        self._reset()
+
+    def offset_for(self, date_str: str) -> int:
+        """
+        返回第一条日期 >= date_str 的行可能出现的最早字节位置。
+        """
+        i = bisect.bisect_left(self.dates, date_str)
+        if i < len(self.offsets):
+            return self.offsets[i]
+        return self.upto
+
+    def update(self, header: bytes):
+        """
+        把上次索引之后新追加的行加进索引；表头或文件对不上就重建。
+        """
+        if not self._loaded:
+            self._load()
+            self._loaded = True
+        crc = zlib.crc32(header)
+        if self.header_crc != crc or not self._still_valid():
+            self._reset()
+            self.header_crc = crc
+            self.upto = len(header)
+            self._dirty = True
+        self._scan()
+        if self._dirty:
+            self._save()
+
+    def _still_valid(self) -> bool:
+        try:
+            with self.log_path.open("rb") as f:
+                f.seek(0, 2)
+                if f.tell() < self.upto:
+                    return False
+                f.seek(self.upto - 1)
+                return f.read(1) == b"\n"
+        except OSError:
+            return False
+
+    def _scan(self):
+        max_date = self.dates[-1] if self.dates else ""
+        with self.log_path.open("rb") as f:
+            f.seek(self.upto)
+            pending = b""
+            pos = self.upto
+            while True:
+                block = f.read(READ_BLOCK_SIZE)
+                if not block:
+                    break
+                data = pending + block
+                cut = data.rfind(b"\n") + 1      # 只处理完整的行
+                # 引号里带换行的备注会产生续行，续行开头不是日期，正则自然跳过
+                for m in _ROW_DATE.finditer(data, 0, cut):
+                    d = m.group(1).decode("ascii")
+                    if d > max_date:
+                        self.dates.append(d)
+                        self.offsets.append(pos + m.start())
+                        max_date = d
+                pending = data[cut:]
+                pos += cut
+            if pos != self.upto:
+                self.upto = pos
+                self._dirty = True
+
+    def _load(self):
+        try:
+            lines = self.path.read_text(encoding="ascii").splitlines()
+            tag, version, crc, upto = lines[0].split(",")
+            if tag != "#index" or version != self.VERSION:
+                return
+            dates, offsets = [], []
+            for line in lines[1:]:
+                d, off = line.split(",")
+                dates.append(d)
+                offsets.append(int(off))
+        except (OSError, ValueError, IndexError, UnicodeDecodeError):
+            return
+        self.dates, self.offsets = dates, offsets
+        self.header_crc, self.upto = int(crc), int(upto)
+
+    def _save(self):
+        self._dirty = False
+        if self.read_only:
+            return
+        lines = [f"#index,{self.VERSION},{self.header_crc},{self.upto}"]
+        lines.extend(f"{d},{off}" for d, off in zip(self.dates, self.offsets))
+        try:
+            write_atomic(self.path, ("\n".join(lines) + "\n").encode("ascii"))
+        except OSError:
+            pass  # 索引只是加速用，写不进去也不影响正确性
+
+
+class Snapshot:
+    """
+    读进内存的一份记录，给 AggregationEngine 当 store 用（只读，不会再变）。
+    """
+
+    generation = 0
+
+    def __init__(self, sessions):
+        self._sessions = sessions
+
+    def sessions_since(self, n: int):
+        return self._sessions[n:]
+
+
+class LogStore:
+    """
+    一个日志文件对应一个 LogStore。
+
+    解析后的记录和按天汇总都缓存在内存里，只有文件的大小或修改时间变了才去读，
+    而且只读新追加的部分，这样反复点“今日”“N天”不会每次都把整个 CSV 扫一遍。
+
+    内存里只保留“从查询过的最早日期到文件末尾”这一段，靠 DateIndex 直接定位到
+    起始位置，查最近 7 天就只读最近 7 天的字节。
+
+    按天 / 周 / 月的总时长走 Rollups：写入时就累加好，查询直接查表，和日志大小无关。
+
+    read_only=True 时只读：不写 .idx / .rollup.json 等 sidecar（已有的照样读），
+    不创建 .lock，也不能追加记录。给命令行查询这类一次性的读者用。
+    """
+
+    def __init__(self, path=LOG_FILE, read_only: bool = False):
+        self.path = Path(path)
+        self.read_only = read_only
+        self._index = DateIndex(self.path, read_only)
+        self._rollups = Rollups(self.path, lambda offset: read_rows(self.path, offset), read_only)
+        self._notes = None          # 备注索引，第一次查询时才建，见 note_index.py
+        self.generation = 0         # 已加载记录的编号失效（重建或往前扩展）时加一
+        self._lock = threading.RLock()
+        self._append_file = None    # 追加写用的文件句柄，第一次写时打开，之后一直复用
+        self._file_lock = FileLock(self.path.with_name(self.path.name + ".lock"), create=not read_only)
+        self._reset()
+
+    @property
+    def rollup_path(self) -> Path:
+        return self._rollups.path
+
+    def _reset(self):
+        self.generation += 1
+        self._signature = None      # (size, mtime_ns)，用来判断文件有没有变
+        self._header = None         # 表头那一行的原始字节
+        self._window_from = None    # 已加载窗口的起始日期，"" 表示从头开始，None 表示还没加载
+        self._base = 0              # 已加载窗口的起始字节位置
+        self._offset = 0            # 已解析到的字节位置（总是落在行尾）
+        self._sessions = []
+
+    # ---------- 写 ----------
+    @locked
+    def ensure_file(self):
+        """
+        如果日志文件不存在，就创建并写入表头。
+        """
+        if self.path.exists():
+            return
+        with self._file_lock.exclusive():
+            try:
+                # "x"：别的进程抢先建好了就不再覆盖
+                with self.path.open("x", newline="", encoding="utf-8") as f:
+                    writer = csv.writer(f)
+                    writer.writerow(HEADER)
+            except FileExistsError:
+                pass
+
+    def append(self, start: datetime, end: datetime, duration_seconds: float, mode: str, note: str):
+        """
+        把一条学习记录追加写入 CSV 文件，同时更新预聚合统计。
+        """
+        self.append_many([make_session(start, end, duration_seconds, mode, note)])
+
+    @locked
+    def append_many(self, sessions, sync: bool = False):
+        """
+        批量追加：整批记录拼成一次 write，预聚合统计也只更新、保存一次。
+
+        多个进程同时写同一个文件时靠 .lock 文件上的独占锁排队：拿到锁后先修好
+        别人崩溃时留下的半行，再用 os.write 把整批完整的行一次写进去，不会和别的
+        进程的行交错。sync=True 时写完再 fsync；sessions 为空时只做 fsync。
+        """
+        if self.read_only:
+            raise PermissionError(f"{self.path} 是只读打开的，不能追加记录")
+        if sessions:
+            buf = io.StringIO()
+            csv.writer(buf).writerows(sessions)
+            data = buf.getvalue().encode("utf-8")
+            with self._file_lock.exclusive():
+                f = self._appender()
+                size_before = self._repair_tail(f)
+                fd = f.fileno()
+                view = memoryview(data)
+                while view:
+                    view = view[os.write(fd, view):]
+                size_after = size_before + len(data)
+                self._rollups.record(sessions, size_before, size_after)
+                if self._notes is not None:
+                    self._notes.record(sessions, size_before, size_after)
+        else:
+            f = self._appender()
+        if sync:
+            os.fsync(f.fileno())
+
+    def _repair_tail(self, f) -> int:
+        """
+        持有独占锁时调用：文件不是以换行结尾，说明有进程写到一半就没了，
+        把这半行挪到 .torn 文件里留底，再把日志截到最后一个完整行。返回修好后的大小。
+        """
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            f.write(self._header_bytes())
+            return os.fstat(f.fileno()).st_size
+        f.seek(size - 1)
+        if f.read(1) == b"\n":
+            return size
+        start = max(0, size - TORN_SCAN_SIZE)
+        f.seek(start)
+        tail = f.read(size - start)
+        cut = start + tail.rfind(b"\n") + 1 if b"\n" in tail else 0
+        f.seek(cut)
+        torn = f.read(size - cut)
+        with self.path.with_name(self.path.name + ".torn").open("ab") as t:
+            t.write(torn + b"\n")
+        os.ftruncate(f.fileno(), cut)
+        if cut == 0:
+            # 连表头都没写完，重新写表头
+            f.write(self._header_bytes())
+            return os.fstat(f.fileno()).st_size
+        return cut
+
+    @staticmethod
+    def _header_bytes() -> bytes:
+        buf = io.StringIO()
+        csv.writer(buf).writerow(HEADER)
+        return buf.getvalue().encode("utf-8")
+
+    def _appender(self):
+        """
+        返回一直开着的追加句柄；文件被删掉或换成了别的文件就重新打开。
+        """
+        try:
+            st = self.path.stat()
+        except FileNotFoundError:
+            st = None
+        f = self._append_file
+        if f is not None and st is not None and os.fstat(f.fileno()).st_ino == st.st_ino:
+            return f
+        if f is not None:
+            f.close()
+        if st is None:
+            self.ensure_file()
+        # 读写 + 追加：写总是落在文件末尾，读用来检查 / 修复文件尾
+        self._append_file = self.path.open("a+b", buffering=0)
+        return self._append_file
+
+    @locked
+    def close(self):
+        """
+        把攒着没写的预聚合统计写进 sidecar，关掉追加句柄（下次写入时会重新打开）。
+        """
+        self._rollups.flush()
+        if self._notes is not None:
+            self._notes.flush()
+        if self._append_file is not None:
+            self._append_file.close()
+            self._append_file = None
+        self._file_lock.close()
+
+    @locked
+    def rebuild_rollups(self):
+        """
+        丢掉现有的预聚合统计，从 CSV 从头重新汇总。
+        """
+        self._rollups.invalidate()
+        self._signature = None
+        self.refresh()
+
+    # ---------- 读 ----------
+    @locked
+    def refresh(self):
+        """
+        文件变了就把新追加的部分解析进来，没变什么都不做。
+
+        save_log 只会往文件末尾追加，所以记住上次解析到的字节位置，
+        下次只读这之后的新字节；文件变短或表头变了才整体重建。
+        """
+        try:
+            st = self.path.stat()
+        except FileNotFoundError:
+            self._reset()
+            return
+        signature = (st.st_size, st.st_mtime_ns)
+        if signature == self._signature:
+            return
+        # 共享锁：别的进程正在修文件尾时等它修完再读
+        with self._file_lock.shared():
+            if st.st_size < self._offset or not self._prefix_unchanged():
+                self._reset()
+                self._index.invalidate()
+                self._rollups.invalidate()
+                if self._notes is not None:
+                    self._notes.invalidate()
+            if self._header is None and not self._read_header():
+                return
+            self._index.update(self._header)
+            self._rollups.update(self._header)
+            if self._window_from is not None:
+                self._read_tail()
+        self._signature = signature
+
+    def _read_header(self) -> bool:
+        with self.path.open("rb") as f:
+            line = f.readline()
+        if not line.endswith(b"\n"):
+            return False
+        self._header = line
+        return True
+
+    def _prefix_unchanged(self) -> bool:
+        """
+        检查已解析部分看起来没被改写：表头一致，且上次读到的位置正好是行尾。
+        """
+        if self._header is None:
+            return True
+        with self.path.open("rb") as f:
+            if f.read(len(self._header)) != self._header:
+                return False
+            if self._window_from is None:
+                return True
+            f.seek(self._offset - 1)
+            return f.read(1) == b"\n"
+
+    def _ensure_window(self, from_date: str):
+        """
+        保证 from_date（含）之后的记录都已加载；from_date 为 "" 表示全部。
+        """
+        self.refresh()
+        if self._header is None:
+            return
+        if self._window_from is not None and from_date >= self._window_from:
+            return
+        start = len(self._header) if from_date == "" else self._index.offset_for(from_date)
+        if self._window_from is None:
+            self._base = self._offset = start
+            self._read_tail()
+        elif start < self._base:
+            # 往前扩展窗口：只读 [start, base) 这一段，拼在已有记录前面
+            with self.path.open("rb") as f:
+                f.seek(start)
+                chunk = f.read(self._base - start)
+            self._sessions = parse_chunk(chunk) + self._sessions
+            self._base = start
+            self.generation += 1
+        self._window_from = from_date
+
+    def _read_tail(self):
+        sessions, self._offset = read_rows(self.path, self._offset)
+        self._sessions.extend(sessions)
+
+    @locked
+    def sessions(self):
+        """
+        返回全部记录（按文件顺序）。
+        """
+        self._ensure_window("")
+        return self._sessions
+
+    @locked
+    def sessions_since(self, n: int):
+        """
+        返回第 n 条（从 0 数）之后的全部记录；配合 generation 做增量加载。
+        """
+        self._ensure_window("")
+        return self._sessions[n:]
+
+    @locked
+    def sessions_between(self, from_date: str, to_date: str):
+        """
+        返回 start 日期在 [from_date, to_date] 之间的记录，只读需要的那一段文件。
+        """
+        self._ensure_window(from_date)
+        return [s for s in self._sessions if from_date <= s.start[:10] <= to_date]
+
+    @locked
+    def day_total(self, date_str: str):
+        """
+        返回某一天的 (总分钟数, 记录次数)。
+        """
+        self.refresh()
+        return self._rollups.totals("day", date_str)
+
+    @locked
+    def daily_minutes(self, date_strs):
+        """
+        按给定日期列表返回每天的总分钟数。
+        """
+        self.refresh()
+        return [self._rollups.totals("day", d)[0] for d in date_strs]
+
+    @locked
+    def note_index(self):
+        """
+        备注索引（note_index.NoteIndex），已经追上当前文件。第一次调用时载入或建 sidecar。
+        """
+        from note_index import NoteIndex    # 只有查备注时才用到
+        self.refresh()
+        if self._notes is None:
+            self._notes = NoteIndex(self.path, lambda offset: read_rows(self.path, offset), self.read_only)
+        if self._header is not None:
+            with self._file_lock.shared():
+                self._notes.update(self._header)
+        return self._notes
+
+    @locked
+    def period_total(self, kind: str, key: str):
+        """
+        返回某个汇总周期的 (总分钟数, 记录次数)，kind 为 "day" / "week" / "month"，
+        key 形如 "2025-12-05" / "2025-W49" / "2025-12"。
+        """
+        self.refresh()
+        return self._rollups.totals(kind, key)
+
+    @locked
+    def period_by_mode(self, kind: str, key: str):
+        """
+        返回某个汇总周期里 {模式: 总分钟数}。
+        """
+        self.refresh()
+        return self._rollups.by_mode(kind, key)
+
+
+# 文件后缀 -> (模块名, 类名)；不在表里的后缀都当 CSV。用到哪个才导入哪个。
+# 没有后缀的路径（例如 logs）是按月分区的目录。
+BACKENDS = {
+    "": ("log_partitioned", "PartitionedLogStore"),
+    ".bin": ("log_binary", "BinaryLogStore"),
+    ".db": ("log_sqlite", "SqliteLogStore"),
+    ".sqlite": ("log_sqlite", "SqliteLogStore"),
+    ".sqlite3": ("log_sqlite", "SqliteLogStore"),
+}
+
+
+def open_store(path, read_only: bool = False):
+    """
+    按文件后缀选存储格式，返回对应的 LogStore。read_only=True 时不在日志旁边写任何文件。
+    """
+    path = Path(path)
+    backend = BACKENDS.get(path.suffix.lower())
+    if backend is None:
+        return LogStore(path, read_only)
+    module_name, class_name = backend
+    module = importlib.import_module(module_name)
+    return getattr(module, class_name)(path, read_only)
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(path=LOG_FILE):
+    """
+    同一个路径共用同一个 LogStore，缓存才能跨多次点击生效。
+    """
+    key = Path(path).resolve()
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = open_store(path)
+            _stores[key] = store
+    return store
+
+
+def _close_stores():
+    """
+    退出时关掉共用的 LogStore，攒着的预聚合统计在这时写下去。
+    """
+    with _stores_lock:
+        stores = list(_stores.values())
+    for store in stores:
+        try:
+            store.close()
+        except OSError:
+            pass
+
+
+atexit.register(_close_stores)
+
+
+def ensure_log_file():
+    """
+    如果日志文件不存在，就创建并写入表头。
+    """
+    get_store().ensure_file()
+
+
+_writer = None      # 设置后 save_log 改为排队交给后台写线程，见 log_writer.py
+
+
+def use_writer(writer):
+    """
+    让 save_log 走指定的后台写入器；传 None 恢复为同步写入。
+    """
+    global _writer
+    _writer = writer
+
+
+@perf.timed("save_log")
+def save_log(start: datetime, end: datetime, duration_seconds: float, mode: str, note: str):
+    """
+    把一条学习记录追加写入日志文件。
+    """
+    writer = _writer
+    if writer is not None:
+        writer.put(start, end, duration_seconds, mode, note)
+    else:
+        get_store().append(start, end, duration_seconds, mode, note)
@@ -0,0 +1,191 @@
+"""
+后台批量写日志：save_log 只把记录放进队列就返回，由一个写线程攒成一批再写。
+
+写线程一直开着同一个文件句柄，不再每条记录都 stat / open / close 一次；
+预聚合统计也是一批更新、保存一次。
+
+三种落盘策略（环境变量 STUDY_LOG_DURABILITY 可以改默认值）：
+    row    每条记录单独写入并 fsync，最稳，也最慢
+    group  攒 interval_ms 毫秒的记录一起写，每批 fsync 一次（默认）
+    exit   攒批写入但只交给操作系统，退出时才 fsync；断电可能丢最近的记录
+"""
+import atexit
+import os
+import queue
+import sys
+import threading
+import time
+
+import log_store
+import perf
+from log_store import get_store, make_session
+
+POLICIES = ("row", "group", "exit")
+
+
+def policy_from_env() -> str:
+    """
+    读 STUDY_LOG_DURABILITY；值不认识时提示一下，退回 group，不让写入器启动失败。
+    """
+    policy = os.environ.get("STUDY_LOG_DURABILITY", "group")
+    if policy not in POLICIES:
+        print(f"⚠️ STUDY_LOG_DURABILITY={policy!r} 无效（可选：{' / '.join(POLICIES)}），改用 group",
+              file=sys.stderr)
+        return "group"
+    return policy
+
+
+DEFAULT_POLICY = policy_from_env()
+
+_STOP = object()    # 队列里的结束标记
+
+
+class LogWriter:
+    """
+    一个 LogWriter 对应一个日志存储和一个写线程。
+
+    on_batch(sessions) 在每批写完后于写线程里调用，可以用来通知界面“数据变了”。
+    """
+
+    def __init__(self, store=None, policy: str = DEFAULT_POLICY, interval_ms: int = 200,
+                 max_batch: int = 1000, on_batch=None):
+        if policy not in POLICIES:
+            raise ValueError(f"未知的落盘策略：{policy}（可选：{' / '.join(POLICIES)}）")
+        self.store = store if store is not None else get_store()
+        self.policy = policy
+        self.interval = interval_ms / 1000
+        self.max_batch = max_batch
+        self.on_batch = on_batch
+        self.error = None           # 最近一次写入失败的异常
+        self._failed = []           # 写失败的记录，下一批重试
+        self._queue = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    # ---------- 对外接口 ----------
+    def put(self, start, end, duration_seconds: float, mode: str, note: str):
+        """
+        排队写入一条学习记录，马上返回。
+        """
+        self.put_session(make_session(start, end, duration_seconds, mode, note))
+
+    def put_session(self, session):
+        if self._closed:
+            raise RuntimeError("LogWriter 已关闭")
+        self._queue.put(session)
+
+    def flush(self):
+        """
+        阻塞到目前排队的记录都已写入（按当前策略落盘）。
+        """
+        self._queue.join()
+
+    def close(self):
+        """
+        停止接收新记录，把队列里剩下的写完、fsync，再关掉文件。可以重复调用。
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+        if self._failed:
+            # 写线程最后一次也没写成功，在这里再试一次，还失败就让调用方知道
+            self.store.append_many(self._failed, sync=True)
+            self._failed = []
+
+    # ---------- 写线程 ----------
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch, stopping = self._collect()
+            if batch or self._failed:
+                self._write(batch, sync=self.policy != "exit")
+            for _ in range(len(batch) + stopping):
+                self._queue.task_done()
+        # 退出前：exit 策略在这里统一 fsync，然后关掉句柄
+        try:
+            if not self._failed:
+                self.store.append_many([], sync=True)
+            self.store.close()
+        except OSError as e:
+            self.error = e
+
+    def _collect(self):
+        """
+        取一批记录：row 策略一次一条；其他策略从第一条到达起最多等 interval 秒。
+        返回 (记录列表, 是否收到结束标记)。
+        """
+        item = self._queue.get()
+        if item is _STOP:
+            return [], True
+        batch = [item]
+        if self.policy == "row":
+            return batch, False
+        deadline = time.monotonic() + self.interval
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    @perf.timed("写日志")
+    def _write(self, batch, sync: bool):
+        sessions = self._failed + batch
+        try:
+            self.store.append_many(sessions, sync=sync)
+        except Exception as e:     # 写线程不能死，记下来下一批重试
+            self.error = e
+            self._failed = sessions
+            print(f"⚠️ 写入学习记录失败，稍后重试：{e}", file=sys.stderr)
+            return
+        self._failed = []
+        if self.on_batch is not None:
+            self.on_batch(sessions)
+
+
+# ================== 全局写入器（save_log 用） ==================
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def start(policy: str = DEFAULT_POLICY, interval_ms: int = 200, on_batch=None) -> LogWriter:
+    """
+    启动全局写入器：之后 log_store.save_log 都走后台批量写入。程序退出时自动收尾。
+    """
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = LogWriter(policy=policy, interval_ms=interval_ms, on_batch=on_batch)
+            log_store.use_writer(_writer)
+            atexit.register(stop)
+        return _writer
+
+
+def stop():
+    """
+    停止全局写入器：写完队列里剩下的记录，save_log 恢复为同步写入。
+    """
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+        if writer is None:
+            return
+        log_store.use_writer(None)
+        writer.close()
+
+
+def flush():
+    """
+    等全局写入器把已经排队的记录写完；没启动时什么都不做。
+    """
+    writer = _writer
+    if writer is not None:
+        writer.flush()
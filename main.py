@@ -1,70 +1,52 @@
-from pathlib import Path
+import startup_profile  # 要最先导入：开启启动分析时才能统计到后面每个 import
+import math
 import time
-import csv
-import matplotlib.pyplot as plt
 from datetime import datetime, timedelta   # 记得把 timedelta 也导入
 
+import log_store
+import log_writer
+from log_store import LOG_FILE, MODE_NAMES, ensure_log_file, format_minutes
+from rollups import recent_keys
+from session_journal import SessionJournal, recovered_span
+from timing import Countdown, Stopwatch, format_hms
 
-LOG_FILE = Path("study_log.csv")
-
-def ensure_log_file():
-    """
-    如果日志文件不存在，就创建并写入表头。
-    """
-    if not LOG_FILE.exists():
-        with LOG_FILE.open("w", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            writer.writerow(["start_time", "end_time", "duration_minutes", "mode", "note"])
-            
-def format_minutes(seconds: float) -> float:
-    """
-    把秒换算成分钟，保留两位小数。
-    """
-    return round(seconds / 60, 2)
 
 def save_log(start: datetime, end: datetime, duration_seconds: float, mode: str, note: str):
     """
     把一条学习记录追加写入 CSV 文件。
     """
-    ensure_log_file()
-    with LOG_FILE.open("a", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow([
-            start.strftime("%Y-%m-%d %H:%M:%S"),
-            end.strftime("%Y-%m-%d %H:%M:%S"),
-            format_minutes(duration_seconds),
-            mode,
-            note
-        ])
-    print("✅ 本次学习记录已保存到 study_log.csv\n")
+    log_store.save_log(start, end, duration_seconds, mode, note)
+    print(f"✅ 本次学习记录已保存到 {LOG_FILE}\n")
 
 def start_countup():
     """
     正计时模式：按 Enter 开始，学习过程中实时显示，按 Ctrl+C 结束。
     """
     input("👉 按 Enter 开始计时（正计时），学习过程中按 Ctrl+C 结束...\n")
-    start_dt = datetime.now()
-    start_ts = time.time()
-    print(f"⏱ 开始时间：{start_dt.strftime('%Y-%m-%d %H:%M:%S')}")
+    watch = Stopwatch()
+    watch.start()
+    journal = SessionJournal()
+    print(f"⏱ 开始时间：{watch.started_at.strftime('%Y-%m-%d %H:%M:%S')}")
 
     try:
         while True:
-            elapsed = int(time.time() - start_ts)  # 已经过的秒数
-            mins, secs = divmod(elapsed, 60)
-            hours, mins = divmod(mins, 60)
-            time_str = f"{hours:02d}:{mins:02d}:{secs:02d}"
-            print(f"\r⏳ 已学习时间：{time_str}", end="", flush=True)
-            time.sleep(1)
+            print(f"\r⏳ 已学习时间：{format_hms(watch.elapsed())}", end="", flush=True)
+            journal.checkpoint(watch, "countup")
+            # 睡到下一个整秒，误差不会一秒一秒地累积
+            time.sleep(watch.until_next_second())
     except KeyboardInterrupt:
         # 捕获 Ctrl+C 结束计时
-        end_dt = datetime.now()
+        duration = watch.stop()
+        start_dt, end_dt = watch.span()
         print()  # 换行
-        duration = (end_dt - start_dt).total_seconds()
         minutes = format_minutes(duration)
         print(f"\n⌛ 本次学习时长：{minutes} 分钟")
 
+        # 写备注时再按 Ctrl+C 也不怕，存档里记着这段学习
+        journal.checkpoint(watch, "countup", force=True)
         note = input("给这次学习写个备注（例如：高数作业 / 英语单词），直接 Enter 跳过：").strip()
         save_log(start_dt, end_dt, duration, "countup", note)
+        journal.clear()
 def start_countdown():
     """
     倒计时模式：输入要学习的分钟数，会实时显示剩余时间。
@@ -79,67 +61,72 @@ def start_countdown():
         print("❌ 输入不是有效的数字，请重试。\n")
         return
 
-    total_seconds = int(minutes * 60)
-    start_dt = datetime.now()
+    countdown = Countdown(int(minutes * 60))
+    countdown.start()
+    journal = SessionJournal()
     print(f"⏱ 开始 {minutes} 分钟倒计时！学习过程中按 Ctrl+C 可提前结束。\n")
 
-    remaining = total_seconds
     try:
-        while remaining > 0:
-            hours, rem = divmod(remaining, 3600)
-            mins, secs = divmod(rem, 60)
-            time_str = f"{hours:02d}:{mins:02d}:{secs:02d}"
-            print(f"\r⏳ 剩余时间：{time_str}", end="", flush=True)
-            time.sleep(1)
-            remaining -= 1
+        while not countdown.finished():
+            print(f"\r⏳ 剩余时间：{format_hms(math.ceil(countdown.remaining()))}", end="", flush=True)
+            journal.checkpoint(countdown, "countdown", countdown.total_seconds)
+            time.sleep(min(countdown.until_next_second(), countdown.remaining()))
     except KeyboardInterrupt:
         # 提前终止倒计时
-        end_dt = datetime.now()
+        duration = countdown.stop()
+        start_dt, end_dt = countdown.span()
         print("\n⏹ 已手动终止倒计时。")
-        duration = (end_dt - start_dt).total_seconds()
         minutes_used = format_minutes(duration)
         print(f"本次实际学习时长：{minutes_used} 分钟")
 
+        journal.checkpoint(countdown, "countdown", countdown.total_seconds, force=True)
         note = input("给这次学习写个备注（例如：专业课复习 / 阅读论文），直接 Enter 跳过：").strip()
         save_log(start_dt, end_dt, duration, "countdown", note)
+        journal.clear()
         return
 
     # 正常倒计时结束
-    end_dt = datetime.now()
-    duration = (end_dt - start_dt).total_seconds()
+    duration = countdown.stop()
+    start_dt, end_dt = countdown.span()
     print("\n⏰ 时间到！辛苦啦～")
     minutes_used = format_minutes(duration)
     print(f"本次实际学习时长：{minutes_used} 分钟")
 
+    journal.checkpoint(countdown, "countdown", countdown.total_seconds, force=True)
     note = input("给这次学习写个备注（例如：专业课复习 / 阅读论文），直接 Enter 跳过：").strip()
     save_log(start_dt, end_dt, duration, "countdown", note)
+    journal.clear()
 
 def today_study_time():
+    log_writer.flush()      # 刚保存的那条可能还在写入队列里
     ensure_log_file()
     
     today_str= datetime.now().strftime("%Y-%m-%d")
-    total_minutes=0.0
-    record_count=0
     
     if not LOG_FILE.exists():
         print("目前还没有任何学习记录！")
         return
     
-    with LOG_FILE.open("r",encoding="utf-8") as f:
-        reader=csv.reader(f)
-        next(reader,None)    
-        for row in reader:
-            if len(row)<3:
-                continue
-                
-            row_date=row[0][:10].strip()
-            if row_date==today_str:
-                duration= float(row[2]) 
-                total_minutes+=duration
-                record_count+=1
+    total_minutes, record_count = log_store.get_store().day_total(today_str)
     print("============== 今日学习汇总 ==============")
     print(f"今日记录次数：{record_count}")
     print(f"今日学习总时长：{int(total_minutes)} 分钟 {int(total_minutes*60)%60}秒\n")               
+def recent_curve_data(days: int = 7):
+    """
+    最近 days 天（从旧到新）的 (日期列表, 每日分钟数列表)。
+    """
+    log_writer.flush()
+    # 1. 最近 days 天的日期范围（从旧到新）
+    today = datetime.now().date()
+    from_date = (today - timedelta(days=days - 1)).strftime("%Y-%m-%d")  # 例如 days=7 → 6 天前
+    to_date = today.strftime("%Y-%m-%d")
+
+    # 2. 用列式汇总引擎一次算出每天的总分钟数（用到才导入，里面会导入 numpy）
+    from aggregate import get_engine
+    daily = get_engine(log_store.get_store()).daily(from_date, to_date)
+    return [d for d, _ in daily], [round(v, 2) for _, v in daily]
+
+
 def show_recent_curve(days: int = 7):
     """
     统计最近 days 天的每日学习总时长，并画出折线图。
@@ -150,42 +137,20 @@ def show_recent_curve(days: int = 7):
         print("目前还没有任何学习记录！")
         return
 
-    # 1. 先把 CSV 里所有记录读出来，按日期累加分钟数
-    daily_minutes = {}  # key: 'YYYY-MM-DD', value: 总分钟数(float)
-
-    with LOG_FILE.open("r", encoding="utf-8") as f:
-        reader = csv.reader(f)
-        next(reader, None)  # 跳过表头
+    dates, values = recent_curve_data(days)
 
-        for row in reader:
-            if len(row) < 3:
-                continue
-            date_str = row[0][:10]  # 'YYYY-MM-DD'
-            try:
-                minutes = float(row[2])
-            except ValueError:
-                continue
-
-            daily_minutes[date_str] = daily_minutes.get(date_str, 0.0) + minutes
-
-    # 2. 构造最近 days 天的日期列表（从旧到新）
-    today = datetime.now().date()
-    dates = []
-    values = []
-
-    for i in range(days - 1, -1, -1):  # 例如 days=7 → 6,5,4,3,2,1,0
-        day = today - timedelta(days=i)
-        d_str = day.strftime("%Y-%m-%d")
-        dates.append(d_str)
-        values.append(round(daily_minutes.get(d_str, 0.0), 2))
-
-    # 3. 打印简单文本汇总
+    # 1. 打印简单文本汇总
     print(f"============== 最近 {days} 天学习情况 ==============")
     for d, v in zip(dates, values):
         print(f"{d}：{v} 分钟")
     print("（同时会弹出一张折线图窗口）\n")
 
-    # 4. 画折线图
+    # 2. 画折线图（matplotlib 很重，第一次画图时才导入）
+    try:
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("（未安装 matplotlib，无法画图）\n")
+        return
     plt.figure()
     plt.plot(dates, values, marker="o")
     plt.title(f"最近 {days} 天每日学习时长")
@@ -195,12 +160,92 @@ def show_recent_curve(days: int = 7):
     plt.tight_layout()
     plt.show()
               
+def show_hour_distribution(days: int = 7):
+    """
+    打印最近 days 天每个钟点的学习分钟数（跨小时的学习按实际时段分摊）。
+    """
+    log_writer.flush()
+    ensure_log_file()
+
+    today = datetime.now().date()
+    from_date = (today - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+    from aggregate import get_engine
+    hourly = get_engine(log_store.get_store()).hourly(from_date, today.strftime("%Y-%m-%d"))
+    peak = max(hourly) or 1
+    print(f"============== 最近 {days} 天各时段学习情况 ==============")
+    for hour, minutes in enumerate(hourly):
+        bar = "█" * round(minutes / peak * 30)
+        print(f"{hour:02d}:00-{hour + 1:02d}:00 {round(minutes, 1):>8} 分钟 {bar}")
+    print()
+
+def show_period_summary(kind: str = "week", count: int = 8):
+    """
+    打印最近 count 周 / 月的学习总时长（直接查预聚合统计，不扫日志）。
+    """
+    log_writer.flush()
+    ensure_log_file()
+
+    store = log_store.get_store()
+    unit = "周" if kind == "week" else "个月"
+    print(f"============== 最近 {count} {unit}学习情况 ==============")
+    for key in recent_keys(kind, count):
+        minutes, record_count = store.period_total(kind, key)
+        by_mode = store.period_by_mode(kind, key)
+        parts = [f"{MODE_NAMES.get(m, m or '未知')} {round(v, 2)}" for m, v in sorted(by_mode.items())]
+        detail = f"（{' / '.join(parts)}）" if parts else ""
+        print(f"{key}：{round(minutes, 2)} 分钟，{record_count} 次{detail}")
+    print()
+
+def show_note_summary():
+    """
+    按备注关键词统计最近 30 天的学习时长；不输入关键词时列出本月学得最多的科目。
+    """
+    log_writer.flush()
+    ensure_log_file()
+
+    import note_index
+    keyword = input("备注关键词（直接回车看本月科目排行）：").strip()
+    store = log_store.get_store()
+    if keyword:
+        print(note_index.keyword_report(store, keyword, 30))
+    else:
+        print(note_index.top_report(store, 10))
+    print()
+
 def main_menu():
     """
     程序主菜单循环。
     """
     ensure_log_file()
+    log_writer.start()
+    try:
+        offer_recovery()
+        startup_profile.mark("菜单就绪")
+        startup_profile.report()
+        run_menu()
+    finally:
+        log_writer.stop()
+
+
+def offer_recovery():
+    """
+    上次异常退出留下了没保存的学习，问一下要不要补记。
+    """
+    journal = SessionJournal()
+    entry = journal.pending()
+    if entry is None:
+        journal.close()     # 放开锁，计时时再另占
+        return
+    start_dt, end_dt, seconds = recovered_span(entry)
+    print("⚠️ 上次有一段学习没来得及保存：")
+    print(f"   {start_dt.strftime('%Y-%m-%d %H:%M')} 开始，{MODE_NAMES.get(entry.mode, entry.mode)}，"
+          f"已学 {format_hms(seconds)}")
+    if input("要补记到学习日志吗？(y/n)：").strip().lower() == "y":
+        save_log(start_dt, end_dt, seconds, entry.mode, "（异常退出后补记）")
+    journal.clear()
+
 
+def run_menu():
     while True:
         print("============== 学习计时器 v0.2 ==============")
         print("1. 正计时（实时显示，Ctrl+C 结束）")
@@ -208,8 +253,12 @@ def main_menu():
         print("3. 退出程序")
         print("4. 查看今天总学习时长")
         print("5. 查看最近 7 天学习曲线图")
+        print("6. 查看最近 8 周学习时长")
+        print("7. 查看最近 6 个月学习时长")
+        print("8. 查看最近 7 天各时段学习分布")
+        print("9. 按备注关键词 / 科目统计")
 
-        choice = input("请选择功能（1/2/3/4/5）：").strip()
+        choice = input("请选择功能（1-9）：").strip()
 
         if choice == "1":
             start_countup()
@@ -219,9 +268,17 @@ def main_menu():
             print("👋 已退出学习计时器，再见～")
             break
         elif choice == "4":
-            show_today_summary()
+            today_study_time()
         elif choice == "5":
             show_recent_curve(days=7)
+        elif choice == "6":
+            show_period_summary("week", 8)
+        elif choice == "7":
+            show_period_summary("month", 6)
+        elif choice == "8":
+            show_hour_distribution(days=7)
+        elif choice == "9":
+            show_note_summary()
         else:
             print("❌ 无效选项，请重新选择。\n")
 
@@ -230,4 +287,5 @@ def main_menu():
         
 
 if __name__ == "__main__":
+    startup_profile.mark("导入完成")
     main_menu()
\ No newline at end of file
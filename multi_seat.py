@@ -0,0 +1,177 @@
+"""
+多座位汇总：一个目录里放着很多份学习日志（每个座位一份），用进程池并行地
+逐个文件解析、算出最近 N 天的每日 / 按模式小计，再在主进程里合并，
+同时给出每个座位的结果和全部座位的合计。每份日志的统计口径和 summarize_recent 一样。
+
+目录里可以直接放 座位名.csv，也可以是 座位名/study_log.csv；.bin / .db 日志也认。
+每份日志只读地解析一遍，不拿锁、不建 .idx / .rollup.json 之类的 sidecar，
+放在只读的共享目录上也能汇总。
+
+用法：
+    python multi_seat.py seats/                       # 最近 7 天，文字报表
+    python multi_seat.py seats/ --days 30 --workers 8
+    python multi_seat.py seats/ --from 2025-09-01 --to 2025-12-31 --format json
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from pathlib import Path
+
+from log_store import BACKENDS, MODE_NAMES, Snapshot, read_rows
+from stats_cli import iter_days
+
+# 认作日志的后缀（空后缀是按月分区的目录，这里不算）
+LOG_SUFFIXES = tuple(suffix for suffix in BACKENDS if suffix) + (".csv",)
+
+
+def discover(directory) -> dict:
+    """
+    找出目录里的日志：{座位名: 路径}。座位名取文件名（不含后缀），
+    文件叫 study_log.* 时取所在子目录的名字。
+    """
+    directory = Path(directory)
+    seats = {}
+    for path in sorted(directory.rglob("*")):
+        if path.suffix.lower() not in LOG_SUFFIXES or not path.is_file():
+            continue
+        seat = path.parent.name if path.stem == "study_log" and path.parent != directory else path.stem
+        if seat in seats:
+            seat = str(path.relative_to(directory))
+        seats[seat] = path
+    return seats
+
+
+class RecordSnapshot(Snapshot):
+    """
+    二进制日志直接给出 (start 秒数, end 秒数, 分钟数, 模式)，引擎不用再换算时间字符串。
+    """
+
+    def records_since(self, n: int):
+        return self._sessions[n:]
+
+
+def load_snapshot(path) -> Snapshot:
+    """
+    按后缀只读地把整份日志读一遍。
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix == ".bin":
+        from log_binary import read_records
+        return RecordSnapshot(read_records(path))
+    if suffix in BACKENDS:
+        from log_sqlite import read_sessions
+        return Snapshot(read_sessions(path))
+    sessions, _ = read_rows(path, 0)
+    return Snapshot(sessions)
+
+
+def seat_partial(seat: str, path, from_date: str, to_date: str) -> dict:
+    """
+    在工作进程里跑：一份日志在区间内的每日分钟数、按模式分钟数和记录次数。
+    出错的日志返回带 error 的结果，不影响其他座位。
+    """
+    from aggregate import AggregationEngine    # 只在工作进程里导入 numpy
+    try:
+        engine = AggregationEngine(load_snapshot(path))
+        daily = [v for _, v in engine.daily(from_date, to_date)]
+        minutes, count = engine.total(from_date, to_date)
+        return {"seat": seat, "daily": daily, "by_mode": engine.by_mode(from_date, to_date),
+                "minutes": minutes, "sessions": count}
+    except (OSError, ValueError, sqlite3.Error) as e:
+        return {"seat": seat, "error": str(e)}
+
+
+def merge(partials, days: int) -> dict:
+    """
+    把各座位的小计加起来。
+    """
+    combined = {"daily": [0.0] * days, "by_mode": {}, "minutes": 0.0, "sessions": 0, "seats": 0}
+    for part in partials:
+        if "error" in part:
+            continue
+        combined["daily"] = [a + b for a, b in zip(combined["daily"], part["daily"])]
+        for mode, minutes in part["by_mode"].items():
+            combined["by_mode"][mode] = combined["by_mode"].get(mode, 0.0) + minutes
+        combined["minutes"] += part["minutes"]
+        combined["sessions"] += part["sessions"]
+        combined["seats"] += 1
+    return combined
+
+
+def aggregate_seats(seats: dict, from_date: str, to_date: str, workers: int = None):
+    """
+    并行汇总 {座位名: 路径}，返回 (按座位名排序的小计列表, 合计)。
+    workers 为 1 时在当前进程里顺序跑，方便调试和做基准对比。
+    """
+    days = (date.fromisoformat(to_date) - date.fromisoformat(from_date)).days + 1
+    names = sorted(seats)
+    args = (names, [seats[n] for n in names], [from_date] * len(names), [to_date] * len(names))
+    if workers == 1 or len(names) <= 1:
+        partials = list(map(seat_partial, *args))
+    else:
+        workers = workers or os.cpu_count() or 1
+        # 每个进程一次领几份，文件很多时减少进程间来回
+        chunksize = max(1, len(names) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            partials = list(pool.map(seat_partial, *args, chunksize=chunksize))
+    return partials, merge(partials, days)
+
+
+def print_report(partials, combined, from_date: str, to_date: str, out=sys.stdout):
+    print(f"============== {from_date} ~ {to_date}，{combined['seats']} 个座位 ==============", file=out)
+    for part in partials:
+        if "error" in part:
+            print(f"{part['seat']:<20} ❌ {part['error']}", file=out)
+            continue
+        modes = " / ".join(f"{MODE_NAMES.get(m, m or '未知')} {round(v, 1)}"
+                           for m, v in sorted(part["by_mode"].items()))
+        print(f"{part['seat']:<20} {round(part['minutes'], 1):>10} 分钟 {part['sessions']:>6} 次  {modes}",
+              file=out)
+    print("------------------ 合计（每天） ------------------", file=out)
+    for d, v in zip(iter_days(from_date, to_date), combined["daily"]):
+        print(f"{d}：{round(v, 2)} 分钟", file=out)
+    modes = " / ".join(f"{MODE_NAMES.get(m, m or '未知')} {round(v, 2)}"
+                       for m, v in sorted(combined["by_mode"].items()))
+    print(f"总计：{round(combined['minutes'], 2)} 分钟，{combined['sessions']} 次（{modes}）", file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("directory", type=Path)
+    parser.add_argument("--from", dest="from_date", type=date.fromisoformat, help="起始日期（含）")
+    parser.add_argument("--to", dest="to_date", type=date.fromisoformat, help="结束日期（含），默认今天")
+    parser.add_argument("--days", type=int, default=7, help="没给 --from 时统计最近几天（默认 7）")
+    parser.add_argument("--workers", type=int, help="进程数（默认 CPU 核数）")
+    parser.add_argument("--format", choices=("text", "json"), default="text")
+    args = parser.parse_args(argv)
+
+    to_date = args.to_date or date.today()
+    from_date = args.from_date or to_date - timedelta(days=args.days - 1)
+    if from_date > to_date:
+        parser.error("--from 不能晚于 --to")
+    seats = discover(args.directory)
+    if not seats:
+        print(f"❌ {args.directory} 里没有找到学习日志")
+        return 1
+
+    t0 = time.perf_counter()
+    partials, combined = aggregate_seats(seats, from_date.isoformat(), to_date.isoformat(), args.workers)
+    elapsed = time.perf_counter() - t0
+    if args.format == "json":
+        json.dump({"from": from_date.isoformat(), "to": to_date.isoformat(), "seconds": round(elapsed, 3),
+                   "seats": partials, "combined": combined}, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        print_report(partials, combined, from_date.isoformat(), to_date.isoformat())
+        print(f"（用时 {elapsed:.2f} 秒）")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
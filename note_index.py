@@ -0,0 +1,355 @@
+"""
+备注索引：备注是唯一记着“学了什么”的地方，这里把它建成倒排索引，
+回答“最近 30 天学了多少高数”“这个月学得最多的 10 个科目”这类问题，不用扫日志。
+
+- 分词：中日韩文字切成单字 + 相邻两字（“高数作业” -> 高 数 作 业 高数 数作 作业），
+  字母数字按整词（不分大小写、全角半角），#标签 整个作为一个词。
+- 科目：备注里的 #标签；没有标签时取开头第一段（遇到空格、标点、括号为止），
+  例如 “线性代数 第三章” -> 线性代数，“📚 背书” -> 背书。
+- 同样的备注只存一份：备注 -> {日期: [分钟数, 次数]}，跨零点的记录按天分摊。
+
+CSV 日志的索引存在 study_log.csv.notes.json，和预聚合统计一样按字节位置增量更新，
+save_log 追加时顺手累加；其他格式第一次查询时在内存里建，之后只并入新记录。
+
+用法：
+    python note_index.py 高数              # 最近 30 天备注里含“高数”的学习时长
+    python note_index.py 高数 --days 7
+    python note_index.py --top 10          # 本月学得最多的 10 个科目
+"""
+import argparse
+import re
+import sys
+import threading
+import unicodedata
+from datetime import date, timedelta
+
+from rollups import Rollups, RollupTables, split_by_day
+
+# 中日韩文字（含假名、谚文）
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af"
+_TOKEN = re.compile(rf"#[^\s#,，。;；:：]+|[{_CJK}]+|[0-9a-z]+")
+_CJK_RUN = re.compile(rf"[{_CJK}]+")
+_TAG = re.compile(r"#([^\s#,，。;；:：]+)")
+# 科目在第一个空白 / 标点 / 括号 / 引号 / 数字处结束
+_SUBJECT = re.compile(r"[^\s,，。.;；:：、()（）\[\]【】<>《》\"'“”‘’!！?？0-9]+")
+
+
+def normalize(text: str) -> str:
+    """
+    全角转半角、大写转小写，匹配时两边都先这样处理。
+    """
+    return unicodedata.normalize("NFKC", text).lower()
+
+
+def tokenize(text: str):
+    """
+    返回 text 里的词（集合）。中日韩文字出单字和相邻两字，其余按整词。
+    """
+    tokens = set()
+    for match in _TOKEN.finditer(normalize(text)):
+        token = match.group()
+        if token.startswith("#"):
+            tokens.add(token)
+            tokens |= tokenize(token[1:])
+        elif _CJK_RUN.fullmatch(token):
+            tokens.update(token)
+            tokens.update(token[i:i + 2] for i in range(len(token) - 1))
+        else:
+            tokens.add(token)
+    return tokens
+
+
+def query_tokens(text: str):
+    """
+    查询用的词：中日韩文字超过一个字时只用相邻两字，候选更少。
+    """
+    tokens = tokenize(text)
+    if len(normalize(text).strip()) == 1:
+        return tokens
+    return {t for t in tokens if len(t) > 1 or not _CJK_RUN.fullmatch(t)}
+
+
+def subjects_of(note: str):
+    """
+    备注 -> 科目列表：有 #标签 就用标签，否则取开头第一段；什么都取不到时返回空列表。
+    """
+    text = unicodedata.normalize("NFKC", note).strip()
+    tags = _TAG.findall(text)
+    if tags:
+        return list(dict.fromkeys(tags))
+    # 跳过开头的 emoji 之类的符号
+    start = next((i for i, ch in enumerate(text) if ch.isalnum()), None)
+    if start is None:
+        return []
+    match = _SUBJECT.match(text, start)
+    return [match.group()] if match else []
+
+
+class NoteTables(RollupTables):
+    """
+    备注 -> {日期: [分钟数, 次数]}，外加 词 -> {备注} 和 科目 -> {备注} 两张倒排表。
+
+    另外在内存里按月累计每条备注、每个科目的小计（载入时由 notes 推出来，不进 sidecar），
+    查一段日期时整月的直接查月小计，只有两头不满一个月的几天才逐日查，
+    所以“本月前 10 个科目”不用把每个科目的全部历史扫一遍。
+    """
+
+    def _reset(self):
+        self.notes = {}
+        self.tokens = {}
+        self.subjects = {}
+        self._dirty = False
+        self._note_months = {}      # 备注 -> {月份: [分钟数, 次数]}
+        self._note_subjects = {}    # 备注 -> [科目, ...]
+        self._subject_days = {}     # 科目 -> {日期: [分钟数, 次数]}
+        self._subject_months = {}   # 科目 -> {月份: [分钟数, 次数]}
+
+    def _index_note(self, note: str):
+        for token in tokenize(note):
+            self.tokens.setdefault(token, set()).add(note)
+        subjects = self._note_subjects[note] = subjects_of(note)
+        for subject in subjects:
+            self.subjects.setdefault(subject, set()).add(note)
+            self._subject_days.setdefault(subject, {})
+            self._subject_months.setdefault(subject, {})
+        self._note_months[note] = {}
+
+    def _tally(self, note: str, date_str: str, minutes: float, count: int):
+        """
+        一条备注在某天的分钟数和次数计进月小计和科目小计（notes 本身由调用方更新）。
+        """
+        _bump(self._note_months[note], date_str[:7], minutes, count)
+        for subject in self._note_subjects[note]:
+            _bump(self._subject_days[subject], date_str, minutes, count)
+            _bump(self._subject_months[subject], date_str[:7], minutes, count)
+
+    def add_many(self, sessions):
+        for s in sessions:
+            note = s.note.strip()
+            if not note:
+                continue
+            days = self.notes.get(note)
+            if days is None:
+                days = self.notes[note] = {}
+                self._index_note(note)
+            parts = ((s.start[:10], s.minutes, 1),) if s.end[:10] <= s.start[:10] \
+                else split_by_day(s.start, s.end, s.minutes)
+            for date_str, minutes, count in parts:
+                _bump(days, date_str, minutes, count)
+                self._tally(note, date_str, minutes, count)
+            self._dirty = True
+
+    def add(self, session):
+        self.add_many([session])
+
+    # ---------- 查询 ----------
+    def matching(self, query: str):
+        """
+        备注里含 query 的所有备注（按词取交集，再逐条确认确实包含）。
+        """
+        tokens = query_tokens(query)
+        if not tokens:
+            return []
+        candidates = None
+        for token in sorted(tokens, key=lambda t: len(self.tokens.get(t, ()))):
+            notes = self.tokens.get(token)
+            if not notes:
+                return []
+            candidates = set(notes) if candidates is None else candidates & notes
+            if not candidates:
+                return []
+        wanted = normalize(query).strip()
+        return [note for note in candidates if wanted in normalize(note)]
+
+    def keyword_total(self, query: str, from_date: str, to_date: str):
+        """
+        区间内备注含 query 的 (总分钟数, 次数)。
+        """
+        pieces = month_pieces(from_date, to_date)
+        minutes, count = 0.0, 0
+        for note in self.matching(query):
+            m, c = _range_total(self.notes[note], self._note_months[note], pieces)
+            minutes += m
+            count += c
+        return minutes, count
+
+    def top_subjects(self, from_date: str, to_date: str, n: int = 10):
+        """
+        区间内学得最多的 n 个科目：[(科目, 分钟数, 次数), ...]。
+        """
+        pieces = month_pieces(from_date, to_date)
+        totals = []
+        for subject, months in self._subject_months.items():
+            minutes, count = _range_total(self._subject_days[subject], months, pieces)
+            if minutes > 0 or count:
+                totals.append((subject, minutes, count))
+        totals.sort(key=lambda t: (-t[1], t[0]))
+        return totals[:n]
+
+    # ---------- sidecar ----------
+    def _restore(self, data: dict):
+        self._reset()
+        self.notes = data["notes"]
+        for note, days in self.notes.items():
+            self._index_note(note)
+            for date_str, (minutes, count) in days.items():
+                self._tally(note, date_str, minutes, count)
+
+    def _dump(self) -> dict:
+        return {"notes": {note: {d: [round(t[0], 4), t[1]] for d, t in days.items()}
+                          for note, days in self.notes.items()}}
+
+
+def _bump(table: dict, key: str, minutes: float, count: int):
+    totals = table.get(key)
+    if totals is None:
+        table[key] = [minutes, count]
+    else:
+        totals[0] += minutes
+        totals[1] += count
+
+
+def month_pieces(from_date: str, to_date: str):
+    """
+    把 [from_date, to_date] 拆成 (整月的 'YYYY-MM' 列表, 两头零散日期的 'YYYY-MM-DD' 列表)。
+    """
+    first, last = date.fromisoformat(from_date), date.fromisoformat(to_date)
+    months, dates = [], []
+    day = first
+    while day <= last:
+        next_month = (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+        if day.day == 1 and next_month - timedelta(days=1) <= last:
+            months.append(day.strftime("%Y-%m"))
+        else:
+            stop = min(next_month - timedelta(days=1), last)
+            dates.extend((day + timedelta(days=i)).isoformat() for i in range((stop - day).days + 1))
+        day = next_month
+    return months, dates
+
+
+def _range_total(days: dict, months: dict, pieces):
+    """
+    按 month_pieces 的拆法，用日小计和月小计算出区间的 (分钟数, 次数)。
+    """
+    full_months, loose_dates = pieces
+    minutes, count = 0.0, 0
+    for table, keys in ((months, full_months), (days, loose_dates)):
+        for key in keys:
+            totals = table.get(key)
+            if totals is not None:
+                minutes += totals[0]
+                count += totals[1]
+    return minutes, count
+
+
+class NoteIndex(NoteTables, Rollups):
+    """
+    存成 sidecar、跟 CSV 日志保持同步的 NoteTables，同步方式和预聚合统计一样。
+    """
+
+    SUFFIX = ".notes.json"
+    VERSION = 1
+
+    def _reset(self):
+        NoteTables._reset(self)
+        self.upto = 0
+        self.header_crc = None
+        self._unsaved = 0
+
+
+class MemoryNoteIndex(NoteTables):
+    """
+    没有 sidecar 的存储格式用：在内存里建，之后按记录编号只并入新记录。
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._count = 0
+        self._generation = None
+        self._lock = threading.Lock()
+        super().__init__()
+
+    def refresh(self):
+        with self._lock:
+            generation = getattr(self.store, "generation", 0)
+            if generation != self._generation:
+                self._reset()
+                self._count = 0
+                self._generation = generation
+            sessions = self.store.sessions_since(self._count)
+            if getattr(self.store, "generation", 0) != generation:
+                # 读的过程中日志被重建了，编号全变了，从头再来
+                self._reset()
+                self._generation = getattr(self.store, "generation", 0)
+                self._count = 0
+                sessions = self.store.sessions_since(0)
+            self.add_many(sessions)
+            self._count += len(sessions)
+        return self
+
+
+_indexes = {}
+
+
+def get_index(store):
+    """
+    返回已经追上日志的备注索引。CSV 日志用它自己的 sidecar 索引。
+    """
+    own = getattr(store, "note_index", None)
+    if own is not None:
+        return own()
+    index = _indexes.get(id(store))
+    if index is None or index.store is not store:
+        index = _indexes[id(store)] = MemoryNoteIndex(store)
+    return index.refresh()
+
+
+# ================== 文字报表 ==================
+
+def keyword_report(store, keyword: str, days: int = 30, today: date = None) -> str:
+    today = today or date.today()
+    from_date = (today - timedelta(days=days - 1)).isoformat()
+    index = get_index(store)
+    minutes, count = index.keyword_total(keyword, from_date, today.isoformat())
+    notes = index.matching(keyword)
+    lines = [f"最近 {days} 天备注含“{keyword}”的学习：{round(minutes, 2)} 分钟（{count} 次）"]
+    if len(notes) > 1:
+        lines.append("涉及的备注：" + "、".join(sorted(n.replace("\n", " ") for n in notes)[:10]))
+    return "\n".join(lines)
+
+
+def top_report(store, n: int = 10, today: date = None) -> str:
+    today = today or date.today()
+    from_date = today.replace(day=1).isoformat()
+    rows = get_index(store).top_subjects(from_date, today.isoformat(), n)
+    if not rows:
+        return "本月还没有写了备注的学习记录。"
+    lines = [f"本月学得最多的 {len(rows)} 个科目："]
+    for i, (subject, minutes, count) in enumerate(rows, 1):
+        lines.append(f"{i:>2}. {subject}：{round(minutes, 2)} 分钟（{count} 次）")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    from log_store import get_store, open_store
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("keyword", nargs="?", help="备注关键词")
+    parser.add_argument("--days", type=int, default=30, help="统计最近几天（默认 30）")
+    parser.add_argument("--top", type=int, help="列出本月学得最多的几个科目")
+    parser.add_argument("--log", help="日志路径（默认 STUDY_LOG_FILE 或 study_log.csv）")
+    args = parser.parse_args(argv)
+    if not args.keyword and not args.top:
+        parser.print_help()
+        return 1
+
+    store = open_store(args.log) if args.log else get_store()
+    if args.keyword:
+        print(keyword_report(store, args.keyword, args.days))
+    if args.top:
+        print(top_report(store, args.top))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
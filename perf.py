@@ -0,0 +1,179 @@
+"""
+热点耗时统计：设置环境变量 STUDY_TIMER_PERF=1 后启动，或者在悬浮窗里按 Ctrl+Shift+P 随时打开，
+会给计时刷新、save_log、后台写日志、今日 / 最近统计和画图记耗时直方图，
+悬浮窗上用小字显示各项的 p50 / p99，程序退出时往 STUDY_TIMER_PERF_FILE
+（默认 study_timer_perf.jsonl）追加一行 JSON，方便在慢机器上对比前后版本。
+
+计时刷新除了自身耗时，还记“晚到”：实际醒来的时间减去排定的时间，
+Tk 事件循环被别的事情卡住时这一项会先变差。
+
+没开启时每个打点只多一次布尔判断。
+"""
+import atexit
+import json
+import math
+import os
+import platform
+import sys
+import threading
+import time
+from datetime import datetime
+from functools import wraps
+from pathlib import Path
+
+ENABLED = bool(os.environ.get("STUDY_TIMER_PERF"))
+PERF_FILE = Path(os.environ.get("STUDY_TIMER_PERF_FILE", "study_timer_perf.jsonl"))
+
+# 直方图的桶：从 1 微秒起，每个桶比上一个宽约 10%，误差不超过 10%
+MIN_SECONDS = 1e-6
+_LOG_STEP = math.log(1.1)
+
+
+class Histogram:
+    """
+    对数分桶的耗时直方图，只存每个桶的次数，记多少次都只占几十个整数。
+    """
+
+    def __init__(self):
+        self.buckets = {}       # 桶编号 -> 次数
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float):
+        index = int(math.log(max(seconds, MIN_SECONDS) / MIN_SECONDS) / _LOG_STEP)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    @staticmethod
+    def upper(index: int) -> float:
+        return MIN_SECONDS * math.exp((index + 1) * _LOG_STEP)
+
+    def percentile(self, p: float) -> float:
+        """
+        第 p 百分位（秒），取所在桶的上界，不超过实际最大值。
+        """
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(self.count * p / 100))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(self.upper(index), self.max)
+        return self.max
+
+    def summary(self) -> dict:
+        ms = 1000
+        return {"count": self.count,
+                "mean_ms": round(self.total / self.count * ms, 3) if self.count else 0.0,
+                "p50_ms": round(self.percentile(50) * ms, 3),
+                "p90_ms": round(self.percentile(90) * ms, 3),
+                "p99_ms": round(self.percentile(99) * ms, 3),
+                "max_ms": round(self.max * ms, 3),
+                "buckets": {f"{self.upper(i) * ms:.4g}": n for i, n in sorted(self.buckets.items())}}
+
+
+_histograms = {}        # 名字 -> Histogram，按第一次记录的顺序
+_lock = threading.Lock()   # 统计在后台线程里跑，也会来记
+_dump_registered = False
+
+
+def enable():
+    """
+    打开统计，退出时写结果。可以重复调用。
+    """
+    global ENABLED, _dump_registered
+    ENABLED = True
+    if not _dump_registered:
+        _dump_registered = True
+        atexit.register(dump)
+
+
+def disable():
+    """
+    停止记录，已经记下的保留（退出时照样写出）。
+    """
+    global ENABLED
+    ENABLED = False
+
+
+def record(name: str, seconds: float):
+    if not ENABLED:
+        return
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = Histogram()
+        histogram.add(seconds)
+
+
+def late(name: str, now: float, due):
+    """
+    记一次定时回调晚到了多久：now 和 due 都是 time.perf_counter() 的读数，due 为 None 时不记。
+    """
+    if ENABLED and due is not None:
+        record(name, max(0.0, now - due))
+
+
+def timed(name: str):
+    """
+    装饰器：开启时记录被装饰函数每次调用的耗时（出异常也记）。
+    """
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return fn(*args, **kwargs)
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - t0)
+        return wrapper
+    return decorate
+
+
+def snapshot() -> dict:
+    """
+    {名字: 汇总}，汇总见 Histogram.summary。
+    """
+    with _lock:
+        return {name: h.summary() for name, h in _histograms.items()}
+
+
+def overlay_text() -> str:
+    """
+    悬浮窗上显示的几行：名字 p50 / p99 次数。
+    """
+    with _lock:
+        items = [(name, h.percentile(50), h.percentile(99), h.count) for name, h in _histograms.items()]
+    if not items:
+        return "性能统计已开启，等待数据…"
+    return "\n".join(f"{name} {p50 * 1000:.2f}/{p99 * 1000:.2f}ms ×{count}"
+                     for name, p50, p99, count in items)
+
+
+def dump(path=None):
+    """
+    把目前的统计追加写成一行 JSON；什么都没记时不写。
+    """
+    data = snapshot()
+    if not data:
+        return
+    line = {"saved_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(), "platform": platform.platform(),
+            "metrics": data}
+    path = Path(path or PERF_FILE)
+    try:
+        with path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(line, ensure_ascii=False) + "\n")
+    except OSError as e:
+        print(f"⚠️ 性能统计写入失败：{e}", file=sys.stderr)
+
+
+if ENABLED:
+    enable()
@@ -0,0 +1,350 @@
+"""
+预聚合统计：按天 / ISO 周 / 月 和模式累计学习分钟数与次数，存在日志旁边的
+study_log.csv.rollup.json 里。save_log 追加记录时顺手更新，统计时直接查表。
+
+跨过零点的记录按实际落在每天的时长分摊到各天，次数只算在开始那天。
+
+用法（统计和 CSV 对不上时从头重建）：
+    python rollups.py rebuild [日志路径]
+"""
+import json
+import sys
+import zlib
+from functools import lru_cache
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from file_lock import write_atomic
+
+# 查某段日期的汇总时，往前多看几天开始的记录（可能跨零点延续进来）；
+# 比这更长的单次记录不现实，按开始日期分区 / 建索引的存储都靠它来裁剪
+SPAN_LOOKBACK_DAYS = 2
+
+# 比回看天数还长的记录（多半是结束时间写错了）不分摊，整条算在开始的桶里，
+# 这样查询时的回看裁剪也不会漏掉它的任何一部分
+MAX_SPAN_SECONDS = SPAN_LOOKBACK_DAYS * 86400
+
+
+@lru_cache(maxsize=4096)
+def period_keys(date_str: str):
+    """
+    'YYYY-MM-DD' -> (日, ISO 周, 月) 三个汇总键。
+    """
+    y, m, d = int(date_str[:4]), int(date_str[5:7]), int(date_str[8:10])
+    iso_year, iso_week, _ = date(y, m, d).isocalendar()
+    return date_str, f"{iso_year}-W{iso_week:02d}", date_str[:7]
+
+
+def period_range(kind: str, key: str):
+    """
+    汇总键 -> [起始日期, 结束日期) 两个 'YYYY-MM-DD' 字符串。
+    """
+    if kind == "day":
+        first = date.fromisoformat(key)
+        last = first + timedelta(days=1)
+    elif kind == "week":
+        year, week = key.split("-W")
+        first = date.fromisocalendar(int(year), int(week), 1)
+        last = first + timedelta(days=7)
+    else:
+        year, month = int(key[:4]), int(key[5:7])
+        first = date(year, month, 1)
+        last = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return first.isoformat(), last.isoformat()
+
+
+def split_span(start: int, end: int, minutes: float, unit: int = 86400):
+    """
+    把 [start, end)（秒）这段学习按和每个桶（天 / 小时）重叠的秒数分摊 minutes，
+    返回 [(桶编号, 分钟数), ...]，桶编号是 秒数 // unit。结束不晚于开始、
+    或者长过 MAX_SPAN_SECONDS 时整段算在开始的桶。
+    """
+    first = start // unit
+    if end <= start or end - start > MAX_SPAN_SECONDS:
+        return [(first, minutes)]
+    last = (end - 1) // unit
+    if first == last:
+        return [(first, minutes)]
+    length = end - start
+    return [(b, minutes * (min(end, (b + 1) * unit) - max(start, b * unit)) / length)
+            for b in range(first, last + 1)]
+
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+@lru_cache(maxsize=4096)
+def _day_number(date_str: str) -> int:
+    return (date.fromisoformat(date_str) - _EPOCH.date()).days
+
+
+def _seconds(text: str) -> int:
+    """
+    'YYYY-MM-DD HH:MM:SS' -> 秒数，和 log_store.to_epoch 的换算一致（这里不能导入 log_store）。
+    """
+    if len(text) != 19 or text[10] != " ":
+        raise ValueError(text)
+    return _day_number(text[:10]) * 86400 + int(text[11:13]) * 3600 + int(text[14:16]) * 60 + int(text[17:19])
+
+
+def split_by_day(start: str, end: str, minutes: float):
+    """
+    一条记录 -> [(日期, 分钟数, 次数), ...]。当天结束的直接返回开始日期；
+    跨零点的按天分摊，次数只记在开始那天。时间格式不对时整条算在开始日期。
+    """
+    if end[:10] <= start[:10]:
+        return [(start[:10], minutes, 1)]
+    try:
+        t0, t1 = _seconds(start), _seconds(end)
+    except ValueError:
+        return [(start[:10], minutes, 1)]
+    parts = split_span(t0, t1, minutes)
+    return [((_EPOCH + timedelta(days=day)).strftime("%Y-%m-%d"), m, int(i == 0))
+            for i, (day, m) in enumerate(parts)]
+
+
+def recent_keys(kind: str, count: int, today: date = None):
+    """
+    返回截至今天最近 count 个周期的汇总键（从旧到新），kind 为 "day" / "week" / "month"。
+    """
+    today = today or date.today()
+    keys = []
+    if kind == "day":
+        for i in range(count - 1, -1, -1):
+            keys.append((today - timedelta(days=i)).strftime("%Y-%m-%d"))
+    elif kind == "week":
+        for i in range(count - 1, -1, -1):
+            keys.append(period_keys((today - timedelta(weeks=i)).strftime("%Y-%m-%d"))[1])
+    else:
+        y, m = today.year, today.month
+        for _ in range(count):
+            keys.append(f"{y}-{m:02d}")
+            y, m = (y, m - 1) if m > 1 else (y - 1, 12)
+        keys.reverse()
+    return keys
+
+
+class RollupTables:
+    """
+    day / week / month 三张表，每张表：键 -> {模式: [总分钟数, 记录次数]}。
+    """
+
+    KINDS = ("day", "week", "month")
+
+    def __init__(self):
+        self._reset()
+
+    def _reset(self):
+        self.tables = {kind: {} for kind in self.KINDS}
+        self._dirty = False
+
+    def add(self, session):
+        """
+        把一条记录累加进三张表（跨零点的按天分摊）。
+        """
+        for date_str, minutes, count in split_by_day(session.start, session.end, session.minutes):
+            self.add_minutes(date_str, session.mode, minutes, count)
+
+    def add_many(self, sessions):
+        """
+        累加一批记录：先按 (日期, 模式) 合并，再进三张表，追上一大段历史时少做很多次字典操作。
+        """
+        merged = {}
+        for s in sessions:
+            day = s.start[:10]
+            # 绝大多数记录当天结束，不用拆
+            parts = ((day, s.minutes, 1),) if s.end[:10] <= day else split_by_day(s.start, s.end, s.minutes)
+            for date_str, minutes, count in parts:
+                key = (date_str, s.mode)
+                totals = merged.get(key)
+                if totals is None:
+                    merged[key] = [minutes, count]
+                else:
+                    totals[0] += minutes
+                    totals[1] += count
+        for (date_str, mode), (minutes, count) in merged.items():
+            self.add_minutes(date_str, mode, minutes, count)
+
+    def add_minutes(self, date_str: str, mode: str, minutes: float, count: int = 1):
+        """
+        按日期和模式直接累加分钟数与次数。开始日期不是合法日期的行直接跳过（和逐行统计时一样）。
+        """
+        try:
+            keys = period_keys(date_str)
+        except ValueError:
+            return
+        for kind, key in zip(self.KINDS, keys):
+            by_mode = self.tables[kind].setdefault(key, {})
+            totals = by_mode.setdefault(mode, [0.0, 0])
+            totals[0] += minutes
+            totals[1] += count
+        self._dirty = True
+
+    def totals(self, kind: str, key: str):
+        """
+        返回某一天 / 周 / 月的 (总分钟数, 记录次数)，各模式合计。
+        """
+        minutes, count = 0.0, 0
+        for m, c in self.tables[kind].get(key, {}).values():
+            minutes += m
+            count += c
+        return minutes, count
+
+    def by_mode(self, kind: str, key: str):
+        """
+        返回某一天 / 周 / 月里 {模式: 总分钟数}。
+        """
+        return {mode: t[0] for mode, t in self.tables[kind].get(key, {}).items()}
+
+
+class Rollups(RollupTables):
+    """
+    存成 sidecar 文件、跟 CSV 日志保持同步的 RollupTables。
+
+    upto 记录已经汇总到日志的哪个字节位置；日志追加了新行就从 upto 往后补，
+    表头变了或文件被改写就整体重建。
+
+    sidecar 是整个重写的，所以不是每追加一条就写：攒够 SAVE_ROWS 条、从头重建过，
+    或者 flush() 时才写。没来得及写就退出也没关系，下次从旧的 upto 往后补上即可。
+    """
+
+    SUFFIX = ".rollup.json"
+    VERSION = 2     # 2：跨零点的记录按天分摊
+    SAVE_ROWS = 1000
+
+    def __init__(self, log_path: Path, read_rows, read_only: bool = False):
+        self.log_path = log_path
+        self.path = log_path.with_name(log_path.name + self.SUFFIX)
+        self.read_only = read_only      # True：只在内存里汇总，不写 sidecar
+        self._read_rows = read_rows     # (offset) -> (记录列表, 读到的字节位置)
+        self._loaded = False
+        super().__init__()
+
+    def _reset(self):
+        super()._reset()
+        self.upto = 0
+        self.header_crc = None
+        self._unsaved = 0           # 累加进表、还没写进 sidecar 的记录数
+
+    def invalidate(self):
+        """
+        日志被改写过，下次 update 时从头重建。
+        """
+        self._loaded = True
+        self._reset()
+
+    def update(self, header: bytes):
+        """
+        补上 upto 之后新追加的行；表头或文件对不上就重建。
+        """
+        if not self._loaded:
+            self._load()
+            self._loaded = True
+        crc = zlib.crc32(header)
+        rebuilt = False
+        if self.header_crc != crc or not self._still_valid():
+            self._reset()
+            self.header_crc = crc
+            self.upto = len(header)
+            self._dirty = rebuilt = True
+        sessions, end = self._read_rows(self.upto)
+        if sessions:
+            self.add_many(sessions)
+            self._unsaved += len(sessions)
+            self._dirty = True
+        if end != self.upto:
+            self.upto = end
+            self._dirty = True
+        if self._dirty and (rebuilt or self._unsaved >= self.SAVE_ROWS):
+            self.save()
+
+    def record(self, sessions, size_before: int, size_after: int) -> bool:
+        """
+        写入时调用（一批记录调用一次）：如果汇总正好停在这批记录之前，
+        直接在内存里累加，不用回读文件；攒够 SAVE_ROWS 条才写一次 sidecar。
+        """
+        if not self._loaded or self.header_crc is None or self.upto != size_before:
+            return False
+        self.add_many(sessions)
+        self.upto = size_after
+        self._unsaved += len(sessions)
+        if self._unsaved >= self.SAVE_ROWS:
+            self.save()
+        return True
+
+    def flush(self):
+        """
+        把还没写进 sidecar 的累加写下去（关闭日志时调用）。
+        """
+        if self._dirty and self.header_crc is not None:
+            self.save()
+
+    def _still_valid(self) -> bool:
+        try:
+            with self.log_path.open("rb") as f:
+                f.seek(0, 2)
+                if f.tell() < self.upto:
+                    return False
+                f.seek(self.upto - 1)
+                return f.read(1) == b"\n"
+        except OSError:
+            return False
+
+    # ---------- 读写 sidecar ----------
+    def _load(self):
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            if data.get("version") != self.VERSION:
+                return
+            header_crc, upto = int(data["header_crc"]), int(data["upto"])
+            self._restore(data)
+        except (OSError, ValueError, KeyError, TypeError):
+            self._reset()
+            return
+        self.header_crc, self.upto = header_crc, upto
+
+    def _restore(self, data: dict):
+        """
+        从 sidecar 的 JSON 恢复表（子类各自的格式）。
+        """
+        self.tables = {kind: data[kind] for kind in self.KINDS}
+
+    def _dump(self) -> dict:
+        return {
+            kind: {key: {mode: [round(t[0], 4), t[1]] for mode, t in by_mode.items()}
+                   for key, by_mode in self.tables[kind].items()}
+            for kind in self.KINDS
+        }
+
+    def save(self):
+        self._dirty = False
+        self._unsaved = 0
+        if self.read_only:
+            return
+        data = {"version": self.VERSION, "header_crc": self.header_crc, "upto": self.upto}
+        data.update(self._dump())
+        try:
+            write_atomic(self.path, json.dumps(data, ensure_ascii=False,
+                                               separators=(",", ":")).encode("utf-8"))
+        except OSError:
+            pass  # 写不进去下次会从 upto 补，不影响正确性
+
+
+def main(argv):
+    from log_store import LOG_FILE, get_store
+
+    if not argv or argv[0] != "rebuild":
+        print(__doc__.strip())
+        return 1
+    path = Path(argv[1]) if len(argv) > 1 else LOG_FILE
+    if not path.exists():
+        print(f"找不到日志文件：{path}")
+        return 1
+    store = get_store(path)
+    store.rebuild_rollups()
+    print(f"✅ 已根据 {path} 重建汇总：{store.rollup_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,211 @@
+"""
+进行中的学习记录的“存档”：程序被杀、断电、Ctrl+C 按错地方时，
+下次启动还能把这段学习补记进日志。
+
+存档文件（study_log.csv.journal）只有两个定长槽位，轮流原地覆盖（pwrite），
+不重写文件也不追加；每个槽位带序号和 CRC，写到一半断电也至少有一个槽位是好的。
+
+计时中的定时存档在 Tk 主线程上跑，只写进系统缓存（进程被杀不丢），
+每隔 STUDY_JOURNAL_SYNC_INTERVAL 秒才落一次盘；开始 / 暂停 / 关窗 / 保存时立即落盘，
+断电最多丢这么一小段。
+
+命令行和悬浮窗可能同时开着，每个进程打开存档时给它加独占锁，一直拿到 close() 为止；
+被别的活着的进程占着的存档不读也不写，自己改用 study_log.csv.journal.1、.2……
+进程退出（包括被杀）锁就没了，下次谁启动谁来补记。
+"""
+import os
+import struct
+import time
+import zlib
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from file_lock import try_lock
+from log_store import LOG_FILE
+
+# 两次存档的最小间隔（秒）；开始 / 暂停 / 继续 / 关窗时不受限制，立即存档
+DEFAULT_INTERVAL = float(os.environ.get("STUDY_JOURNAL_INTERVAL", "15"))
+# 定时存档两次落盘（fdatasync）的最小间隔（秒）；立即存档时总是落盘
+DEFAULT_SYNC_INTERVAL = float(os.environ.get("STUDY_JOURNAL_SYNC_INTERVAL", "60"))
+
+# magic, 版本, 标志, 序号, 开始时间, 存档时间, 已学秒数, 倒计时总秒数, 模式, crc
+SLOT = struct.Struct("<4sHHQdddd16sI")
+MAGIC = b"STJ1"
+VERSION = 1
+
+# 最多同时开几个进程各用各的存档
+MAX_JOURNALS = 8
+
+FLAG_ACTIVE = 1     # 有一段未保存的学习
+FLAG_PAUSED = 2     # 存档时处于暂停状态
+
+# 读出来的存档内容
+JournalEntry = namedtuple("JournalEntry", ["started_at", "saved_at", "elapsed", "mode",
+                                           "countdown_total", "paused"])
+
+
+def _pwrite(fd: int, data: bytes, offset: int):
+    if hasattr(os, "pwrite"):
+        os.pwrite(fd, data, offset)
+    else:   # Windows 没有 pwrite
+        os.lseek(fd, offset, os.SEEK_SET)
+        os.write(fd, data)
+
+
+def _sync(fd: int):
+    (getattr(os, "fdatasync", None) or os.fsync)(fd)
+
+
+def _pread(fd: int, size: int, offset: int) -> bytes:
+    if hasattr(os, "pread"):
+        return os.pread(fd, size, offset)
+    os.lseek(fd, offset, os.SEEK_SET)
+    return os.read(fd, size)
+
+
+class SessionJournal:
+    """
+    计时过程中反复调用 checkpoint()：没到间隔就直接返回，到了才原地写一个几十字节的槽位。
+    保存进日志后调用 clear()。
+    """
+
+    def __init__(self, path=None, interval: float = DEFAULT_INTERVAL, fsync: bool = True,
+                 sync_interval: float = DEFAULT_SYNC_INTERVAL):
+        self.base = path or LOG_FILE.with_name(LOG_FILE.name + ".journal")
+        self.path = self.base       # 实际在用的那个，打开时才定下来
+        self.interval = interval
+        self.fsync = fsync
+        self.sync_interval = sync_interval
+        self._fd = None
+        self._seq = 0
+        self._last = None           # 上次存档的 time.monotonic()
+        self._synced = None         # 上次落盘的 time.monotonic()
+
+    def _candidates(self):
+        yield self.base
+        for i in range(1, MAX_JOURNALS):
+            yield self.base.with_name(f"{self.base.name}.{i}")
+
+    def _open(self, recover: bool = False):
+        """
+        占一个没被别的进程锁着的存档并拿住锁。recover=True（补记）时优先要里面有未保存学习的，
+        否则（要开始写）优先要空的，免得盖掉别的进程崩溃前留下的存档。全被占着时返回 None。
+        """
+        if self._fd is not None:
+            return self._fd
+        flags = os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0)
+        fallback = None
+        for path in self._candidates():
+            if recover and not os.path.exists(path):
+                continue        # 不存在的没什么可补记的，也不为此建文件
+            fd = os.open(path, flags, 0o644)
+            if not try_lock(fd):
+                os.close(fd)
+                continue
+            best = _read_slots(fd)
+            if _is_pending(best) == recover:
+                if fallback is not None:
+                    os.close(fallback[0])
+                fallback = (fd, path, best)
+                break
+            if fallback is None:
+                fallback = (fd, path, best)
+            else:
+                os.close(fd)
+        if fallback is None:
+            return None
+        self._fd, self.path, best = fallback
+        self._seq = best[0] if best else 0
+        return self._fd
+
+    # ---------- 写 ----------
+    def checkpoint(self, watch, mode: str, countdown_total: float = 0, force: bool = False) -> bool:
+        """
+        存一次档（watch 是 timing.Stopwatch）。没到间隔且不是 force 时什么都不做，返回 False。
+        force 时立即落盘，否则距上次落盘满 sync_interval 才落盘。
+        """
+        now = time.monotonic()
+        if not force and self._last is not None and now - self._last < self.interval:
+            return False
+        if watch.started_at is None:
+            return False
+        flags = FLAG_ACTIVE | (0 if watch.running else FLAG_PAUSED)
+        sync = force or self._synced is None or now - self._synced >= self.sync_interval
+        self._write(flags, watch.started_at.timestamp(), time.time(), watch.elapsed(),
+                    countdown_total, mode, sync)
+        self._last = now
+        return True
+
+    def clear(self):
+        """
+        这段学习已经保存（或放弃）了，存档标记为空，并关掉文件、放开锁（下次存档时再占）。
+        没打开过就什么都不做——不会去动别的进程的存档。
+        """
+        if self._fd is None:
+            return
+        self._write(0, 0.0, time.time(), 0.0, 0.0, "", sync=True)
+        self._last = None
+        self._synced = None
+        self.close()
+
+    def _write(self, flags, started, saved, elapsed, countdown_total, mode, sync: bool):
+        fd = self._open()
+        if fd is None:
+            return
+        self._seq += 1
+        body = SLOT.pack(MAGIC, VERSION, flags, self._seq, started, saved, elapsed,
+                         countdown_total, mode.encode("utf-8")[:16], 0)[:-4]
+        # 序号单双轮流写两个槽位，写坏的只会是正在写的那个
+        _pwrite(fd, body + struct.pack("<I", zlib.crc32(body)), (self._seq % 2) * SLOT.size)
+        if sync and self.fsync:
+            _sync(fd)
+            self._synced = time.monotonic()
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    # ---------- 读 ----------
+    def pending(self):
+        """
+        上次没保存的那段学习（JournalEntry），没有则 None。别的进程正在用的存档不算。
+        """
+        if self._fd is None and self._open(recover=True) is None:
+            return None
+        best = _read_slots(self._fd)
+        if not _is_pending(best):
+            return None
+        _, flags, started, saved, elapsed, total, mode = best
+        return JournalEntry(datetime.fromtimestamp(started), datetime.fromtimestamp(saved), elapsed,
+                            mode.rstrip(b"\0").decode("utf-8", errors="replace"), total,
+                            bool(flags & FLAG_PAUSED))
+
+
+def _read_slots(fd: int):
+    """
+    返回序号最大的完好槽位 (序号, 标志, 开始, 存档时间, 已学秒数, 倒计时总秒数, 模式)，没有则 None。
+    """
+    best = None
+    for slot in range(2):
+        data = _pread(fd, SLOT.size, slot * SLOT.size)
+        if len(data) != SLOT.size:
+            continue
+        magic, version, flags, seq, started, saved, elapsed, total, mode, crc = SLOT.unpack(data)
+        if magic != MAGIC or version != VERSION or zlib.crc32(data[:-4]) != crc:
+            continue
+        if best is None or seq > best[0]:
+            best = (seq, flags, started, saved, elapsed, total, mode)
+    return best
+
+
+def _is_pending(best) -> bool:
+    return best is not None and bool(best[1] & FLAG_ACTIVE) and best[4] > 0
+
+
+def recovered_span(entry: JournalEntry):
+    """
+    补记用的 (开始, 结束, 秒数)：只算到最后一次存档为止，之后的时间无从得知。
+    """
+    end = entry.saved_at
+    return end - timedelta(seconds=entry.elapsed), end, entry.elapsed
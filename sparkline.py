@@ -0,0 +1,183 @@
+"""
+窗口里常驻的小柱状条：今天每小时的学习分钟数 + 最近几天每天的分钟数，
+直接画在 tk.Canvas 上，不用 matplotlib。
+
+柱子在创建时画好，之后只改高度变了的那几根的坐标，不会重建画布；
+计时中每秒只有当前那根柱子可能变，几乎不占 CPU。
+"""
+import tkinter as tk
+from datetime import date, datetime, timedelta
+
+import log_writer
+from log_store import to_epoch
+from rollups import SPAN_LOOKBACK_DAYS, split_span
+
+# 每根柱子至少这么高（像素），有数据但很少时也看得见
+MIN_BAR_PX = 1
+
+
+def strip_data(store, days: int, today: date = None):
+    """
+    读出柱状条要的数据：(今天 24 个小时的分钟数, 最近 days 天每天的分钟数)。
+    和其他统计一样，跨小时 / 跨零点的记录按实际时段分摊。
+
+    会先等后台写线程把排队的记录写完，刚保存的那次学习一定算在里面。在后台线程调用。
+    """
+    today = today or date.today()
+    log_writer.flush()
+    today_str = today.isoformat()
+    hours = [0.0] * 24
+    first_hour = to_epoch(f"{today_str} 00:00:00") // 3600
+    lookback = (today - timedelta(days=SPAN_LOOKBACK_DAYS)).isoformat()
+    for s in store.sessions_between(lookback, today_str):
+        try:
+            parts = split_span(to_epoch(s.start), to_epoch(s.end), s.minutes, 3600)
+        except ValueError:
+            continue
+        for hour, minutes in parts:
+            if 0 <= hour - first_hour < 24:
+                hours[hour - first_hour] += minutes
+    dates = [(today - timedelta(days=i)).isoformat() for i in range(days - 1, -1, -1)]
+    return hours, list(store.daily_minutes(dates))
+
+
+def epoch_seconds(dt: datetime) -> int:
+    """
+    和 log_store.to_epoch 同一种换算（本地时间按 UTC 规则），两边的小时编号对得上。
+    """
+    return int((dt - datetime(1970, 1, 1)).total_seconds())
+
+
+class Sparkline:
+    """
+    画布上一排数量固定的柱子。刻度按 step 取整，超出时整体换刻度（只改坐标）。
+    """
+
+    def __init__(self, canvas, x: float, y: float, width: float, height: float, count: int,
+                 color: str, step: float = 60.0, gap: float = 1.0):
+        self.canvas = canvas
+        self.height = height
+        self.step = step
+        self.scale = step
+        self._bottom = y + height
+        self._values = [0.0] * count
+        self._tops = [self._bottom] * count     # 每根柱子当前顶端的像素位置
+        bar_w = (width - gap * (count - 1)) / count
+        self._bars = []
+        for i in range(count):
+            x0 = x + i * (bar_w + gap)
+            self._bars.append(canvas.create_rectangle(x0, self._bottom, x0 + bar_w, self._bottom,
+                                                      fill=color, width=0))
+
+    def _top(self, value: float) -> int:
+        if value <= 0:
+            return round(self._bottom)
+        px = max(MIN_BAR_PX, value / self.scale * self.height)
+        return round(self._bottom - min(px, self.height))
+
+    def update(self, values):
+        """
+        换成新的一组数，只给顶端像素变了的柱子改坐标。
+        """
+        peak = max(values, default=0.0)
+        scale = max(self.step, -(-peak // self.step) * self.step)
+        rescaled = scale != self.scale
+        self.scale = scale
+        self._values = list(values)
+        for i, value in enumerate(self._values):
+            top = self._top(value)
+            if top != self._tops[i] or rescaled:
+                self._tops[i] = top
+                x0, _, x1, _ = self.canvas.coords(self._bars[i])
+                self.canvas.coords(self._bars[i], x0, top, x1, self._bottom)
+
+    def highlight(self, index: int, color: str, normal: str):
+        """
+        把第 index 根柱子换成 color，其余恢复 normal（index 为 None 时全部恢复）。
+        """
+        for i, bar in enumerate(self._bars):
+            self.canvas.itemconfig(bar, fill=color if i == index else normal)
+
+
+class ProgressStrip:
+    """
+    左边今天 24 小时、右边最近 days 天的两排柱子，外加进行中的那次学习。
+
+    load() 放入从日志读到的数据；set_live() 每秒调用，把进行中的分钟数加到对应柱子上。
+    保存后调用 freeze() 把进行中的数值留在图上，直到重新 load() 的数据里已经包含它。
+    """
+
+    def __init__(self, parent, width: int, height: int, days: int, bg: str,
+                 color: str, current_color: str, text_color: str):
+        self.days = days
+        self.color = color
+        self.current_color = current_color
+        self.canvas = tk.Canvas(parent, width=width, height=height, bg=bg, highlightthickness=0, bd=0)
+        label_h = 11
+        bar_h = height - label_h - 2
+        gap = 10
+        hours_w = (width - gap) * 0.62
+        self.hours = Sparkline(self.canvas, 0, 1, hours_w, bar_h, 24, color, step=60.0)
+        self.daily = Sparkline(self.canvas, hours_w + gap, 1, width - hours_w - gap, bar_h, days,
+                               color, step=60.0, gap=2.0)
+        font = ("Segoe UI", 7)
+        self.canvas.create_text(0, height, text="今天（按小时）", anchor="sw", fill=text_color, font=font)
+        self.canvas.create_text(width, height, text=f"最近 {days} 天", anchor="se",
+                                fill=text_color, font=font)
+        self.today = None
+        self._base_hours = [0.0] * 24
+        self._base_daily = [0.0] * days
+        self._live = None           # (开始时间, 分钟数)
+        self._frozen = []           # 已保存、但还没出现在 load() 数据里的 [(开始时间, 分钟数)]
+        self._current = (None, None)
+
+    def load(self, data, today: date = None):
+        hours, daily = data
+        self.today = today or date.today()
+        self._base_hours = list(hours)
+        self._base_daily = list(daily)
+        self._frozen = []
+        self._redraw()
+
+    def set_live(self, start: datetime, seconds: float):
+        self._live = (start, seconds / 60.0)
+        self._redraw()
+
+    def freeze(self):
+        """
+        进行中的学习刚保存：数值先留在图上，等下次 load() 时由日志里的数据接替。
+        """
+        if self._live is not None:
+            self._frozen.append(self._live)
+            self._live = None
+
+    def clear_live(self):
+        self._live = None
+        self._redraw()
+
+    def _redraw(self):
+        if self.today is None:
+            return
+        hours = list(self._base_hours)
+        daily = list(self._base_daily)
+        extra = self._frozen + ([self._live] if self._live is not None else [])
+        first_hour = epoch_seconds(datetime.combine(self.today, datetime.min.time())) // 3600
+        for start, minutes in extra:
+            # 进行中的这段也按时段分摊：计时中只有当前小时 / 今天的柱子在涨
+            t0 = epoch_seconds(start)
+            t1 = t0 + round(minutes * 60)
+            for hour, part in split_span(t0, t1, minutes, 3600):
+                if 0 <= hour - first_hour < 24:
+                    hours[hour - first_hour] += part
+                index = (hour - first_hour) // 24 + self.days - 1
+                if 0 <= index < self.days:
+                    daily[index] += part
+        self.hours.update(hours)
+        self.daily.update(daily)
+        # 当前小时 / 今天的柱子换个颜色，跨小时时才改
+        current = (datetime.now().hour if date.today() == self.today else None, self.days - 1)
+        if current != self._current:
+            self._current = current
+            self.hours.highlight(current[0], self.current_color, self.color)
+            self.daily.highlight(current[1], self.current_color, self.color)
+
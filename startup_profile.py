@@ -0,0 +1,65 @@
+"""
+启动耗时分析：设置环境变量 STUDY_TIMER_STARTUP_PROFILE=1 后启动，
+会在标准错误里打印从启动到首帧的各个时间点，以及最慢的那些 import。
+
+必须在入口文件里最先导入，后面的 import 才统计得到。没开启时什么都不做。
+"""
+import builtins
+import os
+import sys
+import time
+
+ENABLED = bool(os.environ.get("STUDY_TIMER_STARTUP_PROFILE"))
+
+# 报告里列出最慢的几个 import
+TOP_IMPORTS = 15
+
+_T0 = time.perf_counter()
+_marks = []         # [(标签, 距启动的秒数)]
+_imports = []       # [(模块名, 嵌套深度, 耗时秒数)]，只记真正新加载的模块
+_depth = 0
+_reported = False
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    global _depth
+    if level or name in sys.modules:
+        return _original_import(name, globals, locals, fromlist, level)
+    _depth += 1
+    t0 = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        _depth -= 1
+        _imports.append((name, _depth, time.perf_counter() - t0))
+
+
+_original_import = builtins.__import__
+if ENABLED:
+    builtins.__import__ = _timed_import
+
+
+def mark(label: str):
+    """
+    记一个时间点（距本模块被导入的时间）。
+    """
+    if ENABLED:
+        _marks.append((label, time.perf_counter() - _T0))
+
+
+def report(file=None):
+    """
+    打印时间点和最慢的 import，只打印一次；之后不再统计 import。
+    """
+    global _reported
+    if not ENABLED or _reported:
+        return
+    _reported = True
+    builtins.__import__ = _original_import
+    out = file or sys.stderr
+    print("====== 启动耗时 ======", file=out)
+    for label, t in _marks:
+        print(f"{t * 1000:9.1f} ms  {label}", file=out)
+    print(f"------ 最慢的 {TOP_IMPORTS} 个 import（含其依赖）------", file=out)
+    for name, depth, seconds in sorted(_imports, key=lambda item: -item[2])[:TOP_IMPORTS]:
+        print(f"{seconds * 1000:9.1f} ms  {'  ' * depth}{name}", file=out)
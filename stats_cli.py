@@ -0,0 +1,130 @@
+"""
+不需要界面的统计命令行：给定日期区间，按天 / 周 / 月 / 模式 / 小时汇总，
+逐行输出 CSV 或 JSON，适合 cron、脚本和管道。不会导入 tkinter 和 matplotlib，
+日志只读打开，不会在旁边建锁文件或 sidecar。
+
+用法：
+    python stats_cli.py stats                                   # 最近 7 天，按天，CSV
+    python stats_cli.py stats --from 2025-09-01 --to 2025-12-31 --group-by week --format json
+    python stats_cli.py stats --days 30 --group-by mode --format jsonl
+    python stats_cli.py stats --group-by hour --log logs
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from datetime import date, timedelta
+
+from log_store import LOG_FILE, open_store
+from rollups import period_keys
+
+GROUPS = ("day", "week", "month", "mode", "hour")
+FORMATS = ("csv", "json", "jsonl")
+
+
+def iter_days(from_date: str, to_date: str):
+    day = date.fromisoformat(from_date)
+    last = date.fromisoformat(to_date)
+    while day <= last:
+        yield day.isoformat()
+        day += timedelta(days=1)
+
+
+def iter_rows(store, from_date: str, to_date: str, group_by: str):
+    """
+    逐行产生汇总结果（dict）。按天 / 周 / 月直接查预聚合统计，不用读整个日志；
+    按周 / 月时区间两头不满的周期只算区间内的那几天。
+    """
+    if group_by == "hour":
+        from aggregate import get_engine    # 按小时要看开始时间，只有列式引擎有
+        for hour, minutes in enumerate(get_engine(store).hourly(from_date, to_date)):
+            yield {"hour": hour, "minutes": round(minutes, 2)}
+        return
+    if group_by == "mode":
+        totals = {}
+        for d in iter_days(from_date, to_date):
+            for mode, minutes in store.period_by_mode("day", d).items():
+                totals[mode] = totals.get(mode, 0.0) + minutes
+        for mode in sorted(totals):
+            yield {"mode": mode, "minutes": round(totals[mode], 2)}
+        return
+
+    index = {"day": 0, "week": 1, "month": 2}[group_by]
+    key, minutes, sessions = None, 0.0, 0
+    for d in iter_days(from_date, to_date):
+        k = period_keys(d)[index]
+        if k != key and key is not None:
+            yield {group_by: key, "minutes": round(minutes, 2), "sessions": sessions}
+            minutes, sessions = 0.0, 0
+        key = k
+        m, c = store.day_total(d)
+        minutes += m
+        sessions += c
+    if key is not None:
+        yield {group_by: key, "minutes": round(minutes, 2), "sessions": sessions}
+
+
+def write_rows(rows, fmt: str, out):
+    """
+    边算边写：CSV 第一行写表头，json 输出一个 JSON 数组（每个元素一行），jsonl 每行一个对象。
+    """
+    if fmt == "csv":
+        writer = None
+        for row in rows:
+            if writer is None:
+                writer = csv.DictWriter(out, fieldnames=list(row), lineterminator="\n")
+                writer.writeheader()
+            writer.writerow(row)
+    elif fmt == "jsonl":
+        for row in rows:
+            out.write(json.dumps(row, ensure_ascii=False) + "\n")
+    else:
+        out.write("[")
+        sep = "\n"
+        for row in rows:
+            out.write(sep + json.dumps(row, ensure_ascii=False))
+            sep = ",\n"
+        out.write("\n]\n")
+
+
+def valid_date(text: str) -> str:
+    try:
+        return date.fromisoformat(text).isoformat()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"日期格式应为 YYYY-MM-DD：{text}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    stats = commands.add_parser("stats", help="按区间汇总学习时长")
+    stats.add_argument("--from", dest="from_date", type=valid_date, help="起始日期（含），默认 --days 天前")
+    stats.add_argument("--to", dest="to_date", type=valid_date, help="结束日期（含），默认今天")
+    stats.add_argument("--days", type=int, default=7, help="没给 --from 时统计最近几天（默认 7）")
+    stats.add_argument("--group-by", choices=GROUPS, default="day")
+    stats.add_argument("--format", choices=FORMATS, default="csv")
+    stats.add_argument("--log", help="日志路径（默认 STUDY_LOG_FILE 或 study_log.csv）")
+    args = parser.parse_args(argv)
+
+    to_date = args.to_date or date.today().isoformat()
+    from_date = args.from_date or (date.fromisoformat(to_date) - timedelta(days=args.days - 1)).isoformat()
+    if from_date > to_date:
+        parser.error("--from 不能晚于 --to")
+
+    # 只读打开：查询不在日志旁边留下 .lock / .idx / .rollup.json
+    store = open_store(args.log or LOG_FILE, read_only=True)
+    try:
+        write_rows(iter_rows(store, from_date, to_date, args.group_by), args.format, sys.stdout)
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # 输出被 head 之类提前关掉了：按 Python 文档的做法把 stdout 指到 devnull，
+        # 免得退出时再 flush 一次又报 BrokenPipeError
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        sys.exit(1)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
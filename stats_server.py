@@ -0,0 +1,284 @@
+"""
+本机统计服务：只监听 127.0.0.1，用标准库 asyncio 提供几个 HTTP/JSON 接口，
+给看板之类的程序轮询。数据和 summarize_today / summarize_recent 同一个口径。
+
+日志只在启动时整体载入一次，之后由后台任务每 REFRESH_INTERVAL 秒在线程池里
+检查一下有没有新追加的记录并增量并入，事件循环本身从不碰日志文件；算好的 JSON 按 (接口, 参数, 数据版本) 缓存，
+日志没变时同样的请求直接返回缓存，不会重新解析或汇总。
+
+接口：
+    GET /today                      今天的总时长、次数、按模式
+    GET /recent?days=7              最近 N 天每天的时长 + 按模式 + 合计
+    GET /modes?from=...&to=...      区间内按模式（也可以用 days=N）
+    GET /health                     存活检查和缓存命中情况
+
+用法：
+    python stats_server.py                   # 默认端口 8765
+    python stats_server.py --port 9000 --log logs
+"""
+import argparse
+import asyncio
+import json
+import sys
+from collections import OrderedDict
+from datetime import date, timedelta
+from urllib.parse import parse_qs, urlsplit
+
+from log_store import get_store, open_store
+
+HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# 两次检查日志有没有变化之间隔多久（秒）
+REFRESH_INTERVAL = 0.5
+# 最多缓存多少个不同的响应
+CACHE_SIZE = 256
+# /recent 最多查多少天
+MAX_DAYS = 3660
+# 请求头最长多少字节
+MAX_HEADER = 16 * 1024
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           500: "Internal Server Error"}
+
+
+class BadRequest(ValueError):
+    pass
+
+
+class StatsCache:
+    """
+    汇总引擎 + 响应缓存。数据版本由引擎的 version() 和今天的日期组成，
+    日志追加了记录或者过了零点，旧的缓存自然就不会再被命中。
+    """
+
+    def __init__(self, store):
+        from aggregate import get_engine    # 里面会导入 numpy
+        self.store = store
+        self.engine = get_engine(store)
+        self.hits = 0
+        self.misses = 0
+        self._responses = OrderedDict()
+        self._version = None
+
+    def poll(self):
+        """
+        去碰日志，把新追加的记录并入引擎，更新数据版本。会读文件，要放在线程池里跑。
+        """
+        self._version = self.engine.version()
+
+    def version(self):
+        """
+        最近一次 poll() 得到的版本，不碰日志，可以直接在事件循环里调用。
+        """
+        return self._version, date.today().isoformat()
+
+    def cached(self, version, key):
+        body = self._responses.get((version, key))
+        if body is not None:
+            self._responses.move_to_end((version, key))
+            self.hits += 1
+        return body
+
+    def remember(self, version, key, body: bytes):
+        self.misses += 1
+        self._responses[(version, key)] = body
+        while len(self._responses) > CACHE_SIZE:
+            self._responses.popitem(last=False)
+
+    # ---------- 各接口的数据 ----------
+    def today(self):
+        today = date.today().isoformat()
+        minutes, count = self.engine.total(today, today)
+        return {"date": today, "minutes": round(minutes, 2), "sessions": count,
+                "by_mode": rounded(self.engine.by_mode(today, today))}
+
+    def recent(self, days: int):
+        to_date = date.today()
+        from_date = (to_date - timedelta(days=days - 1)).isoformat()
+        daily = self.engine.daily(from_date, to_date.isoformat())
+        minutes, count = self.engine.total(from_date, to_date.isoformat())
+        return {"from": from_date, "to": to_date.isoformat(),
+                "daily": [{"date": d, "minutes": round(v, 2)} for d, v in daily],
+                "by_mode": rounded(self.engine.by_mode(from_date, to_date.isoformat())),
+                "minutes": round(minutes, 2), "sessions": count}
+
+    def modes(self, from_date: str, to_date: str):
+        return {"from": from_date, "to": to_date,
+                "by_mode": rounded(self.engine.by_mode(from_date, to_date))}
+
+
+def rounded(by_mode: dict) -> dict:
+    return {mode: round(v, 2) for mode, v in sorted(by_mode.items())}
+
+
+def int_param(query, name: str, default: int, lo: int, hi: int) -> int:
+    try:
+        value = int(query.get(name, [default])[0])
+    except ValueError:
+        raise BadRequest(f"{name} 应该是整数")
+    if not lo <= value <= hi:
+        raise BadRequest(f"{name} 应在 {lo} ~ {hi} 之间")
+    return value
+
+
+def date_param(query, name: str) -> str:
+    try:
+        return date.fromisoformat(query[name][0]).isoformat()
+    except (KeyError, ValueError):
+        raise BadRequest(f"{name} 应为 YYYY-MM-DD")
+
+
+def route(cache: StatsCache, path: str, query):
+    """
+    路径 + 参数 -> (缓存键, 计算函数)。计算函数在线程池里跑。
+    """
+    if path == "/today":
+        return ("today",), cache.today
+    if path == "/recent":
+        days = int_param(query, "days", 7, 1, MAX_DAYS)
+        return ("recent", days), lambda: cache.recent(days)
+    if path == "/modes":
+        if "from" in query or "to" in query:
+            from_date, to_date = date_param(query, "from"), date_param(query, "to")
+            if from_date > to_date:
+                raise BadRequest("from 不能晚于 to")
+        else:
+            days = int_param(query, "days", 7, 1, MAX_DAYS)
+            to_date = date.today().isoformat()
+            from_date = (date.today() - timedelta(days=days - 1)).isoformat()
+        return ("modes", from_date, to_date), lambda: cache.modes(from_date, to_date)
+    return None, None
+
+
+# ================== HTTP ==================
+
+def response(status: int, body: bytes, keep_alive: bool) -> bytes:
+    head = (f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode("ascii") + body
+
+
+def error_body(message: str) -> bytes:
+    return json.dumps({"error": message}, ensure_ascii=False).encode("utf-8")
+
+
+class StatsServer:
+    def __init__(self, cache: StatsCache):
+        self.cache = cache
+        self._lock = asyncio.Lock()     # 引擎不是为并发查询设计的，未命中的计算排队做
+
+    async def handle(self, method: str, target: str):
+        """
+        返回 (状态码, 响应体)。
+        """
+        if method != "GET":
+            return 405, error_body("只支持 GET")
+        url = urlsplit(target)
+        query = parse_qs(url.query)
+        if url.path == "/health":
+            return 200, json.dumps({"ok": True, "hits": self.cache.hits,
+                                    "misses": self.cache.misses}).encode("utf-8")
+        try:
+            key, compute = route(self.cache, url.path, query)
+        except BadRequest as e:
+            return 400, error_body(str(e))
+        if key is None:
+            return 404, error_body(f"没有这个接口：{url.path}")
+
+        version = self.cache.version()
+        body = self.cache.cached(version, key)
+        if body is None:
+            async with self._lock:
+                body = self.cache.cached(version, key)     # 排队期间别人可能已经算好了
+                if body is None:
+                    data = await asyncio.get_running_loop().run_in_executor(None, compute)
+                    body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+                    self.cache.remember(version, key, body)
+        return 200, body
+
+    async def serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    writer.write(response(400, error_body("请求头太长"), False))
+                    break
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ")
+                except ValueError:
+                    writer.write(response(400, error_body("请求行格式不对"), False))
+                    break
+                headers = {k.strip().lower(): v.strip()
+                           for k, _, v in (line.partition(":") for line in lines[1:] if line)}
+                keep_alive = (headers.get("connection", "").lower() != "close"
+                              if version == "HTTP/1.1" else headers.get("connection", "").lower() == "keep-alive")
+                try:
+                    status, body = await self.handle(method, target)
+                except Exception as e:      # 单个请求出错不影响服务
+                    status, body = 500, error_body(str(e))
+                writer.write(response(status, body, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+
+async def watch_log(cache: StatsCache):
+    """
+    后台任务：每 REFRESH_INTERVAL 秒在线程池里 poll 一次。出错只打印，下一轮再试。
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(REFRESH_INTERVAL)
+        try:
+            await loop.run_in_executor(None, cache.poll)
+        except Exception as e:
+            print(f"⚠️ 检查日志失败：{e}", file=sys.stderr)
+
+
+async def serve(store, port: int = DEFAULT_PORT, ready=None):
+    """
+    启动服务直到被取消。先在线程池里把日志载入引擎，再开始监听。
+    """
+    cache = StatsCache(store)
+    await asyncio.get_running_loop().run_in_executor(None, cache.poll)
+    watcher = asyncio.create_task(watch_log(cache))
+    server = StatsServer(cache)
+    try:
+        listener = await asyncio.start_server(server.serve_client, HOST, port, limit=MAX_HEADER)
+        if ready is not None:
+            ready(listener.sockets[0].getsockname()[1])
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        watcher.cancel()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"端口（默认 {DEFAULT_PORT}，0 表示随便挑一个）")
+    parser.add_argument("--log", help="日志路径（默认 STUDY_LOG_FILE 或 study_log.csv）")
+    args = parser.parse_args(argv)
+
+    store = open_store(args.log) if args.log else get_store()
+
+    def ready(port):
+        print(f"✅ 统计服务已启动：http://{HOST}:{port}/today", flush=True)
+
+    try:
+        asyncio.run(serve(store, args.port, ready))
+    except KeyboardInterrupt:
+        print("👋 统计服务已停止")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
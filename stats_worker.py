@@ -0,0 +1,80 @@
+"""
+后台统计线程：解析日志、汇总、画图都放到工作线程里做，
+Tk 主线程只负责显示，计时器刷新不会被卡住。
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+
+class StatsWorker:
+    """
+    把耗时任务交给单个后台线程执行，结果通过 root.after 轮询拿回主线程再回调。
+
+    Tk 不是线程安全的，工作线程里绝不碰任何控件；回调一定在主线程里执行。
+    """
+
+    def __init__(self, root, poll_ms: int = 50):
+        self.root = root
+        self.poll_ms = poll_ms
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="stats")
+        self._pending = []          # [(future, on_done, on_error), ...]
+        self._polling = False
+        self._closed = False
+
+    def submit(self, fn, *args, on_done, on_error=None):
+        """
+        在后台执行 fn(*args)，完成后在主线程调用 on_done(结果) 或 on_error(异常)。
+        """
+        if self._closed:
+            return
+        future = self._executor.submit(fn, *args)
+        self._pending.append((future, on_done, on_error))
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_ms, self._poll)
+
+    def busy(self) -> bool:
+        return bool(self._pending)
+
+    def _poll(self):
+        if self._closed:
+            return
+        still_pending = []
+        finished = []
+        for item in self._pending:
+            (finished if item[0].done() else still_pending).append(item)
+        self._pending = still_pending
+        try:
+            for future, on_done, on_error in finished:
+                self._deliver(future, on_done, on_error)
+        finally:
+            if self._pending and not self._closed:
+                self.root.after(self.poll_ms, self._poll)
+            else:
+                self._polling = False
+
+    def _deliver(self, future, on_done, on_error):
+        """
+        调用一个任务的回调。回调自己出错（比如 PhotoImage 解码失败）时交给 on_error，
+        on_error 也出错就走 Tk 的 report_callback_exception，不让它打断后面的结果。
+        """
+        error = future.exception()
+        try:
+            if error is None:
+                on_done(future.result())
+                return
+        except Exception as exc:
+            error = exc
+        try:
+            if on_error is None:
+                raise error
+            on_error(error)
+        except Exception as exc:
+            self.root.report_callback_exception(type(exc), exc, exc.__traceback__)
+
+    def shutdown(self):
+        """
+        关窗时调用：丢掉还没开始的任务，不等正在跑的任务。
+        """
+        self._closed = True
+        self._pending = []
+        self._executor.shutdown(wait=False, cancel_futures=True)
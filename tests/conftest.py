@@ -0,0 +1,23 @@
+"""
+测试直接导入仓库根目录下的模块；日志都写在 tmp_path 里，不碰真正的 study_log.csv。
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+HEADER_LINE = "start_time,end_time,duration_minutes,mode,note\n"
+
+
+@pytest.fixture
+def write_csv(tmp_path):
+    """
+    write_csv(行, ...) -> 路径：写一份带表头的 CSV 日志，每行是一个已经拼好的字符串。
+    """
+    def write(*rows, name="study_log.csv"):
+        path = tmp_path / name
+        path.write_text(HEADER_LINE + "".join(row + "\n" for row in rows), encoding="utf-8")
+        return path
+    return write
@@ -0,0 +1,76 @@
+import pytest
+
+import aggregate
+from log_sqlite import import_csv
+from log_store import open_store
+
+
+@pytest.fixture(params=["numpy", "pure"])
+def engine_module(request, monkeypatch):
+    if request.param == "pure":
+        monkeypatch.setattr(aggregate, "np", None)
+    elif aggregate.np is None:
+        pytest.skip("没装 NumPy")
+    return aggregate
+
+
+def test_unparsable_row_is_not_reloaded(engine_module, write_csv):
+    path = write_csv("2025-12-07 10:00:00,2025-12-07 10:07:00,7.0,countup,",
+                     "2025-12-07 11:00:00,oops,7.0,countup,")
+    engine = engine_module.AggregationEngine(open_store(path))
+    for _ in range(3):
+        assert engine.daily("2025-12-07", "2025-12-07") == [("2025-12-07", 7.0)]
+    assert engine.rows == 2
+    assert len(engine) == 1
+
+
+def test_rows_after_a_bad_row_are_still_loaded(engine_module, write_csv):
+    path = write_csv("2025-12-07 10:00:00,oops,7.0,countup,")
+    store = open_store(path)
+    engine = engine_module.AggregationEngine(store)
+    assert engine.total("2025-12-07", "2025-12-07") == (0.0, 0)
+    with path.open("a", encoding="utf-8") as f:
+        f.write("2025-12-07 12:00:00,2025-12-07 12:30:00,30.0,countdown,\n")
+    assert engine.total("2025-12-07", "2025-12-07") == (30.0, 1)
+    assert engine.by_mode("2025-12-07", "2025-12-07") == {"countdown": 30.0}
+
+
+def test_date_only_row_is_dropped_on_both_paths(engine_module, write_csv):
+    path = write_csv("2026-10-13 09:00:00,2026-10-13 09:30:00,30.0,countup,",
+                     "2026-10-13,2026-10-13,5.0,countup,",
+                     "2026-10-13 11:00:00,2026-10-13 11:20:00,20.0,countdown,")
+    engine = engine_module.AggregationEngine(open_store(path))
+    assert engine.total("2026-10-13", "2026-10-13") == (50.0, 2)
+    assert engine.rows == 3
+
+
+def test_sqlite_engine_queries_only_the_range_and_matches_csv(engine_module, write_csv, monkeypatch):
+    path = write_csv("2026-02-26 08:00:00,2026-02-26 09:00:00,60.0,countup,",
+                     "2026-02-28 23:00:00,2026-03-01 01:00:00,120.0,countdown,",
+                     "2026-03-01 14:00:00,2026-03-01 14:25:00,25.0,countup,")
+    import_csv(path, path.with_name("study_log.db"))
+    store = open_store(path.with_name("study_log.db"))
+    engine = engine_module.get_engine(store)
+    assert isinstance(engine, engine_module.RangeEngine)
+    assert engine_module.get_engine(store) is engine
+
+    asked = []
+    between = store.sessions_between
+    monkeypatch.setattr(store, "sessions_between", lambda lo, hi: asked.append((lo, hi)) or between(lo, hi))
+    reference = engine_module.AggregationEngine(open_store(path))
+    for name in ("daily", "weekly", "hourly", "by_mode", "total"):
+        assert getattr(engine, name)("2026-03-01", "2026-03-07") == \
+            getattr(reference, name)("2026-03-01", "2026-03-07"), name
+    assert set(asked) == {("2026-02-27", "2026-03-07")}
+
+
+def test_far_off_years_do_not_blow_up_the_hour_buckets(engine_module, write_csv):
+    path = write_csv("2026-03-01 09:00:00,2026-03-01 10:00:00,60.0,countup,",
+                     "2206-03-01 23:30:00,2206-03-02 00:30:00,60.0,countdown,",
+                     "2026-03-02 08:00:00,9999-03-02 08:30:00,30.0,countup,")
+    engine = engine_module.AggregationEngine(open_store(path))
+    assert engine.daily("2026-03-01", "2026-03-02") == [("2026-03-01", 60.0), ("2026-03-02", 30.0)]
+    assert engine.daily("2206-03-01", "2206-03-02") == [("2206-03-01", 30.0), ("2206-03-02", 30.0)]
+    assert engine.by_mode("2206-03-01", "2206-03-01") == {"countdown": 30.0}
+    assert engine.hourly("2026-03-02", "2026-03-02")[8] == 30.0
+    assert engine.buckets.hours <= 48
@@ -0,0 +1,63 @@
+import pytest
+
+import charts
+from charts import ChartCache
+
+LABELS = ["2026-10-01", "2026-10-02", "2026-10-03"]
+
+
+@pytest.fixture
+def rendered(monkeypatch):
+    """
+    换掉真正的画图，只记下每次画了什么；没装 matplotlib 也能跑。
+    """
+    calls = []
+
+    def fake_render(labels, values, title, **kwargs):
+        calls.append((list(values), title))
+        return f"png-{len(calls)}".encode()
+
+    monkeypatch.setattr(charts, "Figure", object)
+    monkeypatch.setattr(charts, "render_line_chart", fake_render)
+    monkeypatch.setattr(charts, "_cache", ChartCache(maxsize=2))
+    return calls
+
+
+def chart(values, from_date="2026-10-01", title="最近 3 天"):
+    return charts.cached_line_chart(from_date, "2026-10-03", "day", LABELS, values, title)
+
+
+def test_hit_skips_rendering(rendered):
+    first = chart([30, 0, 45])
+    second = chart([30, 0, 45])
+    assert second is first
+    assert rendered == [([30, 0, 45], "最近 3 天")]
+    assert (charts._cache.hits, charts._cache.misses) == (1, 1)
+
+
+def test_changed_data_misses(rendered):
+    first = chart([30, 0, 45])
+    second = chart([30, 25, 45])
+    assert second != first
+    assert [values for values, _ in rendered] == [[30, 0, 45], [30, 25, 45]]
+    chart([30, 25, 45], title="另一个标题")
+    assert len(rendered) == 3
+
+
+def test_least_recently_used_chart_is_evicted_at_capacity(rendered):
+    chart([1, 2, 3], from_date="2026-09-01")
+    chart([4, 5, 6], from_date="2026-09-02")
+    chart([1, 2, 3], from_date="2026-09-01")     # 用过一次，变成最近用的
+    chart([7, 8, 9], from_date="2026-09-03")     # 超过 2 张，淘汰 09-02
+    assert len(charts._cache) == 2
+    assert len(rendered) == 3
+    chart([1, 2, 3], from_date="2026-09-01")
+    assert len(rendered) == 3
+    chart([4, 5, 6], from_date="2026-09-02")
+    assert len(rendered) == 4
+
+
+def test_no_matplotlib_returns_none(monkeypatch):
+    monkeypatch.setattr(charts, "Figure", None)
+    assert chart([1, 2, 3]) is None
+    assert charts.render_line_chart(LABELS, [1, 2, 3], "标题") is None
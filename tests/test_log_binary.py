@@ -0,0 +1,56 @@
+from datetime import datetime
+
+import pytest
+
+from log_binary import FILE_HEADER, RECORD, BinaryLogStore, binary_to_csv, csv_to_binary, main
+from log_store import open_store
+
+
+def test_append_after_a_torn_record_stays_aligned(tmp_path):
+    path = tmp_path / "study_log.bin"
+    store = BinaryLogStore(path)
+    store.append(datetime(2026, 3, 1, 9), datetime(2026, 3, 1, 10), 3600, "countup", "高数")
+    # 另一个进程写到一半被杀
+    with path.open("ab") as f:
+        f.write(b"\x01" * (RECORD.size // 2))
+
+    store.append(datetime(2026, 3, 2, 9), datetime(2026, 3, 2, 9, 30), 1800, "countdown", "英语")
+    assert path.stat().st_size == FILE_HEADER.size + 2 * RECORD.size
+    assert (tmp_path / "study_log.bin.torn").read_bytes() == b"\x01" * (RECORD.size // 2)
+
+    reopened = BinaryLogStore(path)
+    assert [(s.minutes, s.mode, s.note) for s in reopened.sessions()] == [
+        (60.0, "countup", "高数"), (30.0, "countdown", "英语")]
+    assert reopened.day_total("2026-03-02") == (30.0, 1)
+
+
+def test_csv_to_bin_to_csv_is_byte_identical(tmp_path):
+    source = tmp_path / "study_log.csv"
+    store = open_store(source)
+    store.append(datetime(2026, 3, 1, 9), datetime(2026, 3, 1, 10, 0, 7), 3607, "countup", "高数")
+    store.append(datetime(2026, 3, 1, 23), datetime(2026, 3, 2, 1), 7200, "pomodoro", "带,逗号的\n备注")
+    store.append(datetime(2026, 3, 2, 8), datetime(2026, 3, 2, 8, 20), 1200, "countdown", "")
+    store.close()
+
+    assert csv_to_binary(source, tmp_path / "study_log.bin") == (3, 0)
+    assert binary_to_csv(tmp_path / "study_log.bin", tmp_path / "back.csv") == 3
+    assert (tmp_path / "back.csv").read_bytes() == source.read_bytes()
+
+
+@pytest.mark.parametrize("bad", [
+    "2026-03-01,2026-03-01,5.0,countup,",                              # 只有日期
+    "2026-03-01 09:00:00,2026-03-01 09:05:00,5,countup,",               # 分钟数不是 save_log 的写法
+    "2026-03-01 09:00:00,2026-03-01 09:05:00,5.0,countup,备注,多一列",
+    "2026-03-01 09:00:00,2026-03-01 09:05:00,5.0",
+])
+def test_rows_that_cannot_round_trip_are_reported(write_csv, bad, capsys):
+    path = write_csv("2026-03-01 08:00:00,2026-03-01 08:30:00,30.0,countup,", bad)
+    target = path.with_name("study_log.bin")
+    with pytest.raises(ValueError, match="第 3 行"):
+        csv_to_binary(path, target)
+    assert not target.exists()
+    assert main(["to-bin", str(path), str(target)]) == 1
+    assert "--skip-bad" in capsys.readouterr().out
+
+    assert main(["to-bin", str(path), str(target), "--skip-bad"]) == 0
+    assert [s.minutes for s in BinaryLogStore(target).sessions()] == [30.0]
@@ -0,0 +1,80 @@
+import stat
+from datetime import date, datetime
+
+import pytest
+
+from log_partitioned import PartitionedLogStore, is_sealed, seal_partitions, split_log
+
+ROWS = [
+    "2026-01-05 09:00:00,2026-01-05 10:00:00,60.0,countup,高数",
+    "2026-01-20 20:00:00,2026-01-20 20:30:00,30.0,countdown,英语",
+    "2026-02-03 08:00:00,2026-02-03 08:25:00,25.0,pomodoro,物理",
+    "2026-04-10 14:00:00,2026-04-10 14:45:00,45.0,countup,",
+]
+
+
+@pytest.fixture
+def parts(write_csv, tmp_path):
+    split_log(write_csv(*ROWS), tmp_path / "parts")
+    return tmp_path / "parts"
+
+
+def test_split_log_writes_one_partition_per_month(write_csv, tmp_path):
+    source = write_csv(*ROWS, "坏掉的一行")
+    counts = split_log(source, tmp_path / "parts")
+    assert counts == {"2026-01": 2, "2026-02": 1, "2026-04": 1}
+    assert sorted(p.name for p in (tmp_path / "parts").iterdir()) == [
+        "2026-01.csv", "2026-02.csv", "2026-04.csv"]
+    jan = (tmp_path / "parts" / "2026-01.csv").read_text(encoding="utf-8").splitlines()
+    assert jan[1:] == ROWS[:2]
+    with pytest.raises(FileExistsError):
+        split_log(source, tmp_path / "parts")
+
+
+def test_seal_marks_months_before_last_month_read_only(parts):
+    assert seal_partitions(parts, today=date(2026, 3, 15)) == ["2026-01"]
+    assert is_sealed(parts / "2026-01.csv")
+    assert not (parts / "2026-01.csv").stat().st_mode & (stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH)
+    assert not is_sealed(parts / "2026-02.csv")
+    assert not is_sealed(parts / "2026-04.csv")
+
+
+def test_late_rows_for_sealed_month_go_to_the_late_partition(parts):
+    seal_partitions(parts, today=date(2026, 3, 15))
+    sealed_before = (parts / "2026-01.csv").read_bytes()
+    store = PartitionedLogStore(parts)
+    store.refresh()
+    generation = store.generation
+
+    store.append(datetime(2026, 1, 6, 9), datetime(2026, 1, 6, 9, 50), 3000, "countup", "补记")
+    store.append(datetime(2026, 4, 11, 9), datetime(2026, 4, 11, 9, 10), 600, "countup", "新的")
+    store.append_many([], sync=True)
+
+    # seal 过的文件一个字节都没变，权限也还是只读
+    assert (parts / "2026-01.csv").read_bytes() == sealed_before
+    assert is_sealed(parts / "2026-01.csv")
+    late = (parts / "2026-01.late.csv").read_text(encoding="utf-8").splitlines()
+    assert late[1:] == ["2026-01-06 09:00:00,2026-01-06 09:50:00,50.0,countup,补记"]
+    assert not is_sealed(parts / "2026-01.late.csv")
+    assert (parts / "2026-04.csv").read_text(encoding="utf-8").splitlines()[-1].endswith("新的")
+
+    # 补记的分区在那个月之后、下个月之前，全局编号从它开始往后挪
+    assert [s.note for s in store.sessions()] == ["高数", "英语", "补记", "物理", "", "新的"]
+    assert store.period_total("month", "2026-01") == (140.0, 3)
+    assert store.day_total("2026-01-06") == (50.0, 1)
+    assert [s.note for s in store.sessions_between("2026-01-01", "2026-01-31")] == ["高数", "英语", "补记"]
+    # 中间的分区变了，之前按编号缓存的结果都要作废
+    store.refresh()
+    assert store.generation == generation + 1
+    store.close()
+
+
+def test_appending_to_the_newest_partition_keeps_the_generation(parts):
+    store = PartitionedLogStore(parts)
+    store.refresh()
+    generation = store.generation
+    store.append(datetime(2026, 4, 12, 9), datetime(2026, 4, 12, 9, 30), 1800, "countup", "新的")
+    store.refresh()
+    assert store.generation == generation
+    assert [s.note for s in store.sessions_since(4)] == ["新的"]
+    store.close()
@@ -0,0 +1,99 @@
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from log_binary import csv_to_binary
+from log_partitioned import split_log
+from log_sqlite import import_csv
+from log_store import open_store
+
+ROWS = [
+    "2026-02-27 09:00:00,2026-02-27 10:30:00,90.0,countup,高数",
+    "2026-02-28 23:00:00,2026-03-01 01:00:00,120.0,countdown,跨月熬夜",
+    "2026-03-01 14:00:00,2026-03-01 14:25:00,25.0,pomodoro,\"带,逗号的备注\"",
+    "2026-03-09 08:00:00,2026-03-09 08:40:00,40.0,countup,",
+]
+
+
+def test_append_after_a_partial_line_keeps_both_rows(write_csv):
+    path = write_csv(ROWS[0])
+    # 另一个进程写到一半被杀
+    with path.open("ab") as f:
+        f.write(b"2026-02-27 11:00:00,2026-02-27 1")
+    store = open_store(path)
+
+    store.append(datetime(2026, 2, 27, 12), datetime(2026, 2, 27, 12, 30), 1800, "countup", "补")
+
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert lines[1:] == [ROWS[0], "2026-02-27 12:00:00,2026-02-27 12:30:00,30.0,countup,补"]
+    assert (path.parent / "study_log.csv.torn").read_bytes() == b"2026-02-27 11:00:00,2026-02-27 1\n"
+    assert store.day_total("2026-02-27") == (120.0, 2)
+    assert open_store(path).day_total("2026-02-27") == (120.0, 2)
+
+
+def test_rows_appended_by_another_process_are_picked_up(write_csv):
+    path = write_csv(ROWS[0])
+    store = open_store(path)
+    assert len(store.sessions()) == 1
+    with path.open("a", encoding="utf-8") as f:
+        f.write(ROWS[3] + "\n")
+    assert [s.minutes for s in store.sessions()] == [90.0, 40.0]
+    assert store.day_total("2026-03-09") == (40.0, 1)
+
+
+def test_malformed_rows_are_skipped(write_csv):
+    path = write_csv(
+        ROWS[0],
+        "2026-02-27 11:00:00,2026-02-27 11:10:00,abc,countup,时长不是数",
+        "2026-02-27 12:00:00",
+        "",
+        "oops,2026-02-27 13:00:00,5.0,countup,开始时间不对",
+        ROWS[3],
+    )
+    store = open_store(path)
+    assert [s.note for s in store.sessions()] == ["高数", "开始时间不对", ""]
+    assert store.day_total("2026-02-27") == (90.0, 1)
+    assert store.period_total("month", "2026-03") == (40.0, 1)
+    store.append(datetime(2026, 3, 9, 9), datetime(2026, 3, 9, 9, 20), 1200, "countup", "")
+    assert store.day_total("2026-03-09") == (60.0, 2)
+
+
+def convert(source, backend):
+    if backend == "csv":
+        return source
+    if backend == "bin":
+        target = source.with_name("study_log.bin")
+        csv_to_binary(source, target)
+    elif backend == "db":
+        target = source.with_name("study_log.db")
+        import_csv(source, target)
+    else:
+        target = source.with_name("logs")
+        split_log(source, target)
+    return target
+
+
+@pytest.mark.parametrize("backend", ["csv", "bin", "db", "partitioned"])
+def test_backends_agree(write_csv, backend):
+    reference = open_store(write_csv(*ROWS))
+    store = open_store(convert(reference.path, backend))
+    store.append(datetime(2026, 3, 9, 20), datetime(2026, 3, 9, 21), 3600, "countdown", "晚自习")
+    reference.append(datetime(2026, 3, 9, 20), datetime(2026, 3, 9, 21), 3600, "countdown", "晚自习")
+
+    assert sorted(store.sessions()) == sorted(reference.sessions())
+    assert store.sessions_between("2026-03-01", "2026-03-09") == reference.sessions_between("2026-03-01", "2026-03-09")
+    days = ["2026-02-27", "2026-02-28", "2026-03-01", "2026-03-02", "2026-03-09"]
+    assert store.daily_minutes(days) == reference.daily_minutes(days)
+    for kind, key in [("day", "2026-02-28"), ("day", "2026-03-01"), ("week", "2026-W09"),
+                      ("week", "2026-W11"), ("month", "2026-02"), ("month", "2026-03")]:
+        assert store.period_total(kind, key) == reference.period_total(kind, key), (kind, key)
+        assert store.period_by_mode(kind, key) == reference.period_by_mode(kind, key), (kind, key)
+
+
+def test_concurrent_appends_from_several_processes(monkeypatch):
+    monkeypatch.syspath_prepend(str(Path(__file__).resolve().parent.parent / "benchmarks"))
+    import stress_append
+
+    result = stress_append.run(procs=4, rows=60, batch=7, torn=True)
+    assert result["checks"] == dict.fromkeys(result["checks"], True)
@@ -0,0 +1,118 @@
+from datetime import datetime
+
+import pytest
+
+import log_writer
+from log_store import open_store
+from log_writer import LogWriter
+
+START = datetime(2026, 10, 13, 9, 0, 0)
+END = datetime(2026, 10, 13, 9, 30, 0)
+
+
+class FakeStore:
+    """
+    记下每次 append_many 的 (备注列表, sync)；fail 次数用完之前一直抛 OSError。
+    """
+
+    def __init__(self, fail: int = 0):
+        self.calls = []
+        self.fail = fail
+        self.closed = False
+
+    def append_many(self, sessions, sync=False):
+        if self.fail and sessions:
+            self.fail -= 1
+            raise OSError("disk full")
+        self.calls.append(([s.note for s in sessions], sync))
+
+    def close(self):
+        self.closed = True
+
+
+def put(writer, *notes):
+    for note in notes:
+        writer.put(START, END, 1800, "countup", note)
+
+
+def test_row_policy_writes_and_syncs_each_record():
+    store = FakeStore()
+    writer = LogWriter(store, policy="row")
+    put(writer, "a", "b", "c")
+    writer.flush()
+    assert store.calls == [(["a"], True), (["b"], True), (["c"], True)]
+    writer.close()
+
+
+def test_group_policy_batches_and_syncs_once_per_batch():
+    store = FakeStore()
+    writer = LogWriter(store, policy="group", interval_ms=500)
+    put(writer, "a", "b", "c")
+    writer.flush()
+    assert store.calls == [(["a", "b", "c"], True)]
+    writer.close()
+
+
+def test_exit_policy_syncs_only_on_close():
+    store = FakeStore()
+    writer = LogWriter(store, policy="exit", interval_ms=10)
+    put(writer, "a")
+    writer.flush()
+    assert store.calls == [(["a"], False)]
+    writer.close()
+    assert store.calls[-1] == ([], True)
+    assert store.closed
+
+
+def test_close_drains_the_queue():
+    store = FakeStore()
+    writer = LogWriter(store, policy="group", interval_ms=10_000)
+    put(writer, "a", "b")
+    writer.close()
+    writer.close()
+    assert [note for notes, _ in store.calls for note in notes] == ["a", "b"]
+    with pytest.raises(RuntimeError):
+        put(writer, "c")
+
+
+def test_failed_rows_are_retried_with_the_next_batch(capsys):
+    store = FakeStore(fail=1)
+    writer = LogWriter(store, policy="row")
+    put(writer, "a")
+    writer.flush()
+    assert store.calls == []
+    assert isinstance(writer.error, OSError)
+    assert "稍后重试" in capsys.readouterr().err
+    put(writer, "b")
+    writer.flush()
+    assert store.calls == [(["a", "b"], True)]
+    writer.close()
+
+
+def test_close_retries_rows_that_never_made_it():
+    store = FakeStore(fail=1)
+    writer = LogWriter(store, policy="group", interval_ms=10)
+    put(writer, "a")
+    writer.close()
+    assert store.calls[-1] == (["a"], True)
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        LogWriter(FakeStore(), policy="sometimes")
+
+
+def test_bad_durability_env_falls_back_to_group(monkeypatch, capsys):
+    monkeypatch.setenv("STUDY_LOG_DURABILITY", "fast")
+    assert log_writer.policy_from_env() == "group"
+    assert "fast" in capsys.readouterr().err
+    monkeypatch.setenv("STUDY_LOG_DURABILITY", "row")
+    assert log_writer.policy_from_env() == "row"
+
+
+def test_writes_land_in_a_real_csv_log(write_csv):
+    path = write_csv()
+    writer = LogWriter(open_store(path), policy="group", interval_ms=10)
+    put(writer, "高数", "英语")
+    writer.close()
+    assert [s.note for s in open_store(path).sessions()] == ["高数", "英语"]
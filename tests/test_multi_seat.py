@@ -0,0 +1,36 @@
+import shutil
+
+from aggregate import get_engine
+from log_binary import csv_to_binary
+from log_sqlite import import_csv
+from log_store import open_store
+from multi_seat import aggregate_seats, discover
+
+ROWS = [
+    "2026-03-01 09:00:00,2026-03-01 10:00:00,60.0,countup,高数",
+    "2026-03-01 23:30:00,2026-03-02 00:30:00,60.0,countdown,英语",
+    "oops,2026-03-02 01:00:00,5.0,countup,",
+    "2026-03-03 08:00:00,2026-03-03 08:45:00,45.0,countup,",
+]
+
+
+def test_seats_are_read_once_without_touching_the_directory(write_csv, tmp_path):
+    source = write_csv(*ROWS)
+    seats_dir = tmp_path / "seats"
+    seats_dir.mkdir()
+    shutil.copy(source, seats_dir / "a.csv")
+    csv_to_binary(source, seats_dir / "b.bin", skip_bad=True)
+    import_csv(source, seats_dir / "c.db")
+    before = sorted(p.name for p in seats_dir.iterdir())
+
+    partials, combined = aggregate_seats(discover(seats_dir), "2026-03-01", "2026-03-03", workers=1)
+
+    assert sorted(p.name for p in seats_dir.iterdir()) == before
+    engine = get_engine(open_store(source))
+    expected = [v for _, v in engine.daily("2026-03-01", "2026-03-03")]
+    for part in partials:
+        assert "error" not in part, part
+        assert part["daily"] == expected
+        assert part["sessions"] == 3
+    assert combined["seats"] == 3
+    assert combined["minutes"] == 3 * sum(expected)
@@ -0,0 +1,70 @@
+from datetime import datetime
+
+import note_index
+from log_store import make_session, open_store
+from note_index import NoteTables, month_pieces, subjects_of
+
+
+def session(start, end, note, mode="countup"):
+    return make_session(start, end, (end - start).total_seconds(), mode, note)
+
+
+def test_subjects_of():
+    assert subjects_of("线性代数 第三章") == ["线性代数"]
+    assert subjects_of("#英语 #阅读 第 2 篇") == ["英语", "阅读"]
+    assert subjects_of("📚 背书") == ["背书"]
+    assert subjects_of("   ") == []
+
+
+def test_month_pieces():
+    assert month_pieces("2026-01-30", "2026-04-02") == (
+        ["2026-02", "2026-03"], ["2026-01-30", "2026-01-31", "2026-04-01", "2026-04-02"])
+    assert month_pieces("2026-02-01", "2026-02-28") == (["2026-02"], [])
+
+
+def test_keyword_and_subject_totals_span_months_and_midnight():
+    tables = NoteTables()
+    tables.add_many([
+        session(datetime(2026, 1, 31, 23), datetime(2026, 2, 1, 1), "高数作业"),
+        session(datetime(2026, 2, 10, 9), datetime(2026, 2, 10, 10), "#高数 习题"),
+        session(datetime(2026, 3, 2, 9), datetime(2026, 3, 2, 9, 30), "英语阅读"),
+    ])
+    assert tables.keyword_total("高数", "2026-01-01", "2026-01-31") == (60.0, 1)
+    assert tables.keyword_total("高数", "2026-02-01", "2026-03-31") == (120.0, 1)
+    assert tables.keyword_total("ABC", "2026-01-01", "2026-12-31") == (0.0, 0)
+    assert tables.top_subjects("2026-01-01", "2026-03-31") == [
+        ("高数作业", 120.0, 1), ("高数", 60.0, 1), ("英语阅读", 30.0, 1)]
+    assert tables.top_subjects("2026-02-05", "2026-02-28") == [("高数", 60.0, 1)]
+
+
+def test_csv_index_follows_appends_and_survives_reopen(write_csv):
+    path = write_csv("2026-02-10 09:00:00,2026-02-10 10:00:00,60.0,countup,高数作业")
+    store = open_store(path)
+    assert note_index.get_index(store).keyword_total("高数", "2026-02-01", "2026-02-28") == (60.0, 1)
+    store.append(datetime(2026, 2, 11, 9), datetime(2026, 2, 11, 9, 30), 1800, "countup", "高数复习")
+    assert note_index.get_index(store).keyword_total("高数", "2026-02-01", "2026-02-28") == (90.0, 2)
+    store.close()
+    reopened = open_store(path)
+    assert note_index.get_index(reopened).top_subjects("2026-02-01", "2026-02-28") == [
+        ("高数作业", 60.0, 1), ("高数复习", 30.0, 1)]
+
+
+def test_memory_index_rebuilds_when_log_is_rewritten_during_refresh():
+    class RewritingStore:
+        generation = 0
+
+        def __init__(self):
+            self.rows = [session(datetime(2026, 2, 10, 9), datetime(2026, 2, 10, 10), "高数作业")]
+
+        def sessions_since(self, n):
+            if n and self.generation == 0:
+                # 模拟 sessions_since 里刷新时发现日志被改写了
+                self.generation = 1
+                self.rows = [session(datetime(2026, 2, 12, 9), datetime(2026, 2, 12, 9, 30), "高数复习")]
+            return self.rows[n:]
+
+    store = RewritingStore()
+    index = note_index.MemoryNoteIndex(store).refresh()
+    assert index.keyword_total("高数", "2026-02-01", "2026-02-28") == (60.0, 1)
+    store.rows.append(session(datetime(2026, 2, 11, 9), datetime(2026, 2, 11, 10), "高数习题"))
+    assert index.refresh().keyword_total("高数", "2026-02-01", "2026-02-28") == (30.0, 1)
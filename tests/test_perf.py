@@ -0,0 +1,110 @@
+import json
+import math
+
+import pytest
+
+import perf
+from perf import MIN_SECONDS, Histogram
+
+
+@pytest.fixture
+def enabled(monkeypatch):
+    """
+    打开统计，用一份空的直方图表，测完恢复原样。
+    """
+    monkeypatch.setattr(perf, "ENABLED", True)
+    monkeypatch.setattr(perf, "_histograms", {})
+
+
+def test_bucket_upper_bounds_grow_by_ten_percent():
+    assert Histogram.upper(0) == pytest.approx(MIN_SECONDS * 1.1)
+    for index in (0, 10, 100):
+        assert Histogram.upper(index + 1) / Histogram.upper(index) == pytest.approx(1.1)
+
+
+def test_values_land_in_the_bucket_that_covers_them():
+    h = Histogram()
+    for seconds in (1.5e-6, 1e-3, 0.25, 2.0):
+        h.add(seconds)
+    for index, seconds in zip(sorted(h.buckets), (1.5e-6, 1e-3, 0.25, 2.0)):
+        lower = MIN_SECONDS if index == 0 else Histogram.upper(index - 1)
+        assert lower <= seconds * (1 + 1e-9) and seconds <= Histogram.upper(index) * (1 + 1e-9)
+
+
+def test_tiny_and_zero_durations_share_the_first_bucket():
+    h = Histogram()
+    h.add(0.0)
+    h.add(MIN_SECONDS / 10)
+    h.add(MIN_SECONDS)
+    assert h.buckets == {0: 3}
+    assert h.count == 3
+
+
+def test_percentiles_are_within_ten_percent_and_capped_at_max():
+    h = Histogram()
+    for ms in range(1, 101):
+        h.add(ms / 1000)
+    assert h.percentile(50) == pytest.approx(0.050, rel=0.1)
+    assert h.percentile(50) >= 0.050
+    assert h.percentile(90) == pytest.approx(0.090, rel=0.1)
+    assert h.percentile(99) == pytest.approx(0.099, rel=0.1)
+    assert h.percentile(100) == h.max == 0.1
+    assert h.percentile(0) == pytest.approx(0.001, rel=0.1)
+    assert Histogram().percentile(99) == 0.0
+
+
+def test_single_value_percentile_is_the_value_itself():
+    h = Histogram()
+    h.add(0.0123)
+    assert h.percentile(50) == h.percentile(99) == 0.0123
+
+
+def test_summary_in_milliseconds():
+    h = Histogram()
+    h.add(0.002)
+    h.add(0.004)
+    summary = h.summary()
+    assert summary["count"] == 2
+    assert summary["mean_ms"] == 3.0
+    assert summary["max_ms"] == 4.0
+    assert sum(summary["buckets"].values()) == 2
+    assert all(math.isfinite(float(upper)) for upper in summary["buckets"])
+
+
+def test_disabled_records_nothing(monkeypatch):
+    monkeypatch.setattr(perf, "ENABLED", False)
+    monkeypatch.setattr(perf, "_histograms", {})
+    perf.record("计时刷新", 0.01)
+    perf.late("计时刷新晚到", 2.0, 1.0)
+    assert perf.snapshot() == {}
+
+
+def test_timed_records_even_when_the_call_raises(enabled):
+    @perf.timed("会出错")
+    def boom():
+        raise ValueError
+
+    with pytest.raises(ValueError):
+        boom()
+    assert perf.snapshot()["会出错"]["count"] == 1
+
+
+def test_dump_appends_one_json_line_per_call(enabled, tmp_path):
+    path = tmp_path / "perf.jsonl"
+    perf.dump(path)
+    assert not path.exists()        # 什么都没记时不写
+
+    perf.record("save_log", 0.003)
+    perf.late("计时刷新晚到", 10.5, 10.0)
+    perf.late("计时刷新晚到", 10.0, None)
+    perf.dump(path)
+    perf.dump(path)
+
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 2
+    line = json.loads(lines[0])
+    assert set(line) == {"saved_at", "python", "platform", "metrics"}
+    assert list(line["metrics"]) == ["save_log", "计时刷新晚到"]
+    assert line["metrics"]["save_log"]["count"] == 1
+    assert line["metrics"]["计时刷新晚到"]["max_ms"] == 500.0
+    assert "计时刷新晚到" in lines[0]      # 中文名字不转义
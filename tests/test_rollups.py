@@ -0,0 +1,58 @@
+from datetime import datetime
+
+from log_store import make_session, open_store
+from rollups import RollupTables, split_by_day
+
+
+def test_rows_with_bad_start_dates_are_skipped(write_csv):
+    path = write_csv("bad-date,2025-12-07 10:07:00,7.0,countup,",
+                     "2025-12-07 10:00:00,2025-12-07 10:07:00,7.0,countup,",
+                     "2025-12-32 10:00:00,2025-12-32 10:07:00,3.0,countup,")
+    store = open_store(path)
+    assert store.day_total("2025-12-07") == (7.0, 1)
+    assert store.period_total("month", "2025-12") == (7.0, 1)
+    assert store.period_by_mode("week", "2025-W49") == {"countup": 7.0}
+    # 坏行之后照样能追加、照样能统计
+    store.append(datetime(2025, 12, 7, 20), datetime(2025, 12, 7, 20, 30), 1800, "countdown", "")
+    assert store.day_total("2025-12-07") == (37.0, 2)
+
+
+def test_cross_midnight_session_is_split_by_day():
+    assert split_by_day("2025-12-07 23:00:00", "2025-12-08 01:00:00", 120.0) == [
+        ("2025-12-07", 60.0, 1), ("2025-12-08", 60.0, 0)]
+    tables = RollupTables()
+    tables.add(make_session(datetime(2025, 12, 7, 23), datetime(2025, 12, 8, 1), 7200, "countup", ""))
+    assert tables.totals("day", "2025-12-07") == (60.0, 1)
+    assert tables.totals("day", "2025-12-08") == (60.0, 0)
+    assert tables.totals("week", "2025-W49") == (60.0, 1)
+    assert tables.totals("week", "2025-W50") == (60.0, 0)
+
+
+def test_sessions_longer_than_the_lookback_stay_on_their_start_date():
+    assert split_by_day("2026-03-01 23:00:00", "2026-03-03 22:00:00", 2820.0) == [
+        ("2026-03-01", 60.0, 1), ("2026-03-02", 1440.0, 0), ("2026-03-03", 1320.0, 0)]
+    assert split_by_day("2026-03-02 08:00:00", "9999-03-02 08:30:00", 30.0) == [("2026-03-02", 30.0, 1)]
+
+
+def test_appends_do_not_rewrite_the_sidecar_each_time(write_csv, monkeypatch):
+    path = write_csv("2025-12-07 10:00:00,2025-12-07 10:07:00,7.0,countup,")
+    store = open_store(path)
+    assert store.day_total("2025-12-07") == (7.0, 1)
+    saves = []
+    monkeypatch.setattr(store._rollups, "save", lambda: saves.append(1))
+    for i in range(10):
+        store.append(datetime(2025, 12, 7, 12, i), datetime(2025, 12, 7, 12, i, 30), 30, "countup", "")
+    assert saves == []
+    assert store.day_total("2025-12-07") == (12.0, 11)
+
+
+def test_unsaved_rollups_are_caught_up_after_a_crash(write_csv):
+    path = write_csv("2025-12-07 10:00:00,2025-12-07 10:07:00,7.0,countup,")
+    store = open_store(path)
+    store.day_total("2025-12-07")
+    store.append(datetime(2025, 12, 7, 12), datetime(2025, 12, 7, 12, 30), 1800, "countup", "")
+    # 没有 close：sidecar 还停在追加之前，重新打开时从旧的 upto 往后补
+    reopened = open_store(path)
+    assert reopened.day_total("2025-12-07") == (37.0, 2)
+    store.close()
+    assert open_store(path).day_total("2025-12-07") == (37.0, 2)
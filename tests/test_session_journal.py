@@ -0,0 +1,101 @@
+import os
+import subprocess
+import sys
+import textwrap
+from itertools import count
+
+import session_journal
+from session_journal import SessionJournal
+from timing import Stopwatch
+
+
+def running_watch():
+    # 每读一次时钟过去一分钟
+    watch = Stopwatch(clock=count(0, 60).__next__)
+    watch.start()
+    return watch
+
+
+def test_crashed_session_is_recovered(tmp_path):
+    path = tmp_path / "study_log.csv.journal"
+    journal = SessionJournal(path, fsync=False)
+    assert journal.checkpoint(running_watch(), "countup", force=True)
+    journal.close()     # 相当于进程被杀
+
+    entry = SessionJournal(path, fsync=False).pending()
+    assert entry is not None and entry.mode == "countup"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_periodic_checkpoints_sync_at_a_coarser_interval(tmp_path, monkeypatch):
+    clock = FakeClock()
+    synced = []
+    monkeypatch.setattr(session_journal.time, "monotonic", clock)
+    monkeypatch.setattr(session_journal, "_sync", synced.append)
+    journal = SessionJournal(tmp_path / "study_log.csv.journal", interval=15, sync_interval=60)
+    watch = running_watch()
+
+    assert journal.checkpoint(watch, "countup", force=True)     # 开始：立即落盘
+    assert len(synced) == 1
+    for _ in range(3):                                          # 每 15 秒存一次，只写不落盘
+        clock.now += 15
+        assert journal.checkpoint(watch, "countup")
+    assert len(synced) == 1
+    clock.now += 15                                             # 距上次落盘满 60 秒
+    assert journal.checkpoint(watch, "countup")
+    assert len(synced) == 2
+    clock.now += 1
+    assert journal.checkpoint(watch, "countup", force=True)     # 暂停 / 关窗：立即落盘
+    assert len(synced) == 3
+    journal.clear()
+    assert len(synced) == 4
+
+    # 没落盘的存档照样在系统缓存里，进程被杀也能补记
+    clock.now += 15
+    journal.checkpoint(watch, "countdown")
+    assert len(synced) == 5         # clear 之后第一次存档一定落盘
+    clock.now += 15
+    journal.checkpoint(watch, "countdown")
+    journal.close()
+    assert len(synced) == 5
+    entry = SessionJournal(tmp_path / "study_log.csv.journal", fsync=False).pending()
+    assert entry is not None and entry.mode == "countdown"
+
+
+def test_journal_held_by_another_process_is_left_alone(tmp_path):
+    path = tmp_path / "study_log.csv.journal"
+    repo = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    # 另一个进程开着一段学习，一直不退出
+    holder = subprocess.Popen([sys.executable, "-c", textwrap.dedent(f"""
+        import sys
+        sys.path.insert(0, {repo!r})
+        from itertools import count
+        from session_journal import SessionJournal
+        from timing import Stopwatch
+        watch = Stopwatch(clock=count(0, 60).__next__)
+        watch.start()
+        journal = SessionJournal({str(path)!r}, fsync=False)
+        journal.checkpoint(watch, "countup", force=True)
+        print("ready", flush=True)
+        sys.stdin.read()
+    """)], stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+    try:
+        assert holder.stdout.readline().strip() == "ready"
+        mine = SessionJournal(path, fsync=False)
+        assert mine.pending() is None
+        mine.clear()
+        assert mine.checkpoint(running_watch(), "countdown", force=True)
+        assert mine.path != path
+        mine.close()
+    finally:
+        holder.communicate("")
+    # 对方退出后它的存档原样还在，可以补记
+    entry = SessionJournal(path, fsync=False).pending()
+    assert entry is not None and entry.mode == "countup"
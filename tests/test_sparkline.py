@@ -0,0 +1,123 @@
+import tkinter as tk
+from datetime import date, datetime
+
+import pytest
+
+from sparkline import ProgressStrip, Sparkline
+
+TODAY = date(2026, 10, 13)
+STARTED = datetime(2026, 10, 13, 9, 0, 0)
+
+
+class FakeCanvas:
+    """
+    只实现 Sparkline 用到的几个方法，记下每次改坐标的是哪根柱子。
+    """
+
+    def __init__(self):
+        self.items = {}
+        self.moved = []
+
+    def create_rectangle(self, *coords, **options):
+        item = len(self.items) + 1
+        self.items[item] = list(coords)
+        return item
+
+    def coords(self, item, *coords):
+        if not coords:
+            return self.items[item]
+        self.moved.append(item)
+        self.items[item] = list(coords)
+
+    def itemconfig(self, item, **options):
+        pass
+
+
+def test_update_moves_only_bars_whose_top_changed():
+    canvas = FakeCanvas()
+    bars = Sparkline(canvas, 0, 0, 240, 60, 24, "#4a90d9")
+    bars.update([0.0] * 9 + [30.0] + [0.0] * 14)
+    assert canvas.moved == [10]
+    canvas.moved.clear()
+    bars.update([0.0] * 9 + [45.0] + [0.0] * 14)
+    assert canvas.moved == [10]
+    canvas.moved.clear()
+    bars.update([0.0] * 9 + [45.0] + [0.0] * 14)
+    assert canvas.moved == []
+
+
+def test_rescale_moves_every_bar():
+    canvas = FakeCanvas()
+    bars = Sparkline(canvas, 0, 0, 70, 60, 7, "#4a90d9")
+    bars.update([30.0, 10.0, 0, 0, 0, 0, 0])
+    canvas.moved.clear()
+    bars.update([30.0, 10.0, 0, 0, 0, 0, 90.0])
+    assert bars.scale == 120.0
+    assert canvas.moved == list(range(1, 8))
+
+
+# ================== 真正的 Tk 画布 ==================
+
+@pytest.fixture
+def root():
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        pytest.skip("没有可用的显示器")
+    root.withdraw()
+    yield root
+    root.destroy()
+
+
+@pytest.fixture
+def strip(root):
+    strip = ProgressStrip(root, width=300, height=60, days=7, bg="#222222",
+                          color="#4a90d9", current_color="#f5a623", text_color="#aaaaaa")
+    hours = [0.0] * 24
+    hours[8] = 45.0
+    strip.load((hours, [60.0, 0.0, 30.0, 0.0, 90.0, 20.0, 45.0]), TODAY)
+    return strip
+
+
+@pytest.fixture
+def moved(strip, monkeypatch):
+    """
+    记下之后每次改了坐标的柱子（画布上的 item 编号）。
+    """
+    moved = []
+    coords = strip.canvas.coords
+
+    def spy(item, *args):
+        if args:
+            moved.append(item)
+        return coords(item, *args)
+
+    monkeypatch.setattr(strip.canvas, "coords", spy)
+    return moved
+
+
+def current_bars(strip):
+    return {strip.hours._bars[9], strip.daily._bars[-1]}
+
+
+def test_tick_redraws_only_the_current_bars(strip, moved):
+    strip.set_live(STARTED, 600)
+    assert set(moved) == current_bars(strip)
+    moved.clear()
+    strip.set_live(STARTED, 900)
+    assert set(moved) == current_bars(strip)
+    moved.clear()
+    strip.set_live(STARTED, 901)        # 不到一个像素：什么都不动
+    assert moved == []
+
+
+def test_save_log_redraws_only_the_current_bars(strip, moved):
+    strip.set_live(STARTED, 1200)
+    moved.clear()
+    # save_log：先把进行中的数值留在图上，再用日志里读到的数据接替
+    strip.freeze()
+    hours = [0.0] * 24
+    hours[8], hours[9] = 45.0, 20.0
+    strip.load((hours, [60.0, 0.0, 30.0, 0.0, 90.0, 20.0, 65.0]), TODAY)
+    assert set(moved) <= current_bars(strip)
+    assert strip.hours._values[9] == 20.0
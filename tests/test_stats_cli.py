@@ -0,0 +1,56 @@
+import csv
+import io
+import json
+
+import pytest
+
+import stats_cli
+
+ROWS = [
+    "2026-03-01 09:00:00,2026-03-01 10:00:00,60.0,countup,高数",
+    "2026-03-01 23:30:00,2026-03-02 00:30:00,60.0,countdown,英语",
+    "2026-03-03 08:00:00,2026-03-03 08:45:00,45.0,countup,",
+]
+
+EXPECTED_DAYS = [
+    {"day": "2026-03-01", "minutes": 90.0, "sessions": 2},
+    {"day": "2026-03-02", "minutes": 30.0, "sessions": 0},
+    {"day": "2026-03-03", "minutes": 45.0, "sessions": 1},
+]
+
+
+def run(capsys, path, *args):
+    assert stats_cli.main(["stats", "--log", str(path), "--from", "2026-03-01", "--to", "2026-03-03",
+                           *args]) == 0
+    return capsys.readouterr().out
+
+
+def test_csv_output(write_csv, capsys):
+    out = run(capsys, write_csv(*ROWS), "--format", "csv")
+    assert out.splitlines()[0] == "day,minutes,sessions"
+    rows = list(csv.DictReader(io.StringIO(out)))
+    assert rows == [{k: str(v) for k, v in row.items()} for row in EXPECTED_DAYS]
+
+
+def test_json_output(write_csv, capsys):
+    out = run(capsys, write_csv(*ROWS), "--format", "json")
+    assert json.loads(out) == EXPECTED_DAYS
+
+
+def test_jsonl_output(write_csv, capsys):
+    out = run(capsys, write_csv(*ROWS), "--format", "jsonl", "--group-by", "mode")
+    assert [json.loads(line) for line in out.splitlines()] == [
+        {"mode": "countdown", "minutes": 60.0}, {"mode": "countup", "minutes": 105.0}]
+
+
+@pytest.mark.parametrize("group_by", ["day", "week", "month", "mode", "hour"])
+def test_queries_leave_no_files_next_to_the_log(write_csv, capsys, group_by):
+    path = write_csv(*ROWS)
+    run(capsys, path, "--group-by", group_by)
+    assert sorted(p.name for p in path.parent.iterdir()) == [path.name]
+
+
+def test_empty_range_gives_an_empty_document(write_csv, capsys):
+    path = write_csv()
+    assert json.loads(run(capsys, path, "--format", "json", "--group-by", "mode")) == []
+    assert run(capsys, path, "--format", "csv", "--group-by", "mode") == ""
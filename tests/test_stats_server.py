@@ -0,0 +1,45 @@
+import asyncio
+import json
+import threading
+from datetime import datetime, timedelta
+
+import stats_server
+from log_store import open_store
+
+
+async def get(port, path):
+    reader, writer = await asyncio.open_connection(stats_server.HOST, port)
+    writer.write(f"GET {path} HTTP/1.1\r\nConnection: close\r\n\r\n".encode("ascii"))
+    data = await reader.read()
+    writer.close()
+    return json.loads(data.partition(b"\r\n\r\n")[2])
+
+
+def test_new_rows_show_up_without_refreshing_on_the_event_loop(write_csv, monkeypatch):
+    monkeypatch.setattr(stats_server, "REFRESH_INTERVAL", 0.02)
+    polled_on = []
+    poll = stats_server.StatsCache.poll
+    monkeypatch.setattr(stats_server.StatsCache, "poll",
+                        lambda self: (polled_on.append(threading.get_ident()), poll(self)))
+    store = open_store(write_csv())
+
+    async def scenario():
+        ready = asyncio.get_running_loop().create_future()
+        server = asyncio.create_task(stats_server.serve(store, 0, ready.set_result))
+        port = await ready
+        try:
+            assert (await get(port, "/today"))["sessions"] == 0
+            end = datetime.now().replace(microsecond=0)
+            start = max(end - timedelta(minutes=30), end.replace(hour=0, minute=0, second=0))
+            store.append(start, end, (end - start).total_seconds(), "countup", "")
+            for _ in range(100):
+                await asyncio.sleep(0.02)
+                if (await get(port, "/today"))["sessions"] == 1:
+                    break
+            assert (await get(port, "/today"))["sessions"] == 1
+        finally:
+            server.cancel()
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(scenario())
+    assert polled_on and loop_thread not in polled_on
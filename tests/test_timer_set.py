@@ -0,0 +1,110 @@
+import pytest
+
+from timer_set import FINISH, TICK, TimerSet
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def logged():
+    return []
+
+
+@pytest.fixture
+def timers(clock, logged):
+    return TimerSet(clock, log=lambda *row: logged.append(row))
+
+
+def advance(timers, clock, to):
+    """
+    像面板那样一直睡到堆顶的截止时间，直到 to；返回 [(时刻, 事件类型, 名字), ...]。
+    """
+    events = []
+    while True:
+        due = timers.next_deadline()
+        if due is None or due > to:
+            break
+        clock.now = due
+        events.extend((due, kind, timer.name) for kind, timer in timers.run_due())
+    clock.now = to
+    return events
+
+
+def test_ticks_once_per_second_per_running_timer(timers, clock):
+    timers.add("a")
+    clock.now = 0.5
+    timers.add("b")
+    events = advance(timers, clock, 2.2)
+    assert [(round(t, 3), kind, name) for t, kind, name in events] == [
+        (1.001, TICK, "a"), (1.501, TICK, "b"), (2.001, TICK, "a")]
+
+
+def test_shared_deadline_fires_in_insertion_order(timers, clock, logged):
+    for name in ("番茄 1", "番茄 2", "番茄 3"):
+        timers.add(name, 3, note=name)
+    events = advance(timers, clock, 3.0)
+    finishes = [name for _, kind, name in events if kind == FINISH]
+    assert finishes == ["番茄 1", "番茄 2", "番茄 3"]
+    ticks = [name for _, kind, name in events if kind == TICK]
+    assert ticks == ["番茄 1", "番茄 2", "番茄 3"] * 2
+    assert len(timers) == 0
+    assert [row[4] for row in logged] == ["番茄 1", "番茄 2", "番茄 3"]
+
+
+def test_paused_timer_events_are_skipped_and_finish_is_rescheduled(timers, clock, logged):
+    timers.add("番茄", 5)
+    advance(timers, clock, 2.5)
+    timers.pause("番茄")
+    assert timers.next_deadline() is None
+    clock.now = 100.0
+    timers.start("番茄")
+    events = advance(timers, clock, 110.0)
+    # 暂停前排的 FINISH（t=5）作废，继续后按剩下的 2.5 秒重新排
+    assert [(round(t, 3), kind) for t, kind, _ in events if kind == FINISH] == [(102.5, FINISH)]
+    assert all(t > 100 for t, _, _ in events)
+    assert logged[0][2:] == (5, "countdown", "")
+
+
+def test_removed_timer_never_fires_or_logs(timers, clock, logged):
+    timers.add("要删的", 2)
+    timers.add("留着的", 4)
+    advance(timers, clock, 1.5)
+    timers.remove("要删的")
+    events = advance(timers, clock, 10.0)
+    assert {name for _, _, name in events} == {"留着的"}
+    assert [row[4] for row in logged] == [""]
+    assert [row[2] for row in logged] == [4]
+
+
+def test_each_timer_logs_its_own_mode_and_note(timers, clock, logged):
+    timers.add("英语", note="英语阅读")
+    timers.add("番茄钟", 2, note="高数")
+    timers.add("休息提醒", 1, record=False)
+    advance(timers, clock, 3.0)
+    assert set(timers.timers) == {"英语"}
+    assert timers.finish("英语") == 3.0
+    assert [(row[2], row[3], row[4]) for row in logged] == [
+        (2, "countdown", "高数"), (3.0, "countup", "英语阅读")]
+    for start, end, seconds, _, _ in logged:
+        assert (end - start).total_seconds() == pytest.approx(seconds)
+
+
+def test_finish_all_skips_unstarted_and_unrecorded(timers, clock, logged):
+    timers.add("没开始", start=False)
+    timers.add("休息", 300, record=False)
+    timers.add("在计", note="物理")
+    clock.now = 60.0
+    assert timers.finish_all() == 1
+    assert len(timers) == 0
+    assert [(row[2], row[4]) for row in logged] == [(60.0, "物理")]
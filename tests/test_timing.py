@@ -0,0 +1,100 @@
+from datetime import datetime
+
+import pytest
+
+from timing import Countdown, Stopwatch, format_hms
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_elapsed_excludes_paused_time():
+    clock = FakeClock()
+    watch = Stopwatch(clock)
+    watch.start()
+    clock.now += 10
+    watch.pause()
+    clock.now += 600
+    assert watch.elapsed() == 10
+    watch.resume()
+    clock.now += 5.5
+    assert watch.elapsed() == 15.5
+    watch.pause()
+    watch.pause()
+    clock.now += 1
+    watch.start()       # 已经开始过：等同于 resume，不重置开始时间
+    clock.now += 4.5
+    assert watch.stop() == 20.0
+    clock.now += 100
+    assert watch.elapsed() == 20.0
+    assert not watch.running
+
+
+def test_until_next_second():
+    clock = FakeClock()
+    watch = Stopwatch(clock)
+    watch.start()
+    clock.now += 2.25
+    assert watch.until_next_second() == pytest.approx(0.75)
+
+
+def test_span_matches_real_start_and_end():
+    clock = FakeClock()
+    watch = Stopwatch(clock)
+    before_start = datetime.now()
+    watch.start()
+    after_start = datetime.now()
+    clock.now += 90
+    watch.pause()
+    clock.now += 3600
+    watch.resume()
+    clock.now += 30
+    before_stop = datetime.now()
+    assert watch.stop() == 120
+    after_stop = datetime.now()
+
+    start, end = watch.span()
+    assert end == watch.stopped_at
+    assert before_stop <= end <= after_stop
+    assert before_start <= watch.started_at <= after_start
+    # 开始由结束倒推累计时长，暂停的一小时不算进去
+    assert (end - start).total_seconds() == 120
+
+
+def test_reset_clears_everything():
+    clock = FakeClock()
+    watch = Stopwatch(clock)
+    watch.start()
+    clock.now += 5
+    watch.stop()
+    watch.reset()
+    assert not watch.started
+    assert watch.elapsed() == 0.0
+    assert watch.stopped_at is None
+
+
+def test_countdown_remaining_clamps_at_zero():
+    clock = FakeClock()
+    countdown = Countdown(60, clock)
+    countdown.start()
+    clock.now += 45
+    assert countdown.remaining() == 15
+    assert not countdown.finished()
+    countdown.pause()
+    clock.now += 300
+    assert countdown.remaining() == 15
+    countdown.resume()
+    clock.now += 20
+    assert countdown.remaining() == 0.0
+    assert countdown.finished()
+
+
+def test_format_hms():
+    assert format_hms(0) == "00:00:00"
+    assert format_hms(59.99) == "00:00:59"
+    assert format_hms(3725) == "01:02:05"
@@ -0,0 +1,386 @@
+"""
+多计时器：一个窗口里同时跑好几个有名字的计时器，比如 25 分钟番茄钟、5 分钟休息提醒，
+再加每个科目各一个正计时。每个计时器结束时各自用 save_log 记一条，带自己的模式和备注。
+
+所有计时器共用一个刷新循环：把每个计时器的下一个事件（显示跳到下一秒 / 倒计时到点）
+放进按截止时间排序的小顶堆，循环只睡到堆顶那一刻，醒来只处理到期的事件，
+所以开销跟到期的事件数成正比，跟一共开了多少个计时器无关，暂停的计时器完全不占。
+
+暂停、删除时不去堆里找旧事件，只把计时器的 epoch 加一；旧事件弹出来时对不上就丢掉（懒删除）。
+"""
+import heapq
+import itertools
+import math
+import time
+import tkinter as tk
+from datetime import timedelta
+from tkinter import messagebox, simpledialog
+
+from log_store import save_log
+from timing import Countdown, Stopwatch, format_hms
+
+# 事件类型
+TICK = "tick"           # 显示该跳到下一秒了
+FINISH = "finish"       # 倒计时到点
+
+# 跳秒事件比整秒边界晚一点点，确保醒来时已经跨过边界
+TICK_SLACK = 0.001
+
+# 面板上的预设：(按钮文字, 默认名字, 分钟数（None 为正计时）, 是否记入学习日志)
+PRESETS = [
+    ("正计时", "正计时", None, True),
+    ("番茄 25", "番茄钟", 25, True),
+    ("休息 5", "休息提醒", 5, False),
+]
+
+
+class NamedTimer:
+    """
+    一个有名字的计时器：total_seconds 为 None 时是正计时，否则是倒计时。
+    record 为 False 的计时器（比如休息提醒）结束时不写学习日志。
+    """
+
+    def __init__(self, name: str, total_seconds: float = None, note: str = "",
+                 record: bool = True, clock=time.monotonic):
+        self.name = name
+        self.note = note
+        self.record = record
+        if total_seconds:
+            self.mode = "countdown"
+            self.watch = Countdown(total_seconds, clock)
+        else:
+            self.mode = "countup"
+            self.watch = Stopwatch(clock)
+        self.epoch = 0          # 每次暂停 / 继续 / 结束都加一，堆里的旧事件随之作废
+
+    @property
+    def running(self) -> bool:
+        return self.watch.running
+
+    def text(self) -> str:
+        """
+        显示的时间：正计时显示已过去的时长，倒计时显示剩余（和主窗口一样按整秒）。
+        """
+        if self.mode == "countdown":
+            return format_hms(max(0, self.watch.total_seconds - int(self.watch.elapsed())))
+        return format_hms(self.watch.elapsed())
+
+
+class TimerSet:
+    """
+    一组计时器加一个按截止时间排序的事件堆。不碰界面，Tk 面板和测试都可以直接用。
+
+    log(start, end, seconds, mode, note) 默认是 log_store.save_log。
+    """
+
+    def __init__(self, clock=time.monotonic, log=None):
+        self.clock = clock
+        self.timers = {}        # 名字 -> NamedTimer，按添加顺序
+        self._log = log or save_log
+        self._heap = []         # [(截止时间, 序号, epoch, 事件类型, 计时器)]
+        self._seq = itertools.count()   # 截止时间相同时按入堆顺序，也免得去比较计时器对象
+
+    def __len__(self):
+        return len(self.timers)
+
+    def unique_name(self, base: str) -> str:
+        """
+        base 没被占用就用 base，否则加上 (2)、(3)……
+        """
+        name, n = base, 1
+        while name in self.timers:
+            n += 1
+            name = f"{base} ({n})"
+        return name
+
+    # ---------- 控制 ----------
+    def add(self, name: str, total_seconds: float = None, note: str = "", record: bool = True,
+            start: bool = True) -> NamedTimer:
+        if not name:
+            raise ValueError("计时器名字不能为空")
+        if name in self.timers:
+            raise ValueError(f"已经有叫“{name}”的计时器了")
+        timer = self.timers[name] = NamedTimer(name, total_seconds, note, record, self.clock)
+        if start:
+            self.start(name)
+        return timer
+
+    def start(self, name: str):
+        """
+        开始或继续。
+        """
+        timer = self.timers[name]
+        if timer.running:
+            return
+        timer.watch.start()
+        timer.epoch += 1
+        self._push_tick(timer)
+        if timer.mode == "countdown":
+            self._push(self.clock() + timer.watch.remaining(), timer, FINISH)
+
+    def pause(self, name: str):
+        timer = self.timers[name]
+        if not timer.running:
+            return
+        timer.watch.pause()
+        timer.epoch += 1
+
+    def toggle(self, name: str):
+        if self.timers[name].running:
+            self.pause(name)
+        else:
+            self.start(name)
+
+    def finish(self, name: str) -> float:
+        """
+        结束计时器并从组里拿掉；计过时间而且 record 为真时写一条学习日志。返回记下的秒数。
+        """
+        timer = self.timers.pop(name)
+        timer.epoch += 1
+        seconds = timer.watch.stop()
+        if seconds <= 0 or not timer.record:
+            return 0.0
+        start_dt, end_dt = timer.watch.span()
+        self._log(start_dt, end_dt, seconds, timer.mode, timer.note)
+        return seconds
+
+    def remove(self, name: str):
+        """
+        直接删掉计时器，不写日志。
+        """
+        timer = self.timers.pop(name)
+        timer.epoch += 1
+
+    def finish_all(self) -> int:
+        """
+        把所有计时器都结束并记日志（关窗时用），返回写了几条。
+        """
+        return sum(1 for name in list(self.timers) if self.finish(name) > 0)
+
+    # ---------- 事件堆 ----------
+    def _push(self, due: float, timer: NamedTimer, kind: str):
+        heapq.heappush(self._heap, (due, next(self._seq), timer.epoch, kind, timer))
+
+    def _push_tick(self, timer: NamedTimer):
+        self._push(self.clock() + timer.watch.until_next_second() + TICK_SLACK, timer, TICK)
+
+    @staticmethod
+    def _stale(entry) -> bool:
+        return entry[2] != entry[4].epoch
+
+    def next_deadline(self):
+        """
+        最早的有效截止时间（clock 的读数），没有正在走的计时器时返回 None。
+        """
+        heap = self._heap
+        while heap and self._stale(heap[0]):
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    def run_due(self):
+        """
+        处理所有已到期的事件，返回 [(事件类型, 计时器), ...]。
+        跳秒事件处理完排下一秒；倒计时到点的计时器按总时长记日志后从组里拿掉。
+        """
+        heap = self._heap
+        now = self.clock()
+        fired = []
+        while heap and heap[0][0] <= now:
+            entry = heapq.heappop(heap)
+            if self._stale(entry):
+                continue
+            kind, timer = entry[3], entry[4]
+            if kind == TICK:
+                self._push_tick(timer)
+            elif not timer.watch.finished():
+                # 醒早了一点：按剩余时间重新排
+                self._push(now + timer.watch.remaining(), timer, FINISH)
+                continue
+            else:
+                self._complete(timer)
+            fired.append((kind, timer))
+        return fired
+
+    def _complete(self, timer: NamedTimer):
+        """
+        倒计时到点：和主窗口一样，按设定的总时长倒推开始时间记一条。
+        """
+        del self.timers[timer.name]
+        timer.epoch += 1
+        timer.watch.stop()
+        if timer.record:
+            end_dt = timer.watch.stopped_at
+            start_dt = end_dt - timedelta(seconds=timer.watch.total_seconds)
+            self._log(start_dt, end_dt, timer.watch.total_seconds, timer.mode, timer.note)
+
+
+# ================== 面板 ==================
+
+class TimerSetPanel:
+    """
+    多计时器面板（单独的小窗口）：上面一排新建按钮，下面每个计时器一行
+    （名字、时间、暂停 / 继续、结束并存、删除）。
+
+    整个面板只挂一个 root.after 任务，排在堆顶的截止时间；跳秒时只改那个计时器的那一行。
+    关掉面板只是藏起来，计时器照走；主窗口关闭时调用 close()，还在计的都记日志。
+
+    on_saved() 在有计时器写了日志之后调用（主窗口用来刷新柱状条）。
+    """
+
+    def __init__(self, root, bg, card_color, text_color, accent_color, primary_color, on_saved=None):
+        self.root = root
+        self.bg = bg
+        self.card_color = card_color
+        self.text_color = text_color
+        self.accent_color = accent_color
+        self.primary_color = primary_color
+        self.on_saved = on_saved
+        self.timers = TimerSet()
+        self.rows = {}          # 名字 -> (行, 时间标签, 暂停按钮)
+        self._job = None        # 唯一的 after 任务
+        self._job_due = None    # 它排定的截止时间
+
+        self.window = tk.Toplevel(root)
+        self.window.title("多计时器")
+        self.window.configure(bg=bg)
+        self.window.attributes("-topmost", True)
+        self.window.protocol("WM_DELETE_WINDOW", self.window.withdraw)
+
+        top = tk.Frame(self.window, bg=bg)
+        top.pack(fill="x", padx=6, pady=(6, 3))
+        tk.Label(top, text="名称 / 备注", font=("Segoe UI", 8), bg=bg, fg=accent_color).pack(side="left")
+        self.name_var = tk.StringVar()
+        tk.Entry(top, textvariable=self.name_var, width=14, font=("Segoe UI", 9)).pack(side="left", padx=4)
+
+        buttons = tk.Frame(self.window, bg=bg)
+        buttons.pack(fill="x", padx=6)
+        for column, (text, default, minutes, record) in enumerate(PRESETS):
+            self._button(buttons, text, lambda d=default, m=minutes, r=record: self.add_timer(d, m, r)) \
+                .grid(row=0, column=column, padx=2)
+        self._button(buttons, "倒计时…", self.add_custom).grid(row=0, column=len(PRESETS), padx=2)
+
+        self.list_frame = tk.Frame(self.window, bg=bg)
+        self.list_frame.pack(fill="both", expand=True, padx=6, pady=4)
+        self.status = tk.Label(self.window, text="", font=("Segoe UI", 8), bg=bg, fg=accent_color)
+        self.status.pack(fill="x", padx=6, pady=(0, 4))
+
+    def _button(self, parent, text, command, width=6):
+        return tk.Button(parent, text=text, font=("Segoe UI", 8), width=width, command=command,
+                         bg="#4b2b4b", fg=self.text_color, activebackground="#5c3560",
+                         activeforeground=self.text_color, bd=0, relief="flat")
+
+    def show(self):
+        self.window.deiconify()
+        self.window.lift()
+
+    # ---------- 新建 / 操作 ----------
+    def add_timer(self, default_name: str, minutes: float = None, record: bool = True):
+        note = self.name_var.get().strip()
+        name = self.timers.unique_name(note or default_name)
+        timer = self.timers.add(name, minutes * 60 if minutes else None, note, record)
+        self._add_row(timer)
+        self._arm()
+
+    def add_custom(self):
+        minutes = simpledialog.askfloat("自定义倒计时", "请输入倒计时的分钟数：", minvalue=0.1,
+                                        parent=self.window)
+        if minutes is None:
+            return
+        self.add_timer("倒计时", minutes)
+
+    def _add_row(self, timer: NamedTimer):
+        row = tk.Frame(self.list_frame, bg=self.card_color)
+        row.pack(fill="x", pady=1)
+        tk.Label(row, text=timer.name, width=12, anchor="w", font=("Segoe UI", 9),
+                 bg=self.card_color, fg=self.text_color).pack(side="left", padx=(4, 0))
+        time_label = tk.Label(row, text=timer.text(), font=("Consolas", 11, "bold"),
+                              bg=self.card_color, fg=self.primary_color)
+        time_label.pack(side="left", padx=4)
+        remove = tk.Label(row, text="×", font=("Segoe UI", 9, "bold"), bg=self.card_color, fg=self.text_color)
+        remove.pack(side="right", padx=4)
+        remove.bind("<Button-1>", lambda e, n=timer.name: self.remove_timer(n))
+        self._button(row, "结束并存", lambda n=timer.name: self.finish_timer(n), width=7) \
+            .pack(side="right", padx=2)
+        pause = self._button(row, "暂停", lambda n=timer.name: self.toggle_timer(n), width=4)
+        pause.pack(side="right", padx=2)
+        self.rows[timer.name] = (row, time_label, pause)
+
+    def toggle_timer(self, name: str):
+        self.timers.toggle(name)
+        timer = self.timers.timers[name]
+        _, time_label, pause = self.rows[name]
+        time_label.config(text=timer.text())
+        pause.config(text="暂停" if timer.running else "继续")
+        self._arm()
+
+    def finish_timer(self, name: str):
+        timer = self.timers.timers[name]
+        seconds = self.timers.finish(name)
+        self._drop_row(name)
+        if seconds > 0:
+            self.status.config(text=f"“{name}”已保存：{format_hms(seconds)}")
+            self._saved()
+        elif not timer.record:
+            self.status.config(text=f"“{name}”已结束（不记入学习日志）")
+        self._arm()
+
+    def remove_timer(self, name: str):
+        timer = self.timers.timers[name]
+        if timer.watch.elapsed() >= 1 and timer.record and not messagebox.askyesno(
+                "删除计时器", f"“{name}”已经计了 {timer.text()}，不保存直接删掉吗？", parent=self.window):
+            return
+        self.timers.remove(name)
+        self._drop_row(name)
+        self._arm()
+
+    def _drop_row(self, name: str):
+        row = self.rows.pop(name, None)
+        if row is not None:
+            row[0].destroy()
+
+    def _saved(self):
+        if self.on_saved is not None:
+            self.on_saved()
+
+    # ---------- 刷新循环 ----------
+    def _arm(self):
+        """
+        让唯一的 after 任务对准堆顶的截止时间；已经对准了就不动。
+        """
+        due = self.timers.next_deadline()
+        if due == self._job_due and self._job is not None:
+            return
+        if self._job is not None:
+            self.root.after_cancel(self._job)
+            self._job = None
+        self._job_due = due
+        if due is not None:
+            delay_ms = max(0, math.ceil((due - self.timers.clock()) * 1000))
+            self._job = self.root.after(delay_ms, self._on_due)
+
+    def _on_due(self):
+        self._job = None
+        self._job_due = None
+        saved = False
+        for kind, timer in self.timers.run_due():
+            if kind == TICK:
+                self.rows[timer.name][1].config(text=timer.text())
+                continue
+            self._drop_row(timer.name)
+            self.status.config(text=f"⏰ “{timer.name}”时间到" + ("，已保存" if timer.record else ""))
+            self.window.bell()
+            self.show()
+            saved = saved or timer.record
+        if saved:
+            self._saved()
+        self._arm()
+
+    def close(self):
+        """
+        主窗口关闭时调用：停掉循环，还在计的计时器都记日志。
+        """
+        if self._job is not None:
+            self.root.after_cancel(self._job)
+            self._job = None
+        self.timers.finish_all()
+        self.window.destroy()
@@ -1,143 +1,137 @@
+import startup_profile  # 要最先导入：开启启动分析时才能统计到后面每个 import
+import base64
+import time
 import tkinter as tk
 from tkinter import messagebox, simpledialog
-import csv
-from pathlib import Path
 from datetime import datetime, timedelta
 
-# 尝试导入 matplotlib（用于画图），如果没有也能正常跑，只是不能画图
-try:
-    import matplotlib.pyplot as plt
-except ImportError:
-    plt = None
+import log_writer
+import perf
+from log_store import LOG_FILE, MODE_NAMES, ensure_log_file, get_store, save_log
+from rollups import recent_keys
+from session_journal import SessionJournal, recovered_span
+from sparkline import ProgressStrip, strip_data
+from stats_worker import StatsWorker
+from timer_set import TimerSetPanel
+from timing import Stopwatch, format_hms
 
-# 日志文件
-LOG_FILE = Path("study_log.csv")
+# 窗口里图表面板的图片尺寸（英寸，按 100 dpi 画）
+PANEL_CHART_SIZE = (3.6, 2.2)
 
+# 常驻柱状条显示最近几天
+STRIP_DAYS = 14
 
-# ================== CSV 工具函数 ==================
+# 性能统计小字多久刷新一次（毫秒）
+PERF_OVERLAY_MS = 1000
 
-def ensure_log_file():
-    """
-    如果日志文件不存在，就创建并写入表头。
-    """
-    if not LOG_FILE.exists():
-        with LOG_FILE.open("w", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            writer.writerow(["start_time", "end_time", "duration_minutes", "mode", "note"])
-
-
-def format_minutes(seconds: float) -> float:
-    """
-    把秒换算成分钟，保留两位小数。
-    """
-    return round(seconds / 60, 2)
-
-
-def save_log(start: datetime, end: datetime, duration_seconds: float, mode: str, note: str):
-    """
-    把一条学习记录追加写入 CSV 文件。
-    """
-    ensure_log_file()
-    with LOG_FILE.open("a", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow([
-            start.strftime("%Y-%m-%d %H:%M:%S"),
-            end.strftime("%Y-%m-%d %H:%M:%S"),
-            format_minutes(duration_seconds),
-            mode,
-            note
-        ])
 
+# ================== 统计工具函数 ==================
 
+@perf.timed("今日统计")
 def summarize_today() -> str:
     """
     返回“今日学习总时长”的文本描述。
     """
+    log_writer.flush()      # 刚点“结束”的那条可能还在写入队列里
     ensure_log_file()
     if not LOG_FILE.exists():
         return "目前还没有任何学习记录。"
 
     today_str = datetime.now().strftime("%Y-%m-%d")
-    total_minutes = 0.0
-    record_count = 0
-
-    with LOG_FILE.open("r", encoding="utf-8") as f:
-        reader = csv.reader(f)
-        next(reader, None)
-        for row in reader:
-            if len(row) < 3:
-                continue
-            date_str = row[0][:10]
-            if date_str == today_str:
-                try:
-                    m = float(row[2])
-                except ValueError:
-                    continue
-                total_minutes += m
-                record_count += 1
+    total_minutes, record_count = get_store().day_total(today_str)
 
     return f"今日记录次数：{record_count}\n今日学习总时长：{round(total_minutes, 2)} 分钟"
 
 
-def summarize_recent(days: int = 7, do_plot: bool = False) -> str:
+@perf.timed("最近统计")
+def summarize_recent(days: int = 7, do_plot: bool = False, chart_size=(6, 3.2)):
     """
     统计最近 days 天的每日学习总时长，并可选择画图。
-    返回文本描述。
+    返回 (文本描述, PNG 图片字节或 None)；图是离屏画的，可以在后台线程调用。
+    同一区间数据没变时直接用缓存里的图，不会重画。
     """
+    log_writer.flush()
     ensure_log_file()
     if not LOG_FILE.exists():
-        return "目前还没有任何学习记录。"
-
-    daily_minutes = {}
-    with LOG_FILE.open("r", encoding="utf-8") as f:
-        reader = csv.reader(f)
-        next(reader, None)
-        for row in reader:
-            if len(row) < 3:
-                continue
-            date_str = row[0][:10]
-            try:
-                m = float(row[2])
-            except ValueError:
-                continue
-            daily_minutes[date_str] = daily_minutes.get(date_str, 0.0) + m
+        return "目前还没有任何学习记录。", None
 
     today = datetime.now().date()
-    dates = []
-    values = []
-    for i in range(days - 1, -1, -1):
-        d = today - timedelta(days=i)
-        d_str = d.strftime("%Y-%m-%d")
-        dates.append(d_str)
-        values.append(round(daily_minutes.get(d_str, 0.0), 2))
+    from_date = (today - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+    to_date = today.strftime("%Y-%m-%d")
+    from aggregate import get_engine    # 用到才导入，里面会导入 numpy
+    engine = get_engine(get_store())
+    daily = engine.daily(from_date, to_date)
+    dates = [d_str for d_str, _ in daily]
+    values = [round(v, 2) for _, v in daily]
 
     lines = [f"最近 {days} 天每日学习时长："]
     for d_str, v in zip(dates, values):
         lines.append(f"{d_str}：{v} 分钟")
+    by_mode = engine.by_mode(from_date, to_date)
+    if by_mode:
+        parts = [f"{MODE_NAMES.get(m, m or '未知')} {round(v, 2)}" for m, v in sorted(by_mode.items())]
+        lines.append("按模式：" + " / ".join(parts) + " 分钟")
+    hourly = engine.hourly(from_date, to_date)
+    busiest = [h for h in sorted(range(24), key=lambda h: -hourly[h])[:3] if hourly[h] > 0]
+    if busiest:
+        parts = [f"{h:02d}:00-{h + 1:02d}:00 {round(hourly[h], 1)}" for h in busiest]
+        lines.append("学得最多的时段：" + " / ".join(parts) + " 分钟")
     text = "\n".join(lines)
 
+    chart = None
     if do_plot:
-        if plt is None:
+        import charts    # 用到才导入，matplotlib 很重
+        if not charts.available():
             text += "\n\n（未安装 matplotlib，无法画图）"
         else:
-            plt.figure()
-            plt.plot(dates, values, marker="o")
-            plt.title(f"最近 {days} 天每日学习时长")
-            plt.xlabel("日期")
-            plt.ylabel("学习时长（分钟）")
-            plt.xticks(rotation=45)
-            plt.tight_layout()
-            plt.show()
+            chart = charts.cached_line_chart(from_date, to_date, "day", dates, values,
+                                             f"最近 {days} 天每日学习时长", size=chart_size)
+
+    return text, chart
+
+
+def summarize_notes(keyword: str) -> str:
+    """
+    keyword 不为空时返回最近 30 天备注含它的学习时长，否则返回本月学得最多的科目（查备注索引）。
+    """
+    log_writer.flush()
+    ensure_log_file()
+    if not LOG_FILE.exists():
+        return "目前还没有任何学习记录。"
 
-    return text
+    import note_index
+    if keyword:
+        return note_index.keyword_report(get_store(), keyword, 30)
+    return note_index.top_report(get_store(), 10)
+
+
+def summarize_periods(kind: str = "week", count: int = 8) -> str:
+    """
+    返回最近 count 周（kind="week"）或 count 个月（kind="month"）的学习总时长文本。
+    """
+    log_writer.flush()
+    ensure_log_file()
+    if not LOG_FILE.exists():
+        return "目前还没有任何学习记录。"
+
+    store = get_store()
+    unit = "周" if kind == "week" else "个月"
+    lines = [f"最近 {count} {unit}学习时长："]
+    for key in recent_keys(kind, count):
+        minutes, record_count = store.period_total(kind, key)
+        line = f"{key}：{round(minutes, 2)} 分钟（{record_count} 次）"
+        by_mode = store.period_by_mode(kind, key)
+        if by_mode:
+            parts = [f"{MODE_NAMES.get(m, m or '未知')} {round(v, 2)}" for m, v in sorted(by_mode.items())]
+            line += "  " + " / ".join(parts)
+        lines.append(line)
+    return "\n".join(lines)
 
 
 # ================== 悬浮 GUI 计时器 ==================
 
 class FloatingPomodoroTimer:
     def __init__(self):
-        ensure_log_file()
-
         # ---- 粉色系配色 ----
         self.bg_color = "#2b182b"          # 深一点的紫粉
         self.card_color = "#3b203b"
@@ -153,7 +147,8 @@ class FloatingPomodoroTimer:
         self.root.attributes("-alpha", 0.92)   # 默认有一点透明
 
         # 先暂时设置个大小，后面再挪到右上角
-        width, height = 380, 270
+        width, height = 380, 316
+        self._base_height = height          # 图表面板收起时的高度
         self.root.geometry(f"{width}x{height}+0+0")
         self.root.update_idletasks()
         screen_w = self.root.winfo_screenwidth()
@@ -170,9 +165,11 @@ class FloatingPomodoroTimer:
         # ---- 状态变量 ----
         self.mode = "countup"          # "countup" 或 "countdown"
         self.running = False
-        self.start_time = None
-        self.elapsed = timedelta(0)
+        self.watch = Stopwatch()           # 本次学习的计时（单调时钟），暂停时不走
         self.countdown_total_seconds = 0
+        self._tick_job = None              # 已排队的 after 任务，暂停时取消
+        self._tick_due = None              # 那次任务排定的醒来时间（perf_counter），算晚到用
+        self._shown_text = "00:00:00"      # 当前显示的文本，没变就不重绘
 
         # =====  自定义“标题栏”区域  =====
         title_bar = tk.Frame(self.root, bg=self.card_color)
@@ -196,12 +193,24 @@ class FloatingPomodoroTimer:
         )
         close_label.pack(side="right", padx=5)
 
+        # 多计时器面板（第一次点开时才建）
+        timers_label = tk.Label(
+            title_bar,
+            text="多计时",
+            bg=self.card_color,
+            fg=self.accent_color,
+            font=("Segoe UI", 8)
+        )
+        timers_label.pack(side="right", padx=5)
+        timers_label.bind("<Button-1>", lambda e: self.open_timer_set())
+        self.timer_panel = None
+
         # 标题栏支持拖动
         for widget in (title_bar, self.title_label):
             widget.bind("<Button-1>", self.start_move)
             widget.bind("<B1-Motion>", self.on_move)
 
-        close_label.bind("<Button-1>", lambda e: self.root.destroy())
+        close_label.bind("<Button-1>", lambda e: self.close())
 
         # ===== 主内容区域 =====
         main_frame = tk.Frame(self.root, bg=self.bg_color)
@@ -330,6 +339,51 @@ class FloatingPomodoroTimer:
         )
         self.recent_btn.grid(row=0, column=1, padx=2)
 
+        self.week_btn = tk.Button(
+            stat_frame,
+            text="周",
+            font=("Segoe UI", 8),
+            width=4,
+            command=self.show_week_stat,
+            bg="#4b2b4b",
+            fg=self.text_color,
+            activebackground="#5c3560",
+            activeforeground=self.text_color,
+            bd=0,
+            relief="flat"
+        )
+        self.week_btn.grid(row=0, column=2, padx=2)
+
+        self.month_btn = tk.Button(
+            stat_frame,
+            text="月",
+            font=("Segoe UI", 8),
+            width=4,
+            command=self.show_month_stat,
+            bg="#4b2b4b",
+            fg=self.text_color,
+            activebackground="#5c3560",
+            activeforeground=self.text_color,
+            bd=0,
+            relief="flat"
+        )
+        self.month_btn.grid(row=0, column=3, padx=2)
+
+        self.notes_btn = tk.Button(
+            stat_frame,
+            text="科目",
+            font=("Segoe UI", 8),
+            width=4,
+            command=self.show_notes_stat,
+            bg="#4b2b4b",
+            fg=self.text_color,
+            activebackground="#5c3560",
+            activeforeground=self.text_color,
+            bd=0,
+            relief="flat"
+        )
+        self.notes_btn.grid(row=0, column=4, padx=2)
+
         # 透明度调节（小号版）
         alpha_frame = tk.Frame(main_frame, bg=self.bg_color)
         alpha_frame.pack(pady=(3, 0))
@@ -360,10 +414,110 @@ class FloatingPomodoroTimer:
         self.alpha_scale.set(92)
         self.alpha_scale.pack(side="left")
 
-        # 启动刷新
-        self.update_time()
+        # 常驻小柱状条：今天每小时 + 最近几天，计时中当前那根柱子跟着涨
+        self.strip = ProgressStrip(
+            main_frame,
+            width=340,
+            height=40,
+            days=STRIP_DAYS,
+            bg=self.bg_color,
+            color="#5c3560",
+            current_color=self.primary_color,
+            text_color=self.accent_color
+        )
+        self.strip.canvas.pack(pady=(4, 0))
+
+        # ===== 图表面板（平时收起，看最近曲线时展开在窗口下方） =====
+        self.chart_panel = tk.Frame(self.root, bg=self.card_color)
+        chart_bar = tk.Frame(self.chart_panel, bg=self.card_color)
+        chart_bar.pack(fill="x")
+        self.chart_title = tk.Label(
+            chart_bar,
+            text="",
+            font=("Segoe UI", 8),
+            bg=self.card_color,
+            fg=self.accent_color
+        )
+        self.chart_title.pack(side="left", padx=5)
+        hide_label = tk.Label(
+            chart_bar,
+            text="收起",
+            font=("Segoe UI", 8),
+            bg=self.card_color,
+            fg=self.text_color
+        )
+        hide_label.pack(side="right", padx=5)
+        hide_label.bind("<Button-1>", lambda e: self.hide_chart())
+        self.chart_label = tk.Label(self.chart_panel, bg=self.card_color)
+        self.chart_label.pack(padx=5, pady=(0, 5))
+        self._shown_png = None      # 面板上正显示的 PNG，和新结果是同一个对象就不重建图片
+
+        # ===== 性能统计小字（STUDY_TIMER_PERF=1 或 Ctrl+Shift+P 打开，见 perf.py） =====
+        self.perf_label = tk.Label(
+            self.root,
+            text="",
+            font=("Consolas", 7),
+            justify="left",
+            bg=self.card_color,
+            fg=self.accent_color
+        )
+        self._perf_job = None
+        self.root.bind("<Control-Shift-P>", lambda e: self.toggle_perf())
+
+        # 统计和画图放到后台线程，主线程只管显示
+        self.worker = StatsWorker(self.root)
+        # 进行中的学习定期存档
+        self.journal = SessionJournal()
+        startup_profile.mark("界面搭好")
+
+        # 窗口先显示出来，碰日志文件的事都放到首帧之后
+        self._first_frame = False
+        self.root.bind("<Map>", self.on_first_frame)
+
+        # 计时刷新在点“开始”时才启动，空闲时不占 CPU
         self.root.mainloop()
 
+    def on_first_frame(self, event):
+        if self._first_frame or event.widget is not self.root:
+            return
+        self._first_frame = True
+        startup_profile.mark("首帧")
+        ensure_log_file()
+        # 保存记录交给后台写线程，点“结束”后界面不用等磁盘
+        log_writer.start()
+        self.reload_strip()
+        self.schedule_midnight_reload()
+        # 上次异常退出留下的学习先问要不要补记
+        self.root.after(0, self.offer_recovery)
+        self.root.after_idle(startup_profile.report)
+        if perf.ENABLED:
+            self.show_perf_overlay()
+
+    # ---------- 关闭 ----------
+    def close(self):
+        # 关窗时还有没保存的学习就存个档，下次启动可以补记
+        self.journal.checkpoint(self.watch, self.mode, self.countdown_total_seconds, force=True)
+        self.journal.close()
+        if self.timer_panel is not None:
+            self.timer_panel.close()    # 多计时器里还在计的都记下来
+        self.worker.shutdown()
+        log_writer.stop()       # 把还没写完的记录写完再退出
+        self.root.destroy()
+
+    # ---------- 多计时器 ----------
+    def open_timer_set(self):
+        if self.timer_panel is None:
+            self.timer_panel = TimerSetPanel(
+                self.root,
+                bg=self.bg_color,
+                card_color=self.card_color,
+                text_color=self.text_color,
+                accent_color=self.accent_color,
+                primary_color=self.primary_color,
+                on_saved=self.reload_strip
+            )
+        self.timer_panel.show()
+
     # ---------- 窗口拖动 ----------
     def start_move(self, event):
         self._drag_start_x = event.x
@@ -392,7 +546,8 @@ class FloatingPomodoroTimer:
 
         self.mode = "countdown"
         self.countdown_total_seconds = 25 * 60
-        self.elapsed = timedelta(0)
+        self.watch.reset()
+        self.strip.clear_live()
 
         self.mode_label.config(text="模式：番茄钟 25 分钟")
         self.update_time_label_for_countdown()
@@ -419,7 +574,8 @@ class FloatingPomodoroTimer:
         # 只做“模式设置”和“显示”，不自动开始
         self.mode = "countdown"
         self.countdown_total_seconds = int(minutes * 60)
-        self.elapsed = timedelta(0)
+        self.watch.reset()
+        self.strip.clear_live()
 
         self.mode_label.config(text=f"模式：倒计时 {minutes:.1f} 分钟")
         self.update_time_label_for_countdown()
@@ -437,76 +593,170 @@ class FloatingPomodoroTimer:
     def toggle(self):
         if not self.running:
             # 开始或继续
-            self.start_time = datetime.now() - self.elapsed
+            self.watch.start()
             self.running = True
             self.start_btn.config(text="暂停", bg="#ff92d2", activebackground="#ffb3e1")
+            self.journal.checkpoint(self.watch, self.mode, self.countdown_total_seconds, force=True)
+            self.update_time()
         else:
             # 暂停
-            self.elapsed = datetime.now() - self.start_time
+            self.watch.pause()
             self.running = False
+            self.cancel_tick()
+            self.journal.checkpoint(self.watch, self.mode, self.countdown_total_seconds, force=True)
             self.start_btn.config(text="继续", bg=self.primary_color, activebackground="#ff92d2")
 
     # ---------- 结束本次学习并保存 ----------
     def finish_and_save(self):
         if self.running:
-            self.elapsed = datetime.now() - self.start_time
             self.running = False
+            self.cancel_tick()
 
         self.start_btn.config(text="开始", bg=self.primary_color, activebackground="#ff92d2")
 
-        if self.elapsed.total_seconds() <= 0:
+        duration_seconds = self.watch.stop()
+        if duration_seconds <= 0:
             messagebox.showinfo("提示", "当前没有正在进行或已暂停的学习记录。")
             return
 
-        end_dt = datetime.now()
-        start_dt = end_dt - self.elapsed
-        duration_seconds = self.elapsed.total_seconds()
+        start_dt, end_dt = self.watch.span()
 
         note = simpledialog.askstring("备注", "给本次学习写个备注（可空）：")
         if note is None:
             note = ""
 
         save_log(start_dt, end_dt, duration_seconds, self.mode, note)
-        messagebox.showinfo("保存成功", "本次学习记录已保存到 study_log.csv")
+        self.journal.clear()
+        self.strip.freeze()
+        self.reload_strip()
+        messagebox.showinfo("保存成功", f"本次学习记录已保存到 {LOG_FILE}")
 
         # 重置
-        self.elapsed = timedelta(0)
-        self.time_label.config(text="00:00:00")
+        self.watch.reset()
+        self.set_time_text("00:00:00")
         self.mode = "countup"
         self.mode_label.config(text="模式：正计时")
 
-    # ---------- 每 100ms 更新时间 ----------
+    # ---------- 计时刷新：只在运行时醒来，而且只在整秒边界醒 ----------
     def update_time(self):
+        self._tick_job = None
+        if not self.running:
+            return      # 暂停 / 未开始时完全不排下一次
+        t0 = time.perf_counter()
+        perf.late("刷新晚到", t0, self._tick_due)
+        self._tick_due = None
+        self.tick()
+        if self.running:    # 倒计时到点会弹窗等输入，那一次不算
+            perf.record("计时刷新", time.perf_counter() - t0)
+
+    def tick(self):
+        if self.mode == "countup":
+            self.update_time_label_for_countup()
+        else:
+            self.update_time_label_for_countdown(auto_stop=True)
         if self.running:
-            now = datetime.now()
-            self.elapsed = now - self.start_time
-            if self.mode == "countup":
-                self.update_time_label_for_countup()
-            else:
-                self.update_time_label_for_countdown(auto_stop=True)
-        self.root.after(100, self.update_time)
+            self.strip.set_live(self.watch.span()[0], self.watch.elapsed())
+            # 没到存档间隔时只是比较一下时间，每秒调用也不费事
+            self.journal.checkpoint(self.watch, self.mode, self.countdown_total_seconds)
+            self.schedule_next_tick()
+
+    # ---------- 性能统计小字 ----------
+    def toggle_perf(self):
+        if self.perf_label.winfo_ismapped():
+            perf.disable()
+            self.perf_label.place_forget()
+            if self._perf_job is not None:
+                self.root.after_cancel(self._perf_job)
+                self._perf_job = None
+        else:
+            perf.enable()
+            self.show_perf_overlay()
+
+    def show_perf_overlay(self):
+        self.perf_label.place(relx=1.0, rely=1.0, x=-4, y=-4, anchor="se")
+        self.refresh_perf_overlay()
+
+    def refresh_perf_overlay(self):
+        """
+        每秒刷新一次 p50 / p99，小字叠在窗口右下角，不影响布局。
+        """
+        self.perf_label.config(text=perf.overlay_text())
+        self.perf_label.lift()
+        self._perf_job = self.root.after(PERF_OVERLAY_MS, self.refresh_perf_overlay)
+
+    # ---------- 异常退出后的补记 ----------
+    def offer_recovery(self):
+        entry = self.journal.pending()
+        if entry is None:
+            return
+        start_dt, end_dt, seconds = recovered_span(entry)
+        mode_name = MODE_NAMES.get(entry.mode, entry.mode)
+        if messagebox.askyesno(
+                "发现未保存的学习",
+                f"上次有一段学习没来得及保存：\n"
+                f"{start_dt.strftime('%Y-%m-%d %H:%M')} 开始，{mode_name}，"
+                f"已学 {format_hms(seconds)}。\n\n要补记到学习日志吗？"):
+            save_log(start_dt, end_dt, seconds, entry.mode, "（异常退出后补记）")
+            self.reload_strip()
+        self.journal.clear()
+
+    # ---------- 常驻柱状条 ----------
+    def reload_strip(self):
+        """
+        后台重读柱状条的数据（会等排队的记录先写完），读完在主线程换上。
+        """
+        today = datetime.now().date()
+        self.worker.submit(strip_data, get_store(), STRIP_DAYS, today,
+                           on_done=lambda data: self.strip.load(data, today))
+
+    def schedule_midnight_reload(self):
+        """
+        过了零点“今天”就换了，到点重读一次，平时不用轮询。
+        """
+        now = datetime.now()
+        midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+        delay_ms = int((midnight - now).total_seconds() * 1000) + 1000
+        self.root.after(delay_ms, lambda: (self.reload_strip(), self.schedule_midnight_reload()))
+
+    def schedule_next_tick(self):
+        """
+        显示只精确到秒，所以算出离下一个整秒还有多久，到点再醒（多等 1ms 确保跨过边界）。
+        """
+        delay_ms = int(self.watch.until_next_second() * 1000) + 1
+        self._tick_job = self.root.after(delay_ms, self.update_time)
+        self._tick_due = time.perf_counter() + delay_ms / 1000
+
+    def cancel_tick(self):
+        if self._tick_job is not None:
+            self.root.after_cancel(self._tick_job)
+            self._tick_job = None
+            self._tick_due = None
+
+    def set_time_text(self, text: str):
+        """
+        文本没变就不碰控件，省掉无谓的重绘。
+        """
+        if text != self._shown_text:
+            self._shown_text = text
+            self.time_label.config(text=text)
 
     def update_time_label_for_countup(self):
-        seconds = int(self.elapsed.total_seconds())
-        h, rem = divmod(seconds, 3600)
-        m, s = divmod(rem, 60)
-        self.time_label.config(text=f"{h:02d}:{m:02d}:{s:02d}")
+        self.set_time_text(format_hms(self.watch.elapsed()))
 
     def update_time_label_for_countdown(self, auto_stop=False):
-        elapsed_sec = int(self.elapsed.total_seconds())
+        elapsed_sec = int(self.watch.elapsed())
         remaining = self.countdown_total_seconds - elapsed_sec
         if remaining < 0:
             remaining = 0
 
-        h, rem = divmod(remaining, 3600)
-        m, s = divmod(rem, 60)
-        self.time_label.config(text=f"{h:02d}:{m:02d}:{s:02d}")
+        self.set_time_text(format_hms(remaining))
 
         if auto_stop and remaining <= 0 and self.running:
             # 倒计时结束
             self.running = False
             self.start_btn.config(text="开始", bg=self.primary_color, activebackground="#ff92d2")
-            end_dt = datetime.now()
+            self.watch.stop()
+            end_dt = self.watch.stopped_at
             start_dt = end_dt - timedelta(seconds=self.countdown_total_seconds)
             duration_seconds = self.countdown_total_seconds
 
@@ -514,25 +764,82 @@ class FloatingPomodoroTimer:
             if note is None:
                 note = ""
             save_log(start_dt, end_dt, duration_seconds, "countdown", note)
-            messagebox.showinfo("提示", "倒计时已结束，本次学习记录已保存到 study_log.csv")
+            self.journal.clear()
+            self.strip.freeze()
+            self.reload_strip()
+            messagebox.showinfo("提示", f"倒计时已结束，本次学习记录已保存到 {LOG_FILE}")
 
-            self.elapsed = timedelta(0)
+            self.watch.reset()
             self.mode = "countup"
             self.mode_label.config(text="模式：正计时")
 
-    # ---------- 今日 & 最近统计 ----------
+    # ---------- 今日 & 最近统计（后台计算，算完再弹窗） ----------
     def show_today_stat(self):
-        text = summarize_today()
-        messagebox.showinfo("今日学习统计", text)
+        self.worker.submit(summarize_today,
+                           on_done=lambda text: messagebox.showinfo("今日学习统计", text),
+                           on_error=self.on_stat_error)
 
     def show_recent_stat(self):
         days = simpledialog.askinteger("最近 N 天", "请输入要查看的天数（例如 7）：", minvalue=1, maxvalue=365)
         if days is None:
             return
         want_plot = messagebox.askyesno("画图？", "是否画出最近天数的学习折线图？（需要安装 matplotlib）")
-        text = summarize_recent(days=days, do_plot=want_plot)
+        self.recent_btn.config(text="计算中", state="disabled")
+        self.worker.submit(summarize_recent, days, want_plot, PANEL_CHART_SIZE,
+                           on_done=self.on_recent_ready,
+                           on_error=self.on_stat_error)
+
+    def on_recent_ready(self, result):
+        self.recent_btn.config(text="N天", state="normal")
+        text, chart = result
+        if chart is not None:
+            self.show_chart(chart, "最近学习曲线")
         messagebox.showinfo("最近学习统计", text)
 
+    def on_stat_error(self, error):
+        self.recent_btn.config(text="N天", state="normal")
+        messagebox.showerror("统计出错", str(error))
+
+    def show_chart(self, png: bytes, title: str):
+        """
+        在窗口下方的图表面板里显示后台画好的 PNG 图，窗口跟着变高。
+        图是缓存里的同一张时不用重新解码。
+        """
+        self.chart_title.config(text=title)
+        if png is not self._shown_png:
+            image = tk.PhotoImage(data=base64.b64encode(png))
+            self.chart_label.config(image=image)
+            self.chart_label.image = image     # 留个引用，否则图片会被回收
+            self._shown_png = png
+        if not self.chart_panel.winfo_ismapped():
+            self.chart_panel.pack(fill="x", padx=8, pady=(0, 5))
+        self.root.update_idletasks()
+        height = self._base_height + self.chart_panel.winfo_reqheight() + 5
+        self.root.geometry(f"{self.root.winfo_width()}x{height}")
+
+    def hide_chart(self):
+        self.chart_panel.pack_forget()
+        self.root.geometry(f"{self.root.winfo_width()}x{self._base_height}")
+
+    def show_week_stat(self):
+        self.worker.submit(summarize_periods, "week", 8,
+                           on_done=lambda text: messagebox.showinfo("每周学习统计", text),
+                           on_error=self.on_stat_error)
+
+    def show_month_stat(self):
+        self.worker.submit(summarize_periods, "month", 6,
+                           on_done=lambda text: messagebox.showinfo("每月学习统计", text),
+                           on_error=self.on_stat_error)
+
+    def show_notes_stat(self):
+        keyword = simpledialog.askstring("按备注统计", "输入备注关键词（留空则列出本月学得最多的科目）：")
+        if keyword is None:
+            return
+        self.worker.submit(summarize_notes, keyword.strip(),
+                           on_done=lambda text: messagebox.showinfo("备注 / 科目统计", text),
+                           on_error=self.on_stat_error)
+
 
 if __name__ == "__main__":
+    startup_profile.mark("导入完成")
     FloatingPomodoroTimer()
@@ -0,0 +1,112 @@
+"""
+计时引擎：命令行和悬浮窗共用。
+
+时长一律用 time.monotonic() 计算，系统改时间、NTP 校时都不会影响；
+墙上时间（datetime.now()）只在开始 / 结束时各记一次，用来写日志。
+"""
+import time
+from datetime import datetime, timedelta
+
+
+class Stopwatch:
+    """
+    可暂停的秒表：start → pause / resume → stop，暂停期间不计时。
+
+    elapsed() 返回累计秒数；span() 给出写日志用的 (开始, 结束) 墙上时间。
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self.reset()
+
+    def reset(self):
+        """
+        回到未开始状态，累计时长清零。
+        """
+        self.running = False
+        self.started_at = None      # 第一次开始时的墙上时间
+        self.stopped_at = None      # 结束时的墙上时间
+        self._base = 0.0            # 最近一次继续之前已累计的秒数
+        self._resumed = 0.0         # 最近一次开始 / 继续时的单调时钟读数
+
+    @property
+    def started(self) -> bool:
+        return self.started_at is not None
+
+    # ---------- 控制 ----------
+    def start(self):
+        """
+        开始计时；已经开始过的话等同于 resume()。
+        """
+        if self.started_at is None:
+            self.started_at = datetime.now()
+        self.resume()
+
+    def resume(self):
+        if self.running:
+            return
+        self.stopped_at = None
+        self._resumed = self._clock()
+        self.running = True
+
+    def pause(self):
+        if not self.running:
+            return
+        self._base += self._clock() - self._resumed
+        self.running = False
+
+    def stop(self) -> float:
+        """
+        结束计时，记下结束的墙上时间，返回累计秒数。
+        """
+        self.pause()
+        self.stopped_at = datetime.now()
+        return self._base
+
+    # ---------- 读数 ----------
+    def elapsed(self) -> float:
+        if self.running:
+            return self._base + (self._clock() - self._resumed)
+        return self._base
+
+    def until_next_second(self) -> float:
+        """
+        离累计时长的下一个整秒还有多少秒，用来安排下一次刷新显示。
+        """
+        seconds = self.elapsed()
+        return 1.0 - (seconds - int(seconds))
+
+    def span(self):
+        """
+        写日志用的 (开始, 结束) 墙上时间。
+
+        结束取 stop() 时的时间（还没 stop 就取现在），开始由结束倒推累计时长，
+        这样 结束 - 开始 恰好等于实际学习时长，中间暂停的时间不算进去。
+        """
+        end = self.stopped_at or datetime.now()
+        return end - timedelta(seconds=self.elapsed()), end
+
+
+class Countdown(Stopwatch):
+    """
+    倒计时：在秒表上加一个总时长。
+    """
+
+    def __init__(self, total_seconds: float, clock=time.monotonic):
+        super().__init__(clock)
+        self.total_seconds = total_seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.total_seconds - self.elapsed())
+
+    def finished(self) -> bool:
+        return self.elapsed() >= self.total_seconds
+
+
+def format_hms(seconds: float) -> str:
+    """
+    秒数 -> 'HH:MM:SS'（不足一秒的部分舍去）。
+    """
+    h, rem = divmod(int(seconds), 3600)
+    m, s = divmod(rem, 60)
+    return f"{h:02d}:{m:02d}:{s:02d}"